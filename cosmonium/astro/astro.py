@@ -19,6 +19,7 @@
 
 
 from math import pow, log, log10, exp, sqrt, asin, pi, atan2
+import numpy
 from panda3d.core import LVector3d, LQuaterniond, LPoint3d
 
 from . import units
@@ -69,6 +70,15 @@ def radiance_to_mag(radiance):
         return 1000.0
 
 
+def radiance_to_mag_array(radiances):
+    magnitudes = numpy.full(len(radiances), 1000.0)
+    positive = radiances > 0
+    magnitudes[positive] = (
+        units.sun_abs_magnitude - numpy.log(radiances[positive] / radiance_coef) / luminosity_magnitude_factor
+    )
+    return magnitudes
+
+
 def mag_to_surface_brightness(mag, distance, radius):
     if radius < distance:
         arc_radius = asin(radius / distance) * ang_diameter_to_arcsec
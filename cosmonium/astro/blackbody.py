@@ -16,6 +16,9 @@
 # along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import numpy
+
+from .. import settings
 
 try:
     from cosmonium_engine import temp_to_RGB
@@ -23,3 +26,60 @@ except ImportError as e:
     print("WARNING: Could not load Blackbody C implementation, fallback on python implementation")
     print("\t", e)
     from .pyastro.blackbody import temp_to_RGB  # noqa: F401
+
+
+class BlackbodyColorTable:
+    """
+    Lookup table of the blackbody colors, sampled every step Kelvin, used to convert a whole catalog of temperatures
+    into point colors at once. The colors are linearly interpolated between the samples.
+    """
+
+    def __init__(self, step=10.0, max_temperature=100000.0):
+        self.step = step
+        self.temperatures = numpy.arange(0.0, max_temperature + step, step)
+        self.colors = self.calc_colors(self.temperatures)
+        self.linear_colors = numpy.where(
+            self.colors > 0.0404482362771082, numpy.power((self.colors + 0.055) / 1.055, 2.4), self.colors / 12.92
+        )
+
+    @staticmethod
+    def calc_colors(kelvins):
+        temp = kelvins / 100.0
+        red = numpy.full(temp.shape, 255.0)
+        green = numpy.empty(temp.shape)
+        blue = numpy.full(temp.shape, 255.0)
+        cold = temp <= 66
+        hot = ~cold
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            green[cold] = 99.4708025861 * numpy.log(temp[cold]) - 161.1195681661
+            blue[cold] = 138.5177312231 * numpy.log(temp[cold] - 10) - 305.0447927307
+            blue[temp <= 19] = 0.0
+            red[hot] = 329.698727446 * numpy.power(temp[hot] - 60, -0.1332047592)
+            green[hot] = 288.1221695283 * numpy.power(temp[hot] - 60, -0.0755148492)
+        colors = numpy.stack((red, green, blue), axis=-1) / 255.0
+        return numpy.clip(numpy.nan_to_num(colors, nan=0.0), 0.0, 1.0)
+
+    def temp_to_RGB_array(self, kelvins, linear=False):
+        """
+        Returns the RGBA colors of the given temperatures as an array of shape (n, 4).
+        If linear is True, the colors are converted in linear space when sRGB is enabled.
+        """
+        kelvins = numpy.asarray(kelvins, dtype=numpy.float64)
+        if linear and settings.use_srgb:
+            table = self.linear_colors
+        else:
+            table = self.colors
+        colors = numpy.ones((len(kelvins), 4))
+        for channel in range(3):
+            colors[:, channel] = numpy.interp(kelvins, self.temperatures, table[:, channel])
+        return colors
+
+
+blackbody_color_table = None
+
+
+def temp_to_RGB_array(kelvins, linear=False):
+    global blackbody_color_table
+    if blackbody_color_table is None:
+        blackbody_color_table = BlackbodyColorTable()
+    return blackbody_color_table.temp_to_RGB_array(kelvins, linear)
@@ -0,0 +1,332 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from direct.stdpy import threading
+import hashlib
+from math import floor, cos, pi
+from panda3d.core import LPoint3d, LVector3d, LVecBase3d, PTA_LVecBase3d
+from queue import Queue
+import numpy
+from numpy.polynomial import chebyshev
+import os
+import pickle
+
+from ..cache import create_path_for
+from .orbits import CachedFunctionOrbit
+from . import units
+from .. import settings
+
+
+class ChebyshevSegment:
+    """
+    Chebyshev approximation of a frame position over the time window [start, end[.
+    The coefficients are stored as a (degree + 1, 3) array, one column per axis.
+    """
+
+    def __init__(self, start, end, coefs):
+        self.start = start
+        self.end = end
+        self.coefs = coefs
+        self.half_span = (end - start) / 2.0
+        self.mid = (end + start) / 2.0
+        self.der_coefs = chebyshev.chebder(coefs) / self.half_span
+
+    def contains(self, time):
+        return self.start <= time < self.end
+
+    def to_x(self, time):
+        return (time - self.mid) / self.half_span
+
+    def evaluate(self, time):
+        return LPoint3d(*chebyshev.chebval(self.to_x(time), self.coefs))
+
+    def evaluate_velocity(self, time):
+        return LVector3d(*chebyshev.chebval(self.to_x(time), self.der_coefs))
+
+    def evaluate_array(self, times):
+        return chebyshev.chebval(self.to_x(times), self.coefs).T
+
+    @classmethod
+    def fit(cls, func, start, end, degree):
+        nb_points = degree + 1
+        nodes = numpy.array([cos(pi * (k + 0.5) / nb_points) for k in range(nb_points)])
+        half_span = (end - start) / 2.0
+        mid = (end + start) / 2.0
+        values = numpy.array([tuple(func(mid + x * half_span)) for x in nodes])
+        coefs = chebyshev.chebfit(nodes, values, degree)
+        return cls(start, end, coefs)
+
+    def max_error(self, func, nb_samples):
+        # Check the fit between the interpolation nodes, where the error is the largest
+        error = 0.0
+        for i in range(nb_samples):
+            time = self.start + (i + 0.5) * (self.end - self.start) / nb_samples
+            error = max(error, (self.evaluate(time) - LPoint3d(func(time))).length())
+        return error
+
+
+class EphemerisSeries:
+    """
+    Lazily fitted Chebyshev segments of the frame position of one orbit.
+    The segments are aligned on a fixed time window; when the fit can not reach the requested tolerance with the
+    maximum degree, the window is halved and the series is refitted.
+    Each fitted segment is pushed to the cached orbit, which then serves the positions of the anchor.
+    """
+
+    def __init__(self, signature, cached_orbit, window, degree, tolerance):
+        self.signature = signature
+        self.cached_orbit = cached_orbit
+        self.orbit = cached_orbit.orbit
+        self.name = self.orbit.__class__.__name__
+        self.initial_window = window
+        self.degree = degree
+        self.tolerance = tolerance
+        # The window and the segments are only accessed with the lock held, the segments are fitted by a worker thread
+        self.lock = threading.Lock()
+        self.window = window
+        self.segments = {}
+        self.pending = set()
+
+    def get_index(self, time, window):
+        return int(floor(time / window))
+
+    def fit_segment(self, index, window):
+        func = self.orbit.get_frame_position_at
+        start = index * window
+        end = start + window
+        degree = self.degree
+        while degree <= settings.ephemeris_cache_max_degree:
+            segment = ChebyshevSegment.fit(func, start, end, degree)
+            if segment.max_error(func, degree) <= self.tolerance:
+                return segment
+            degree *= 2
+        if window <= settings.ephemeris_cache_min_window:
+            print("Ephemeris cache: could not fit", self.name, "within", self.tolerance)
+            return segment
+        return None
+
+    def halve_window(self, window):
+        with self.lock:
+            if self.window == window:
+                self.window = window / 2
+                self.segments = {}
+                self.cached_orbit.set_window(self.window)
+
+    def publish(self, index, window, segment):
+        with self.lock:
+            if self.window != window:
+                return False
+            self.segments[index] = segment
+            self.cached_orbit.add_segment(window, segment.start, segment.end, make_coefs(segment.coefs))
+            return True
+
+    def get_segment(self, time):
+        while True:
+            with self.lock:
+                window = self.window
+                index = self.get_index(time, window)
+                segment = self.segments.get(index)
+            if segment is not None:
+                return segment
+            # The fit is done without the lock, the result is discarded if the window was changed meanwhile
+            segment = self.fit_segment(index, window)
+            if segment is None:
+                self.halve_window(window)
+            elif self.publish(index, window, segment) or window <= settings.ephemeris_cache_min_window:
+                return segment
+
+    def has_segment(self, time):
+        with self.lock:
+            return self.get_index(time, self.window) in self.segments
+
+    def get_frame_positions_at(self, times):
+        """
+        Returns the frame positions for a sorted sequence of times as a (n, 3) array.
+        """
+        times = numpy.asarray(times, dtype=numpy.float64)
+        result = numpy.empty((len(times), 3))
+        start = 0
+        while start < len(times):
+            segment = self.get_segment(times[start])
+            end = start + max(1, numpy.searchsorted(times[start:], segment.end))
+            result[start:end] = segment.evaluate_array(times[start:end])
+            start = end
+        return result
+
+    def get_local_positions_at(self, times):
+        frame = self.orbit.frame
+        positions = self.get_frame_positions_at(times)
+        return [
+            frame.get_local_position(self.orbit.get_frame_rotation_at(time).xform(LPoint3d(*position)))
+            for time, position in zip(times, positions)
+        ]
+
+    def get_state(self):
+        with self.lock:
+            segments = [(segment.start, segment.end, segment.coefs) for segment in self.segments.values()]
+            return {'signature': self.signature, 'window': self.window, 'segments': segments}
+
+    def set_state(self, state):
+        with self.lock:
+            self.window = state['window']
+            self.segments = {}
+            self.cached_orbit.set_window(self.window)
+            for start, end, coefs in state['segments']:
+                segment = ChebyshevSegment(start, end, coefs)
+                index = int(floor(start / self.window + 0.5))
+                self.segments[index] = segment
+                self.cached_orbit.add_segment(self.window, start, end, make_coefs(coefs))
+
+
+def make_coefs(coefs):
+    array = PTA_LVecBase3d.empty_array(0)
+    for coef in coefs:
+        array.push_back(LVecBase3d(*coef))
+    return array
+
+
+class EphemerisCache:
+    """
+    Cache of Chebyshev fitted positions for the orbits that are expensive to evaluate.
+    Segments are fitted on demand, or ahead of time in a background thread when prefetch() is called.
+    The series are identified by a signature computed from the orbit and the fit parameters, so that the same orbit
+    is fitted only once and an edited orbit does not reuse stale segments.
+    """
+
+    version = 2
+    # Fixed times, relative to J2000, at which the orbit is sampled to build its signature
+    signature_samples = (0.0, 0.25, 0.5, 0.75)
+
+    def __init__(self):
+        self.series = {}
+        self.orbits = {}
+        self.queue = None
+        self.thread = None
+
+    def get_parameters(self, orbit):
+        period = orbit.get_period() if hasattr(orbit, 'get_period') else 0
+        if period > 0:
+            window = period / settings.ephemeris_cache_segments_per_period
+        else:
+            window = settings.ephemeris_cache_default_window
+        return (period, window, settings.ephemeris_cache_degree, settings.ephemeris_cache_tolerance)
+
+    def get_signature(self, orbit, period, window, degree, tolerance):
+        signature = hashlib.sha1()
+        signature.update(repr((orbit.__class__.__name__, period, window, degree, tolerance)).encode())
+        # The orbit elements are not exposed, sample the orbit to detect any change in its parameters
+        for offset in self.signature_samples:
+            position = orbit.get_frame_position_at(units.J2000 + offset * max(period, window))
+            signature.update(repr(tuple(round(x, 3) for x in position)).encode())
+        return signature.hexdigest()
+
+    def get_cached_orbit(self, orbit):
+        """
+        Returns a CachedFunctionOrbit wrapping the given orbit, whose positions are served by the cache.
+        """
+        if isinstance(orbit, CachedFunctionOrbit):
+            return orbit
+        (period, window, degree, tolerance) = self.get_parameters(orbit)
+        signature = self.get_signature(orbit, period, window, degree, tolerance)
+        series = self.series.get(signature)
+        if series is None:
+            series = EphemerisSeries(signature, CachedFunctionOrbit(orbit, window), window, degree, tolerance)
+            if settings.ephemeris_cache_persist:
+                self.load_series(series)
+            self.series[signature] = series
+            self.orbits[id(series.cached_orbit)] = series
+        return series.cached_orbit
+
+    def get_series(self, cached_orbit):
+        return self.orbits.get(id(cached_orbit))
+
+    def evaluate_all(self, time):
+        """
+        Evaluate the frame position of all the cached orbits at the given time.
+        Returns the list of signatures and a (n, 3) array with the positions in the same order.
+        """
+        signatures = list(self.series.keys())
+        positions = numpy.empty((len(signatures), 3))
+        for i, signature in enumerate(signatures):
+            segment = self.series[signature].get_segment(time)
+            positions[i] = segment.evaluate_array(numpy.array([time]))[0]
+        return signatures, positions
+
+    def start_worker(self):
+        self.queue = Queue()
+        self.thread = threading.Thread(target=self.process_thread, name='EphemerisCacheThread', daemon=True)
+        self.thread.start()
+
+    def process_thread(self):
+        while True:
+            (series, key, time) = self.queue.get()
+            try:
+                series.get_segment(time)
+            finally:
+                series.pending.discard(key)
+
+    def queue_segment(self, series, time):
+        with series.lock:
+            window = series.window
+            index = series.get_index(time, window)
+            if index in series.segments:
+                return
+        key = (window, index)
+        if key not in series.pending:
+            series.pending.add(key)
+            self.queue.put([series, key, time])
+
+    def prefetch(self, time):
+        """
+        Queue the fit of the current and next segments of all the cached orbits in the background.
+        """
+        if self.thread is None:
+            self.start_worker()
+        for series in list(self.series.values()):
+            self.queue_segment(series, time)
+            self.queue_segment(series, time + series.window)
+
+    def get_cache_file(self, series):
+        cache_path = create_path_for('ephemeris')
+        return os.path.join(cache_path, "{}-{}.dat".format(series.name, series.signature))
+
+    def load_series(self, series):
+        cache_file = self.get_cache_file(series)
+        if not os.path.exists(cache_file):
+            return
+        try:
+            with open(cache_file, "rb") as f:
+                (version, state) = pickle.load(f)
+            if version == self.version and state['signature'] == series.signature:
+                series.set_state(state)
+        except (IOError, ValueError, EOFError, pickle.UnpicklingError) as e:
+            print("Could not read ephemeris cache for", series.name, cache_file, ':', e)
+
+    def save(self):
+        for series in self.series.values():
+            cache_file = self.get_cache_file(series)
+            try:
+                with open(cache_file, "wb") as f:
+                    pickle.dump((self.version, series.get_state()), f, pickle.HIGHEST_PROTOCOL)
+            except IOError as e:
+                print("Could not write ephemeris cache for", series.name, cache_file, ':', e)
+
+
+ephemeris_cache = EphemerisCache()
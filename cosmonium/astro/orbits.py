@@ -20,11 +20,11 @@
 
 try:
     from cosmonium_engine import OrbitBase, FixedPosition, AbsoluteFixedPosition, LocalFixedPosition
-    from cosmonium_engine import EllipticalOrbit, FunctionOrbit
+    from cosmonium_engine import EllipticalOrbit, FunctionOrbit, CachedFunctionOrbit
 
     Orbit = OrbitBase
 except ImportError as e:
     print("WARNING: Could not load Orbits C implementation, fallback on python implementation")
     print("\t", e)
     from .pyastro.orbits import Orbit, FixedPosition, AbsoluteFixedPosition, LocalFixedPosition  # noqa: F401
-    from .pyastro.orbits import EllipticalOrbit, FunctionOrbit  # noqa: F401
+    from .pyastro.orbits import EllipticalOrbit, FunctionOrbit, CachedFunctionOrbit  # noqa: F401
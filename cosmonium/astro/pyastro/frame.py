@@ -42,6 +42,14 @@ from .. import units
 
 
 class ReferenceFrame(object):
+    # Key of the transform of static frames, a frame whose center and orientation never change
+    static_key = (None, 0)
+
+    def get_cache_key(self):
+        """
+        Returns a value that changes each time the center or the orientation of the frame could have changed.
+        """
+        return self.static_key
 
     def get_center(self):
         raise NotImplementedError()
@@ -126,16 +134,44 @@ class J2000BarycentricEquatorialReferenceFrame(ReferenceFrame):
 class AnchorReferenceFrame(ReferenceFrame):
     def __init__(self, anchor=None):
         self.anchor = anchor
+        self.invalidate()
 
     def set_anchor(self, anchor):
         self.anchor = anchor
+        self.invalidate()
+
+    def invalidate(self):
+        self._cache_key = None
+        self._center = None
+        self._orientation = None
+
+    def get_cache_key(self):
+        if self.anchor is None:
+            return self.static_key
+        return (id(self.anchor), self.anchor.get_transform_key())
+
+    def check_cache(self):
+        key = self.get_cache_key()
+        if key != self._cache_key:
+            self._cache_key = key
+            self._center = None
+            self._orientation = None
 
     def get_center(self):
-        return self.anchor.get_local_position()
+        self.check_cache()
+        if self._center is None:
+            self._center = self.anchor.get_local_position()
+        return self._center
 
-    def get_orientation(self):
+    def calc_orientation(self):
         return self.anchor.get_absolute_orientation()
 
+    def get_orientation(self):
+        self.check_cache()
+        if self._orientation is None:
+            self._orientation = self.calc_orientation()
+        return self._orientation
+
     def get_absolute_reference_point(self):
         return self.anchor.get_absolute_reference_point()
 
@@ -144,18 +180,18 @@ class AnchorReferenceFrame(ReferenceFrame):
 
 
 class J2000EclipticReferenceFrame(AnchorReferenceFrame):
-    _orientation = LQuaterniond()
+    _fixed_orientation = LQuaterniond()
 
     def get_orientation(self):
-        return self._orientation
+        return self._fixed_orientation
 
 
 class J2000EquatorialReferenceFrame(AnchorReferenceFrame):
-    _orientation = LQuaterniond()
-    _orientation.setFromAxisAngleRad(-units.J2000_Obliquity / 180.0 * pi, LVector3d.unitX())
+    _fixed_orientation = LQuaterniond()
+    _fixed_orientation.setFromAxisAngleRad(-units.J2000_Obliquity / 180.0 * pi, LVector3d.unitX())
 
     def get_orientation(self):
-        return self._orientation
+        return self._fixed_orientation
 
 
 class RelativeReferenceFrame(ReferenceFrame):
@@ -164,12 +200,38 @@ class RelativeReferenceFrame(ReferenceFrame):
         self.parent_frame = parent_frame
         self.frame_position = position
         self.frame_orientation = orientation
+        self.invalidate()
+
+    def set_parent_frame(self, parent_frame):
+        self.parent_frame = parent_frame
+        self.invalidate()
+
+    def invalidate(self):
+        self._cache_key = None
+        self._center = None
+        self._orientation = None
+
+    def get_cache_key(self):
+        return self.parent_frame.get_cache_key()
+
+    def check_cache(self):
+        key = self.get_cache_key()
+        if key != self._cache_key:
+            self._cache_key = key
+            self._center = None
+            self._orientation = None
 
     def get_center(self):
-        return self.parent_frame.get_local_position(self.frame_position)
+        self.check_cache()
+        if self._center is None:
+            self._center = self.parent_frame.get_local_position(self.frame_position)
+        return self._center
 
     def get_orientation(self):
-        return self.parent_frame.get_absolute_orientation(self.frame_orientation)
+        self.check_cache()
+        if self._orientation is None:
+            self._orientation = self.parent_frame.get_absolute_orientation(self.frame_orientation)
+        return self._orientation
 
     def get_absolute_reference_point(self):
         return self.parent_frame.get_absolute_reference_point()
@@ -196,6 +258,7 @@ class CelestialReferenceFrame(AnchorReferenceFrame):
         longitude_at_nod_units=units.Deg,
     ):
         AnchorReferenceFrame.__init__(self, body)
+        self._conjugate = None
         self.right_asc = right_ascension * right_ascension_unit
         self.declination = declination * declination_unit
         self.longitude_at_node = longitude_at_node * longitude_at_nod_units
@@ -211,6 +274,18 @@ class CelestialReferenceFrame(AnchorReferenceFrame):
     def get_orientation(self):
         return self.orientation
 
+    def get_local_position(self, frame_position):
+        return self.get_center() + self.orientation.xform(frame_position)
+
+    def get_frame_position(self, local_position):
+        # The orientation is constant, its conjugate is only computed once
+        if self._conjugate is None:
+            self._conjugate = self.orientation.conjugate()
+        return self._conjugate.xform(local_position - self.get_center())
+
+    def get_absolute_orientation(self, frame_orientation):
+        return frame_orientation * self.orientation
+
 
 j2000GalacticReferenceFrame = CelestialReferenceFrame(
     right_ascension=units.J2000_GalacticNorthRightAscension,
@@ -220,18 +295,21 @@ j2000GalacticReferenceFrame = CelestialReferenceFrame(
 
 
 class OrbitReferenceFrame(AnchorReferenceFrame):
-    def get_orientation(self):
+    def get_cache_key(self):
+        return (id(self.anchor), self.anchor.get_transform_key(), self.anchor.orbit.frame.get_cache_key())
+
+    def calc_orientation(self):
         rot = self.anchor.orbit.frame.get_orientation()
         return rot
 
 
 class EquatorialReferenceFrame(AnchorReferenceFrame):
-    def get_orientation(self):
+    def calc_orientation(self):
         rot = self.anchor.get_equatorial_rotation()
         return rot
 
 
 class SynchroneReferenceFrame(AnchorReferenceFrame):
-    def get_orientation(self):
+    def calc_orientation(self):
         rot = self.anchor.get_sync_rotation()
         return rot
@@ -18,7 +18,8 @@
 #
 
 
-from math import pi
+from direct.stdpy import threading
+from math import floor, pi
 from panda3d.core import LPoint3d, LVector3d, LQuaterniond
 
 from ...parameters import ParametersGroup
@@ -194,3 +195,78 @@ class EllipticalOrbit(Orbit):
 
 class FunctionOrbit(Orbit):
     pass
+
+
+class CachedFunctionOrbit(FunctionOrbit):
+    """
+    Function orbit whose frame positions are evaluated from Chebyshev segments fitted on the wrapped orbit.
+    When the segment covering a time is not available yet, the wrapped orbit is evaluated directly.
+    """
+
+    def __init__(self, orbit, window):
+        FunctionOrbit.__init__(self, orbit.frame)
+        self.orbit = orbit
+        # The window and the segments are only accessed with the lock held, the segments are fitted by a worker thread
+        self.lock = threading.Lock()
+        self.window = window
+        self.segments = {}
+
+    def is_periodic(self):
+        return self.orbit.is_periodic()
+
+    def is_closed(self):
+        return self.orbit.is_closed()
+
+    def is_dynamic(self):
+        return self.orbit.is_dynamic()
+
+    def get_period(self):
+        return self.orbit.get_period()
+
+    @property
+    def period(self):
+        return self.orbit.period
+
+    def get_mean_motion(self):
+        return self.orbit.get_mean_motion()
+
+    def get_bounding_radius(self):
+        return self.orbit.get_bounding_radius()
+
+    def get_window(self):
+        with self.lock:
+            return self.window
+
+    def set_window(self, window):
+        with self.lock:
+            self.window = window
+            self.segments = {}
+
+    def add_segment(self, window, start, end, coefs):
+        with self.lock:
+            # The segment was fitted for a previous window
+            if window != self.window:
+                return False
+            self.segments[int(floor(start / window + 0.5))] = ((end + start) / 2.0, (end - start) / 2.0, coefs)
+            return True
+
+    def has_segment(self, time):
+        with self.lock:
+            return int(floor(time / self.window)) in self.segments
+
+    def get_frame_position_at(self, time):
+        with self.lock:
+            segment = self.segments.get(int(floor(time / self.window)))
+        if segment is None:
+            return self.orbit.get_frame_position_at(time)
+        (mid, half_span, coefs) = segment
+        # Clenshaw evaluation of the Chebyshev series
+        x = (time - mid) / half_span
+        b1 = LVector3d()
+        b2 = LVector3d()
+        for k in range(len(coefs) - 1, 0, -1):
+            (b1, b2) = (coefs[k] + b1 * (2.0 * x) - b2, b1)
+        return LPoint3d(coefs[0] + b1 * x - b2)
+
+    def get_frame_rotation_at(self, time):
+        return self.orbit.get_frame_rotation_at(time)
@@ -0,0 +1,566 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import LQuaterniond
+import numpy
+
+from ..frame import J2000EquatorialReferenceFrame
+from ..rotations import Rotation
+from .. import units
+
+deg_to_rad = numpy.pi / 180
+century = 36525.0
+# Validity of the precession terms, in days
+default_validity = 10000.0
+
+# Angle arguments of the periodic terms, in degrees, as phase + rate * variable [+ quadratic * variable^2]
+# Each set is given as (index of the first argument, variable, arguments), the index follows the numbering used in
+# the WGCCRE report (e.g. M1, U1 or N, N1). The variable is either 'd', the interval in days from J2000,
+# or 'T', the interval in Julian centuries.
+# The satellites of a planet share the same set of arguments, they are thus only evaluated once.
+wgccre_arguments = {
+    'mercury': (1, 'd', [
+        (174.7910857, 4.092335),  # M1
+        (349.5821714, 8.184670),  # M2
+        (164.3732571, 12.277005),  # M3
+        (339.1643429, 16.369340),  # M4
+        (153.9554286, 20.461675),  # M5
+        ]),
+    'moon': (1, 'd', [
+        (125.045, -0.0529921),  # E1
+        (250.089, -0.1059842),  # E2
+        (260.008, 13.0120009),  # E3
+        (176.625, 13.3407154),  # E4
+        (357.529, 0.9856003),  # E5
+        (311.589, 26.4057084),  # E6
+        (134.963, 13.0649930),  # E7
+        (276.617, 0.3287146),  # E8
+        (34.226, 1.7484877),  # E9
+        (15.134, -0.1589763),  # E10
+        (119.743, 0.0036096),  # E11
+        (239.961, 0.1643573),  # E12
+        (25.053, 12.9590088),  # E13
+        ]),
+    'mars': (0, 'T', [
+        # Right ascension
+        (198.991226, 19139.4819985),
+        (226.292679, 38280.8511281),
+        (249.663391, 57420.7251593),
+        (266.183510, 76560.6367950),
+        (79.398797, 0.5042615),
+        # Declination
+        (122.433576, 19139.9407476),
+        (43.058401, 38280.8753272),
+        (57.663379, 57420.7517205),
+        (79.476401, 76560.6495004),
+        (166.325722, 0.5042615),
+        # Prime meridian
+        (129.071773, 19140.0328244),
+        (36.352167, 38281.0473591),
+        (56.668646, 57420.9295360),
+        (67.364003, 76560.2552215),
+        (104.792680, 95700.4387578),
+        (95.391654, 0.5042615),
+        ]),
+    'mars-satellites': (1, 'T', [
+        (190.72646643, 15917.10818695),  # M1
+        (21.46892470, 31834.27934054),  # M2
+        (332.86082793, 19139.89694742),  # M3
+        (394.93256437, 38280.79631835),  # M4
+        (189.63271560, 41215158.18420050, 12.71192322),  # M5
+        (121.46893664, 660.22803474),  # M6
+        (231.05028581, 660.99123540),  # M7
+        (251.37314025, 1320.50145245),  # M8
+        (217.98635955, 38279.96125550),  # M9
+        (196.19729402, 19139.83628608),  # M10
+        ]),
+    'jupiter': (0, 'T', [
+        (99.360714, 4850.4046),  # Ja
+        (175.895369, 1191.9605),  # Jb
+        (300.323162, 262.5475),  # Jc
+        (114.012305, 6070.2476),  # Jd
+        (49.511251, 64.3000),  # Je
+        ]),
+    'jupiter-satellites': (1, 'T', [
+        (73.32, 91472.9),  # J1
+        (24.62, 45137.2),  # J2
+        (283.90, 4850.7),  # J3
+        (355.80, 1191.3),  # J4
+        (119.90, 262.1),  # J5
+        (229.80, 64.3),  # J6
+        (352.25, 2382.6),  # J7
+        (113.35, 6070.0),  # J8
+        ]),
+    'saturn-satellites': (1, 'T', [
+        (353.32, 75706.7),  # S1
+        (28.72, 75706.7),  # S2
+        (177.40, -36505.5),  # S3
+        (300.00, -7225.9),  # S4
+        (316.45, 506.2),  # S5
+        (345.20, -1016.3),  # S6
+        ]),
+    'uranus-satellites': (1, 'T', [
+        (115.75, 54991.87),  # U1
+        (141.69, 41887.66),  # U2
+        (135.03, 29927.35),  # U3
+        (61.77, 25733.59),  # U4
+        (249.32, 24471.46),  # U5
+        (43.86, 22278.41),  # U6
+        (77.66, 20289.42),  # U7
+        (157.36, 16652.76),  # U8
+        (101.81, 12872.63),  # U9
+        (138.64, 8061.81),  # U10
+        (102.23, -2024.22),  # U11
+        (316.41, 2863.96),  # U12
+        (304.01, -51.94),  # U13
+        (308.71, -93.17),  # U14
+        (340.82, -75.32),  # U15
+        (259.14, -504.81),  # U16
+        ]),
+    'neptune': (0, 'T', [
+        (357.85, 52.316),  # N
+        (323.92, 62606.6),  # N1
+        (220.51, 55064.2),  # N2
+        (354.27, 46564.5),  # N3
+        (75.31, 26109.4),  # N4
+        (35.36, 14325.4),  # N5
+        (142.61, 2824.6),  # N6
+        (177.85, 52.316),  # N7
+        ]),
+}
+
+
+class WgccreModel:
+    """
+    WGCCRE rotation model of a body :
+      a0 = ra + ra_rate * T + sum(coef * sin(multiple * arg))
+      d0 = decl + decl_rate * T + sum(coef * cos(multiple * arg))
+      W = prime + rate * d + prime_t_rate * T + prime_d2_rate * d^2 + sum(coef * sin(multiple * arg))
+    Periodic terms are given as (coef, argument index) or (coef, argument index, multiple).
+    """
+
+    def __init__(
+        self,
+        ra,
+        ra_rate,
+        decl,
+        decl_rate,
+        prime,
+        rate,
+        arguments=None,
+        ra_terms=(),
+        decl_terms=(),
+        prime_terms=(),
+        prime_t_rate=0.0,
+        prime_d2_rate=0.0,
+        flipped=False,
+    ):
+        self.ra = ra
+        self.ra_rate = ra_rate
+        self.decl = decl
+        self.decl_rate = decl_rate
+        self.prime = prime
+        self.rate = rate
+        self.prime_t_rate = prime_t_rate
+        self.prime_d2_rate = prime_d2_rate
+        self.arguments = arguments
+        self.ra_terms = ra_terms
+        self.decl_terms = decl_terms
+        self.prime_terms = prime_terms
+        self.flipped = flipped
+
+
+def WgccreSimple(ra, decl, prime, rate):
+    return WgccreModel(ra, 0.0, decl, 0.0, prime, rate, flipped=rate < 0)
+
+
+def WgccreSimplePrecessing(ra, ra_rate, decl, decl_rate, prime, rate):
+    return WgccreModel(ra, ra_rate, decl, decl_rate, prime, rate, flipped=rate < 0)
+
+
+def sin_terms(coefs, multiple=1, first=1):
+    return [(coef, index + first, multiple) for (index, coef) in enumerate(coefs) if coef != 0.0]
+
+
+wgccre_models = {
+    'sun':      WgccreSimple(286.13, 63.87, 84.176, 14.1844000),
+    'mercury':  WgccreModel(
+        281.0103, -0.0328, 61.4155, -0.0049, 329.5988, 6.1385108, 'mercury',
+        prime_terms=sin_terms([0.01067257, -0.00112309, -0.00011040, -0.00002539, -0.00000571])),
+    'venus':    WgccreSimple(272.76, 67.16, 160.20, -1.4813688),
+    'earth':    WgccreSimplePrecessing(0.00, -0.641, 90.00, -0.557, 190.147, 360.9856235),
+    'mars':     WgccreModel(
+        317.269202, -0.10927547, 54.432516, -0.05827105, 176.049863, 350.891982443297, 'mars',
+        ra_terms=sin_terms([0.000068, 0.000238, 0.000052, 0.000009, 0.419057], first=0),
+        decl_terms=sin_terms([0.000051, 0.000141, 0.000031, 0.000005, 1.591274], first=5),
+        prime_terms=sin_terms([0.000145, 0.000157, 0.000040, 0.000001, 0.000001, 0.584542], first=10)),
+    'jupiter':  WgccreModel(
+        268.056595, -0.006499, 64.495303, 0.002413, 284.95, 870.5360000, 'jupiter',
+        ra_terms=sin_terms([0.000117, 0.000938, 0.001432, 0.000030, 0.002150], first=0),
+        decl_terms=sin_terms([0.000050, 0.000404, 0.000617, -0.000013, 0.000926], first=0)),
+    'saturn':   WgccreSimplePrecessing(40.589, -0.036, 83.537, -0.004, 38.90, 810.7939024),
+    'uranus':   WgccreSimple(257.311, -15.175, 203.81, -501.1600928),
+    'neptune':  WgccreModel(
+        299.36, 0.0, 43.46, 0.0, 249.978, 541.1397757, 'neptune',
+        ra_terms=[(0.70, 0)], decl_terms=[(-0.51, 0)], prime_terms=[(-0.48, 0)]),
+    # Earth
+    'moon':     WgccreModel(
+        269.9949, 0.0031, 66.5392, 0.0130, 38.3213, 13.17635815, 'moon',
+        ra_terms=[(-3.8787, 1), (-0.1204, 2), (0.0700, 3), (-0.0172, 4), (0.0072, 6), (-0.0052, 10), (0.0043, 13)],
+        decl_terms=[
+            (1.5419, 1), (0.0239, 2), (-0.0278, 3), (0.0068, 4), (-0.0029, 6), (0.0009, 7), (0.0008, 10),
+            (-0.0009, 13)],
+        prime_terms=[
+            (3.5610, 1), (0.1208, 2), (-0.0642, 3), (0.0158, 4), (0.0252, 5), (-0.0066, 6), (-0.0047, 7),
+            (-0.0046, 8), (0.0028, 9), (0.0052, 10), (0.0040, 11), (0.0019, 12), (-0.0044, 13)],
+        prime_d2_rate=-1.410e-12),
+    # Mars
+    'phobos':   WgccreModel(
+        317.67071657, -0.10844326, 52.88627266, -0.06134706, 35.18774440, 1128.84475928, 'mars-satellites',
+        ra_terms=[(-1.78428399, 1), (0.02212824, 2), (-0.01028251, 3), (-0.00475595, 4)],
+        decl_terms=[(-1.07516537, 1), (0.00668626, 2), (-0.00648740, 3), (0.00281576, 4)],
+        prime_terms=[(1.42421769, 1), (-0.02273783, 2), (0.00410711, 3), (0.00631964, 4), (-1.143, 5)],
+        prime_t_rate=12.72192797),
+    'deimos':   WgccreModel(
+        316.65705808, -0.10518014, 53.50992033, -0.05979094, 79.39932954, 285.16188899, 'mars-satellites',
+        ra_terms=[(3.09217726, 6), (0.22980637, 7), (0.06418655, 8), (0.02533537, 9), (0.00778695, 10)],
+        decl_terms=[(1.83936004, 6), (0.14325320, 7), (0.01911409, 8), (-0.01482590, 9), (0.00192430, 10)],
+        prime_terms=[(-2.73954829, 6), (-0.39968606, 7), (-0.06563259, 8), (-0.02912940, 9), (0.01699160, 10)]),
+    # Jupiter
+    'metis':    WgccreSimplePrecessing(268.05, -0.009, 64.49, 0.003, 346.09, 1221.2547301),
+    'adrastea': WgccreSimplePrecessing(268.05, -0.009, 64.49, 0.003, 33.29, 1206.9986602),
+    'amalthea': WgccreModel(
+        268.05, -0.009, 64.49, 0.003, 231.67, 722.6314560, 'jupiter-satellites',
+        ra_terms=[(-0.84, 1), (0.01, 1, 2)],
+        decl_terms=[(-0.36, 1)],
+        prime_terms=[(0.76, 1), (-0.01, 1, 2)]),
+    'thebe':    WgccreModel(
+        268.05, -0.009, 64.49, 0.003, 8.56, 533.7004100, 'jupiter-satellites',
+        ra_terms=[(-2.11, 2), (0.04, 2, 2)],
+        decl_terms=[(-0.91, 2), (0.01, 2, 2)],
+        prime_terms=[(1.91, 2), (-0.04, 2, 2)]),
+    'io':       WgccreModel(
+        268.05, -0.009, 64.50, 0.003, 200.39, 203.4889538, 'jupiter-satellites',
+        ra_terms=[(0.094, 3), (0.024, 4)],
+        decl_terms=[(0.040, 3), (0.011, 4)],
+        prime_terms=[(-0.085, 3), (-0.022, 4)]),
+    'europa':   WgccreModel(
+        268.08, -0.009, 64.51, 0.003, 36.022, 101.3747235, 'jupiter-satellites',
+        ra_terms=[(1.086, 4), (0.060, 5), (0.015, 6), (0.009, 7)],
+        decl_terms=[(0.468, 4), (0.026, 5), (0.007, 6), (0.002, 7)],
+        prime_terms=[(-0.980, 4), (-0.054, 5), (-0.014, 6), (-0.008, 7)]),
+    'ganymede': WgccreModel(
+        268.20, -0.009, 64.57, 0.003, 44.064, 50.3176081, 'jupiter-satellites',
+        ra_terms=[(-0.037, 4), (0.431, 5), (0.091, 6)],
+        decl_terms=[(-0.016, 4), (0.186, 5), (0.039, 6)],
+        prime_terms=[(0.033, 4), (-0.389, 5), (-0.082, 6)]),
+    'callisto': WgccreModel(
+        268.72, -0.009, 64.83, 0.003, 259.51, 21.5710715, 'jupiter-satellites',
+        ra_terms=[(-0.068, 5), (0.590, 6), (0.010, 8)],
+        decl_terms=[(-0.029, 5), (0.254, 6), (-0.004, 8)],
+        prime_terms=[(0.061, 5), (-0.533, 6), (-0.009, 8)]),
+    # Saturn
+    'pan':        WgccreSimplePrecessing(40.6, -0.036, 83.5, -0.004, 48.8, 626.0440000),
+    'atlas':      WgccreSimplePrecessing(40.58, -0.036, 83.53, -0.004, 137.88, 598.3060000),
+    'prometheus': WgccreSimplePrecessing(40.58, -0.036, 83.53, -0.004, 296.14, 587.289000),
+    'pandora':    WgccreSimplePrecessing(40.58, -0.036, 83.53, -0.004, 162.92, 572.7891000),
+    'epimetheus': WgccreModel(
+        40.58, -0.036, 83.52, -0.004, 293.87, 518.4907239, 'saturn-satellites',
+        ra_terms=[(-3.153, 1), (0.086, 1, 2)],
+        decl_terms=[(-0.356, 1), (0.005, 1, 2)],
+        prime_terms=[(3.133, 1), (-0.086, 1, 2)]),
+    'janus':      WgccreModel(
+        40.58, -0.036, 83.52, -0.004, 58.83, 518.2359876, 'saturn-satellites',
+        ra_terms=[(-1.623, 2), (0.023, 2, 2)],
+        decl_terms=[(-0.183, 2), (0.001, 2, 2)],
+        prime_terms=[(1.613, 2), (-0.023, 2, 2)]),
+    'mimas':      WgccreModel(
+        40.66, -0.036, 83.52, -0.004, 333.46, 381.9945550, 'saturn-satellites',
+        ra_terms=[(13.56, 3)], decl_terms=[(-1.53, 3)], prime_terms=[(-13.48, 3), (-44.85, 5)]),
+    'enceladus':  WgccreSimplePrecessing(40.66, -0.036, 83.52, -0.004, 6.32, 262.7318996),
+    'tethys':     WgccreModel(
+        40.66, -0.036, 83.52, -0.004, 8.95, 190.6979085, 'saturn-satellites',
+        ra_terms=[(9.66, 4)], decl_terms=[(-1.09, 4)], prime_terms=[(-9.60, 4), (2.23, 5)]),
+    'telesto':    WgccreSimplePrecessing(50.51, -0.036, 84.06, -0.004, 56.88, 190.6979332),
+    'calypso':    WgccreSimplePrecessing(36.41, -0.036, 85.04, -0.004, 153.51, 190.6742373),
+    'dione':      WgccreSimplePrecessing(40.66, -0.036, 83.52, -0.004, 357.6, 131.5349316),
+    'helene':     WgccreSimplePrecessing(40.85, -0.036, 83.34, -0.004, 245.12, 131.6174056),
+    'rhea':       WgccreModel(
+        40.38, -0.036, 83.55, -0.004, 235.16, 79.6900478, 'saturn-satellites',
+        ra_terms=[(3.10, 6)], decl_terms=[(-0.35, 6)], prime_terms=[(-3.08, 6)]),
+    'titan':      WgccreSimple(39.4827, 83.4279, 186.5855, 22.5769768),
+    'iapetus':    WgccreSimplePrecessing(318.16, -3.949, 75.03, -1.143, 355.2, 4.5379572),
+    'phoebe':     WgccreSimple(356.90, 77.80, 178.58, 931.639),
+    # Uranus
+    'cordelia':  WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 127.69, -1074.5205730, 'uranus-satellites',
+        ra_terms=[(-0.15, 1)], decl_terms=[(0.14, 1)], prime_terms=[(-0.04, 1)]),
+    'ophelia':   WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 130.35, -956.4068150, 'uranus-satellites',
+        ra_terms=[(-0.09, 2)], decl_terms=[(0.09, 2)], prime_terms=[(-0.03, 2)]),
+    'bianca':    WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 105.46, -828.3914760, 'uranus-satellites',
+        ra_terms=[(-0.16, 3)], decl_terms=[(0.16, 3)], prime_terms=[(-0.04, 3)]),
+    'cressida':  WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 59.16, -776.5816320, 'uranus-satellites',
+        ra_terms=[(-0.04, 4)], decl_terms=[(0.04, 4)], prime_terms=[(-0.01, 4)]),
+    'desdemona': WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 95.08, -760.0531690, 'uranus-satellites',
+        ra_terms=[(-0.17, 5)], decl_terms=[(0.16, 5)], prime_terms=[(-0.04, 5)]),
+    'juliet':    WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 302.56, -730.1253660, 'uranus-satellites',
+        ra_terms=[(-0.06, 6)], decl_terms=[(0.06, 6)], prime_terms=[(-0.02, 6)]),
+    'portia':    WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 25.03, -701.4865870, 'uranus-satellites',
+        ra_terms=[(-0.09, 7)], decl_terms=[(0.09, 7)], prime_terms=[(-0.02, 7)]),
+    'rosalind':  WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 314.90, -644.6311260, 'uranus-satellites',
+        ra_terms=[(-0.29, 8)], decl_terms=[(0.28, 8)], prime_terms=[(-0.08, 8)]),
+    'belinda':   WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 297.46, -577.3628170, 'uranus-satellites',
+        ra_terms=[(-0.03, 9)], decl_terms=[(0.03, 9)], prime_terms=[(-0.01, 9)]),
+    'puck':      WgccreModel(
+        257.31, 0.0, -15.18, 0.0, 91.24, -472.5450690, 'uranus-satellites',
+        ra_terms=[(-0.33, 10)], decl_terms=[(0.31, 10)], prime_terms=[(-0.09, 10)]),
+    'miranda':   WgccreModel(
+        257.43, 0.0, -15.08, 0.0, 30.70, -254.6906892, 'uranus-satellites',
+        ra_terms=[(4.41, 11), (-0.04, 11, 2)],
+        decl_terms=[(4.25, 11), (-0.02, 11, 2)],
+        prime_terms=[(-1.27, 12), (0.15, 12, 2), (1.15, 11), (-0.09, 11, 2)]),
+    'ariel':     WgccreModel(
+        257.43, 0.0, -15.10, 0.0, 156.22, -142.8356681, 'uranus-satellites',
+        ra_terms=[(0.29, 13)], decl_terms=[(0.28, 13)], prime_terms=[(0.05, 12), (0.08, 13)]),
+    'umbriel':   WgccreModel(
+        257.43, 0.0, -15.10, 0.0, 108.05, -86.8688923, 'uranus-satellites',
+        ra_terms=[(0.21, 14)], decl_terms=[(0.2, 14)], prime_terms=[(-0.09, 12), (0.06, 14)]),
+    'titania':   WgccreModel(
+        257.43, 0.0, -15.10, 0.0, 77.74, -41.3514316, 'uranus-satellites',
+        ra_terms=[(0.29, 15)], decl_terms=[(0.28, 15)], prime_terms=[(0.08, 15)]),
+    'oberon':    WgccreModel(
+        257.43, 0.0, -15.10, 0.0, 6.77, -26.7394932, 'uranus-satellites',
+        ra_terms=[(0.16, 16)], decl_terms=[(0.16, 16)], prime_terms=[(0.04, 16)]),
+    # Neptune
+    'naiad':    WgccreModel(
+        299.36, 0.0, 43.36, 0.0, 254.06, 1222.8441209, 'neptune',
+        ra_terms=[(0.70, 0), (-6.49, 1), (0.25, 1, 2)],
+        decl_terms=[(-0.51, 0), (-4.75, 1), (0.09, 1, 2)],
+        prime_terms=[(-0.48, 0), (4.40, 1), (-0.27, 1, 2)]),
+    'thalassa': WgccreModel(
+        299.36, 0.0, 43.45, 0.0, 102.06, 1155.7555612, 'neptune',
+        ra_terms=[(0.70, 0), (-0.28, 2)], decl_terms=[(-0.51, 0), (-0.21, 2)], prime_terms=[(-0.48, 0), (0.19, 2)]),
+    'despina':  WgccreModel(
+        299.36, 0.0, 43.45, 0.0, 306.51, 1075.7341562, 'neptune',
+        ra_terms=[(0.70, 0), (-0.09, 3)], decl_terms=[(-0.51, 0), (-0.07, 3)], prime_terms=[(-0.49, 0), (0.06, 3)]),
+    'galatea':  WgccreModel(
+        299.36, 0.0, 43.43, 0.0, 258.09, 839.6597686, 'neptune',
+        ra_terms=[(0.70, 0), (-0.07, 4)], decl_terms=[(-0.51, 0), (-0.05, 4)], prime_terms=[(-0.48, 0), (0.05, 4)]),
+    'larissa':  WgccreModel(
+        299.36, 0.0, 43.41, 0.0, 179.41, 649.0534470, 'neptune',
+        ra_terms=[(0.70, 0), (-0.27, 5)], decl_terms=[(-0.51, 0), (-0.20, 5)], prime_terms=[(-0.48, 0), (0.19, 5)]),
+    'proteus':  WgccreModel(
+        299.27, 0.0, 42.91, 0.0, 93.38, 320.7654228, 'neptune',
+        ra_terms=[(0.70, 0), (-0.05, 6)], decl_terms=[(-0.51, 0), (-0.04, 6)], prime_terms=[(-0.48, 0), (0.04, 6)]),
+    'triton':   WgccreModel(
+        299.36, 0.0, 41.17, 0.0, 296.53, -61.2572637, 'neptune',
+        ra_terms=[(coef, 7, multiple) for (multiple, coef) in enumerate(
+            [-32.35, -6.28, -2.08, -0.74, -0.28, -0.11, -0.07, -0.02, -0.01], 1)],
+        decl_terms=[(coef, 7, multiple) for (multiple, coef) in enumerate(
+            [22.55, 2.10, 0.55, 0.16, 0.05, 0.02, 0.01], 1)],
+        prime_terms=[(coef, 7, multiple) for (multiple, coef) in enumerate(
+            [22.25, 6.73, 2.05, 0.74, 0.28, 0.11, 0.05, 0.02, 0.01], 1)]),
+    # Dwarf planets / asteroids
+    'ceres':         WgccreSimple(291.418, 66.764, 170.650, 952.1532),
+    '2-pallas':      WgccreSimple(33, -3, 38, 1105.8036),
+    '4-vesta':       WgccreSimple(309.031, 42.235, 285.39, 1617.3329428),
+    '21-lutetia':    WgccreSimple(52, 12, 94, 1057.7515),
+    '52-europa':     WgccreSimple(257, 12, 55, 1534.6472187),
+    '243-ida':       WgccreSimple(168.76, -87.12, 274.05, 1864.6280070),
+    '433-eros':      WgccreSimple(11.35, 17.22, 326.07, 1639.38864745),
+    '511-davida':    WgccreSimple(297, 5, 268.1, 1684.4193549),
+    '951-gaspra':    WgccreSimple(9.47, 26.70, 83.67, 1226.9114850),
+    '2867-steins':   WgccreSimple(91, -62, 321.76, 1428.09917),
+    '25143-itokawa': WgccreSimple(90.53, -66.30, 0, 712.143),
+    'pluto':         WgccreSimple(132.993, -6.163, 302.695, 56.3625225),
+    'charon':        WgccreSimple(132.993, -6.163, 122.695, 56.3625225),
+}
+
+
+def quat_mult(q1, q2):
+    """
+    Vectorized Panda3D quaternion product q1 * q2 (i.e. the rotation q1 followed by q2) on (n, 4) arrays.
+    """
+    w1, x1, y1, z1 = q2.T
+    w2, x2, y2, z2 = q1.T
+    return numpy.stack(
+        [
+            w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+        ],
+        axis=1,
+    )
+
+
+def axis_quat(angles, axis):
+    quats = numpy.zeros((len(angles), 4))
+    quats[:, 0] = numpy.cos(angles / 2)
+    quats[:, axis] = numpy.sin(angles / 2)
+    return quats
+
+
+class WgccreNumpyBackend:
+    """
+    Evaluates the WGCCRE rotation models of all the registered bodies at once.
+    The angle arguments are computed once per time value and shared by all the bodies using them, the periodic
+    terms of all the bodies are stored in flat arrays and summed per body.
+    """
+
+    def __init__(self, models, arguments, epoch=units.J2000, validity=default_validity):
+        self.epoch = epoch
+        self.validity = validity / century
+        self.names = list(models.keys())
+        self.indexes = {name: index for (index, name) in enumerate(self.names)}
+        self.build_arguments(arguments)
+        self.build_models(models)
+        self.time = None
+        self.equatorial = None
+        self.rotation = None
+
+    def build_arguments(self, arguments):
+        self.arguments_offset = {}
+        phases = []
+        rates = []
+        quadratics = []
+        use_days = []
+        for name, (first, variable, terms) in arguments.items():
+            self.arguments_offset[name] = len(phases) - first
+            for term in terms:
+                phases.append(term[0])
+                rates.append(term[1])
+                quadratics.append(term[2] if len(term) > 2 else 0.0)
+                use_days.append(variable == 'd')
+        self.arg_phases = numpy.array(phases) * deg_to_rad
+        self.arg_rates = numpy.array(rates) * deg_to_rad
+        self.arg_quadratics = numpy.array(quadratics) * deg_to_rad
+        self.arg_use_days = numpy.array(use_days, dtype=bool)
+
+    def build_terms(self, models, attribute):
+        bodies = []
+        args = []
+        multiples = []
+        coefs = []
+        for index, name in enumerate(self.names):
+            model = models[name]
+            for term in getattr(model, attribute):
+                bodies.append(index)
+                args.append(self.arguments_offset[model.arguments] + term[1])
+                multiples.append(term[2] if len(term) > 2 else 1)
+                coefs.append(term[0])
+        return (
+            numpy.array(bodies, dtype=numpy.intp),
+            numpy.array(args, dtype=numpy.intp),
+            numpy.array(multiples, dtype=numpy.float64),
+            numpy.array(coefs, dtype=numpy.float64),
+        )
+
+    def build_models(self, models):
+        values = [models[name] for name in self.names]
+        self.ra = numpy.array([model.ra for model in values])
+        self.ra_rate = numpy.array([model.ra_rate for model in values])
+        self.decl = numpy.array([model.decl for model in values])
+        self.decl_rate = numpy.array([model.decl_rate for model in values])
+        self.prime = numpy.array([model.prime for model in values])
+        self.rate = numpy.array([model.rate for model in values])
+        self.prime_t_rate = numpy.array([model.prime_t_rate for model in values])
+        self.prime_d2_rate = numpy.array([model.prime_d2_rate for model in values])
+        self.flipped = numpy.array([model.flipped for model in values], dtype=bool)
+        self.ra_terms = self.build_terms(models, 'ra_terms')
+        self.decl_terms = self.build_terms(models, 'decl_terms')
+        self.prime_terms = self.build_terms(models, 'prime_terms')
+
+    def sum_terms(self, terms, angles, func):
+        (bodies, args, multiples, coefs) = terms
+        return numpy.bincount(bodies, coefs * func(multiples * angles[args]), minlength=len(self.names))
+
+    def evaluate(self, time):
+        """
+        Returns the frame equatorial orientations and the frame rotations of all the bodies as (n, 4) arrays.
+        """
+        d = time - self.epoch
+        T = min(max(d / century, -self.validity), self.validity)
+        variables = numpy.where(self.arg_use_days, d, T)
+        angles = self.arg_phases + self.arg_rates * variables + self.arg_quadratics * variables * variables
+        ra = self.ra + self.ra_rate * T + self.sum_terms(self.ra_terms, angles, numpy.sin)
+        decl = self.decl + self.decl_rate * T + self.sum_terms(self.decl_terms, angles, numpy.cos)
+        prime = (
+            self.prime
+            + self.rate * d
+            + self.prime_t_rate * T
+            + self.prime_d2_rate * d * d
+            + self.sum_terms(self.prime_terms, angles, numpy.sin)
+        )
+        inclination = numpy.pi / 2 - decl * deg_to_rad + numpy.where(self.flipped, numpy.pi, 0.0)
+        ascending_node = ra * deg_to_rad + numpy.pi / 2
+        equatorial = quat_mult(axis_quat(inclination, 1), axis_quat(ascending_node, 3))
+        prime = numpy.where(self.flipped, -prime, prime) * deg_to_rad
+        rotation = quat_mult(axis_quat(prime, 3), equatorial)
+        return (equatorial, rotation)
+
+    def update(self, time):
+        if time != self.time:
+            (self.equatorial, self.rotation) = self.evaluate(time)
+            self.time = time
+
+    def get_frame_equatorial_orientation_at(self, index, time):
+        self.update(time)
+        return LQuaterniond(*self.equatorial[index])
+
+    def get_frame_rotation_at(self, index, time):
+        self.update(time)
+        return LQuaterniond(*self.rotation[index])
+
+    def get_all_rotations_at(self, time):
+        """
+        Returns a dict with the frame rotation of every registered body at the given time.
+        """
+        self.update(time)
+        return {name: LQuaterniond(*self.rotation[index]) for (index, name) in enumerate(self.names)}
+
+
+class WgccreNumpyRotation(Rotation):
+    dynamic = True
+
+    def __init__(self, backend, name):
+        Rotation.__init__(self, J2000EquatorialReferenceFrame())
+        self.backend = backend
+        self.index = backend.indexes[name]
+
+    def is_flipped(self):
+        return bool(self.backend.flipped[self.index])
+
+    def get_frame_equatorial_orientation_at(self, time):
+        return self.backend.get_frame_equatorial_orientation_at(self.index, time)
+
+    def get_frame_rotation_at(self, time):
+        return self.backend.get_frame_rotation_at(self.index, time)
+
+
+wgccre_backend = WgccreNumpyBackend(wgccre_models, wgccre_arguments)
@@ -17,6 +17,8 @@
 # along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import numpy
+
 
 class SpectralType(object):
     global_class = {
@@ -174,7 +176,20 @@ class SpectralType(object):
             self.temperature = 1000.0
 
 
-class SpectralTypeStringDecoder(object):
+class SpectralTypeArrayDecoder(object):
+    def decode_array(self, values):
+        """
+        Decodes a whole array of spectral types, each distinct value is decoded only once.
+        Returns the list of SpectralType and the array of their effective temperatures.
+        """
+        (unique_values, inverse) = numpy.unique(numpy.asarray(values), return_inverse=True)
+        spectral_types = [self.decode(value) for value in unique_values.tolist()]
+        temperatures = numpy.array([spectral_type.temperature for spectral_type in spectral_types], dtype=float)
+        inverse = inverse.ravel()
+        return ([spectral_types[index] for index in inverse.tolist()], temperatures[inverse])
+
+
+class SpectralTypeStringDecoder(SpectralTypeArrayDecoder):
     main_spectral_classes = ['Y', 'T', 'L', 'M', 'K', 'G', 'F', 'A', 'B', 'O']
     obsolete_main = ['Ma', 'Mb', 'Mc', 'Md', 'Oa', 'Ob', 'Oc', 'Od', 'Oe']
     white_dwarf_prefix = 'D'
@@ -463,7 +478,7 @@ class SpectralTypeStringDecoder(object):
         return self.cache[name]
 
 
-class SpectralTypeIntDecoder(object):
+class SpectralTypeIntDecoder(SpectralTypeArrayDecoder):
     cache = {}
 
     def decode(self, value):
@@ -235,3 +235,9 @@ if loaded:
 
     for (element_name, element) in wgccre.items():
         rotation_elements_db.register_element('wgccre', element_name, element)
+else:
+    from ..pyastro.wgccre import wgccre_backend, WgccreNumpyRotation
+
+    for element_name in wgccre_backend.names:
+        element = WgccreNumpyRotation(wgccre_backend, element_name)
+        rotation_elements_db.register_element('wgccre', element_name, element)
@@ -32,3 +32,16 @@ def create_path_for(*path):
     if not os.path.isdir(final_path):
         os.makedirs(final_path)
     return final_path
+
+
+def prune_files(path, prefix, keep):
+    """
+    Removes the files of the directory starting with prefix, only the keep most recently modified are kept.
+    """
+    try:
+        filenames = [os.path.join(path, filename) for filename in os.listdir(path) if filename.startswith(prefix)]
+        filenames.sort(key=os.path.getmtime, reverse=True)
+        for filename in filenames[keep:]:
+            os.remove(filename)
+    except OSError as e:
+        print("Could not prune", os.path.join(path, prefix + '*'), ':', e)
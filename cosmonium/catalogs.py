@@ -16,6 +16,9 @@
 # You should have received a copy of the GNU General Public License
 # along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
 #
+from itertools import chain
+from threading import Lock
+
 from .utils import int_to_color
 
 
@@ -44,18 +47,31 @@ class ObjectsDB(object):
 
 
 class GlobalObjectsDB(object):
+    # Maximum number of names changes kept between two calls of pop_names_changes()
+    max_changes = 100000
+
     def __init__(self):
         self.db = {}
         self.oids = []
+        # The oids of the removed bodies are reused, the streamed catalogues add and remove bodies continuously
+        self.free_oids = []
+        # Names modified since the last call of pop_names_changes(), None when the changes are not tracked
+        self.changes = None
+        self.changes_lock = Lock()
 
     def add(self, body):
-        body.oid = len(self.oids)
+        if self.free_oids:
+            body.oid = self.free_oids.pop()
+            self.oids[body.oid] = body
+        else:
+            body.oid = len(self.oids)
+            self.oids.append(body)
         body.oid_color = int_to_color(body.oid)
-        self.oids.append(body)
-        for name in body.names:
-            self.db[name.upper()] = body
-        for name in body.source_names:
-            self.db[name.upper()] = body
+        with self.changes_lock:
+            for name in chain(body.names, body.source_names):
+                key = name.upper()
+                self.db[key] = body
+                self.record_change(key, body)
 
     def get(self, name):
         return self.db.get(name.upper(), None)
@@ -67,9 +83,16 @@ class GlobalObjectsDB(object):
             return None
 
     def remove(self, body):
-        for name in body.names:
-            self.db.pop(name.upper(), None)
-        self.oids[body.oid] = None
+        # Only the names still referring to the body are removed, another body may have been added with the same name
+        with self.changes_lock:
+            for name in chain(body.names, body.source_names):
+                key = name.upper()
+                if self.db.get(key) is body:
+                    del self.db[key]
+                    self.record_change(key, None)
+        if self.oids[body.oid] is body:
+            self.oids[body.oid] = None
+            self.free_oids.append(body.oid)
 
     def startswith(self, text):
         text = text.upper()
@@ -79,5 +102,28 @@ class GlobalObjectsDB(object):
                 result.append((value.get_exact_name(key), value))
         return result
 
+    def record_change(self, key, body):
+        if self.changes is not None:
+            if len(self.changes) < self.max_changes:
+                self.changes.append((key, body))
+            else:
+                # Too many changes, the next call of pop_names_changes() returns a full copy instead
+                self.changes = None
+
+    def pop_names_changes(self):
+        """
+        Returns a tuple (names, changes) to keep a copy of the names database up to date from another thread.
+        The first call returns a copy of the database as names, the next calls return the list of (name, body) modified
+        since the previous call as changes, body is None for a removed name.
+        There can only be one consumer of the changes.
+        """
+        with self.changes_lock:
+            if self.changes is None:
+                self.changes = []
+                return (dict(self.db), None)
+            changes = self.changes
+            self.changes = []
+            return (None, changes)
+
 
 objectsDB = GlobalObjectsDB()
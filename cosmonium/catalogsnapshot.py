@@ -0,0 +1,124 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import hashlib
+import numpy
+import os
+from time import time
+
+from . import cache
+from . import settings
+
+
+class CatalogueSnapshot:
+    """
+    Stores the arrays parsed from a catalogue file in a compact binary file so that, at the next start, the objects
+    can be created directly from them instead of parsing again the file.
+    The snapshot is keyed by the path, size and modification time of the file, only the snapshot of the current
+    version of each file is kept.
+    """
+
+    snapshot_version = 1
+
+    def __init__(self):
+        self.cache_path = None
+
+    def get_cache_path(self):
+        if self.cache_path is None:
+            self.cache_path = cache.create_path_for('snapshots')
+        return self.cache_path
+
+    def get_prefix(self, kind, filepath):
+        source = hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:16]
+        return '{}-{}-'.format(kind, source)
+
+    def calc_key(self, filepath):
+        stat = os.stat(filepath)
+        parameters = (self.snapshot_version, os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        return hashlib.sha1(repr(parameters).encode('utf-8')).hexdigest()
+
+    def get_filename(self, kind, filepath, key):
+        return os.path.join(self.get_cache_path(), self.get_prefix(kind, filepath) + key + '.npz')
+
+    def save(self, kind, filepath, key, arrays, parse_time):
+        filename = self.get_filename(kind, filepath, key)
+        temp_filename = filename + '.tmp.npz'
+        try:
+            numpy.savez(temp_filename, parse_time=numpy.array(parse_time), **arrays)
+            os.replace(temp_filename, filename)
+        except OSError as e:
+            print("Could not write catalogue snapshot", filename, ':', e)
+        # Remove the snapshots of the previous versions of the file
+        cache.prune_files(self.get_cache_path(), self.get_prefix(kind, filepath), 1)
+
+    def restore(self, kind, filepath, key):
+        """
+        Returns the arrays stored in the snapshot and the parsing time of the original file, or None if there is no
+        valid snapshot.
+        """
+        filename = self.get_filename(kind, filepath, key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            with numpy.load(filename) as data:
+                arrays = {name: data[name] for name in data.files if name != 'parse_time'}
+                parse_time = float(data['parse_time'])
+        except (OSError, ValueError, KeyError) as e:
+            print("Could not read catalogue snapshot", filename, ':', e)
+            return None
+        return (arrays, parse_time)
+
+    def compare(self, restored, fresh):
+        """
+        Returns the number of entries that differ between the restored and the parsed arrays.
+        """
+        differences = 0
+        for name in restored.keys() | fresh.keys():
+            if name not in restored or name not in fresh:
+                differences += len(restored.get(name, fresh.get(name)))
+            elif restored[name].shape != fresh[name].shape:
+                differences += max(len(restored[name]), len(fresh[name]))
+            else:
+                different = restored[name] != fresh[name]
+                differences += int(different.reshape(len(different), -1).any(axis=1).sum())
+        return differences
+
+    def load(self, kind, filepath, parse_function):
+        """
+        Returns the arrays parsed from the file by parse_function, from the snapshot when the file did not change.
+        """
+        if not settings.catalogue_snapshot:
+            return parse_function(filepath)
+        start = time()
+        key = self.calc_key(filepath)
+        result = self.restore(kind, filepath, key)
+        if result is not None:
+            (arrays, parse_time) = result
+            print("Catalogue restored from snapshot in", time() - start, "(parsed in", parse_time, ")")
+            if settings.catalogue_snapshot_validate:
+                differences = self.compare(arrays, parse_function(filepath))
+                print("Catalogue snapshot validation:", differences, "different entries")
+            return arrays
+        arrays = parse_function(filepath)
+        self.save(kind, filepath, key, arrays, time() - start)
+        return arrays
+
+
+catalogue_snapshot = CatalogueSnapshot()
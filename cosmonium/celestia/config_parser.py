@@ -22,6 +22,9 @@ from ply import lex, yacc
 from ply.lex import Token
 import sys
 
+from ..parallelparser import parallel_parser, split_items
+from .. import settings
+
 
 def Rule(r):
     def set_rule(f):
@@ -331,6 +334,22 @@ def parse(data, debug=0):
     return p
 
 
+def parse_items(data):
+    """
+    Parses the items of a catalogue, the large catalogues are split in chunks parsed by worker processes.
+    """
+    if parallel_parser.use_chunks(len(data)):
+        chunks = split_items(data, settings.parallel_parsing_chunk_size)
+    else:
+        chunks = [data]
+    items = []
+    for chunk_items in parallel_parser.map(parse, chunks):
+        if chunk_items is None:
+            return None
+        items += chunk_items
+    return items
+
+
 if __name__ == '__main__':
     if len(sys.argv) == 2:
         data = open(sys.argv[1]).read()
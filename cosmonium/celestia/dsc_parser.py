@@ -114,7 +114,7 @@ def parse_file(filename, universe, context=defaultDirContext):
         print("Loading", filepath)
         builtins.base.splash.set_text("Loading %s" % filepath)
         data = io.open(filepath, encoding='latin-1').read()
-        items = config_parser.parse(data)
+        items = config_parser.parse_items(data)
         if items is not None:
             instanciate(items, universe)
     else:
@@ -20,8 +20,10 @@
 
 import builtins
 import io
-from panda3d.core import LVector3d
-import re
+from itertools import chain
+import numpy
+import os
+from panda3d.core import LVector3d, LColor
 import struct
 import sys
 from time import time
@@ -32,51 +34,77 @@ from ..astro.orbits import AbsoluteFixedPosition
 from ..astro.rotations import UnknownRotation
 from ..astro.frame import J2000BarycentricEclipticReferenceFrame, AbsoluteReferenceFrame
 from ..astro.astro import app_to_abs_mag
-from ..astro import bayer
+from ..astro.blackbody import temp_to_RGB_array
 from ..astro import units
+from ..catalogsnapshot import catalogue_snapshot
 from ..dircontext import defaultDirContext
 from ..objects.star import Star
 from ..objects.universe import Universe
+from ..parallelparser import parallel_parser, split_lines
+from .. import settings
 
 from .bodies import celestiaStarSurfaceFactory
+from .star_text_parser import parse_lines, parse_names_lines
 
 
-def parse_line(line, names, universe):
-    data = re.split(' +', line.rstrip('\r\n'))
-    if len(data) == 6:
-        (catNo, ra, decl, distance, app_magnitude, spectral_type) = data
-        catNo = int(catNo)
-        if catNo in names:
-            name = names[catNo]
-        else:
-            name = "HIP %d" % catNo
-        position = calc_position(float(ra) * units.Deg, float(decl) * units.Deg, distance * units.Ly)
-        frame = AbsoluteReferenceFrame()  # TDODO: This should be J2000BarycentricEclipticReferenceFrame
-        orbit = AbsoluteFixedPosition(absolute_reference_point=position, frame=frame)
-        abs_magnitude = app_to_abs_mag(float(app_magnitude), float(distance) * units.KmPerLy)
-        star = Star(
-            name,
-            source_names=[],
-            radius=None,
-            surface_factory=celestiaStarSurfaceFactory,
-            spectral_type=spectralTypeStringDecoder.decode(spectral_type),
-            abs_magnitude=abs_magnitude,
-            orbit=orbit,
-            rotation=UnknownRotation(),
-        )
-        universe.add_child_fast(star)
+def create_star(catNo, names, position, frame, abs_magnitude, spectral_type, temperature, point_color):
+    if catNo in names:
+        name = names[catNo]
     else:
-        print("Malformed line", data)
+        name = "HIP %d" % catNo
+    orbit = AbsoluteFixedPosition(absolute_reference_point=position, frame=frame)
+    return Star(
+        name,
+        source_names=[],
+        radius=None,
+        surface_factory=celestiaStarSurfaceFactory,
+        spectral_type=spectral_type,
+        temperature=temperature,
+        linear_point_color=LColor(*point_color),
+        abs_magnitude=abs_magnitude,
+        orbit=orbit,
+        rotation=UnknownRotation(),
+    )
+
+
+def parse_text(filepath):
+    """
+    Parses a Celestia text star catalogue, returns the arrays of catalogue numbers, coordinates, distances and
+    apparent magnitudes and spectral types.
+    """
+    data = open(filepath)
+    data.readline()
+    lines = data.readlines()
+    if parallel_parser.use_chunks(os.path.getsize(filepath)):
+        chunks = split_lines(lines, settings.parallel_parsing_chunk_size)
+    else:
+        chunks = [lines]
+    results = parallel_parser.map(parse_lines, chunks)
+    return {
+        'catNos': numpy.concatenate([result[0] for result in results]),
+        'values': numpy.concatenate([result[1] for result in results]),
+        'spectral_types': numpy.array(list(chain.from_iterable(result[2] for result in results)), dtype=str),
+    }
 
 
 def do_load_text(filepath, names, universe):
     start = time()
     print("Loading", filepath)
     builtins.base.splash.set_text("Loading %s" % filepath)
-    data = open(filepath)
-    data.readline()
-    for line in data.readlines():
-        parse_line(line, names, universe)
+    catalogue = catalogue_snapshot.load('stars', filepath, parse_text)
+    catNos = catalogue['catNos']
+    values = catalogue['values']
+    spectral_types = catalogue['spectral_types']
+    spectral_types, temperatures = spectralTypeStringDecoder.decode_array(spectral_types)
+    point_colors = temp_to_RGB_array(temperatures, linear=True)
+    for catNo, (ra, decl, distance, app_magnitude), spectral_type, temperature, point_color in zip(
+        catNos.tolist(), values.tolist(), spectral_types, temperatures.tolist(), point_colors.tolist()
+    ):
+        position = calc_position(ra * units.Deg, decl * units.Deg, distance * units.Ly)
+        frame = AbsoluteReferenceFrame()  # TDODO: This should be J2000BarycentricEclipticReferenceFrame
+        abs_magnitude = app_to_abs_mag(app_magnitude, distance * units.KmPerLy)
+        star = create_star(catNo, names, position, frame, abs_magnitude, spectral_type, temperature, point_color)
+        universe.add_child_fast(star)
     end = time()
     print("Load time:", end - start)
 
@@ -90,41 +118,67 @@ def load_text(filename, names, universe, context=defaultDirContext):
         return {}
 
 
-def do_load_bin(filepath, names, universe):
-    start = time()
-    print("Loading", filepath)
-    builtins.base.splash.set_text("Loading %s" % filepath)
+star_records = numpy.dtype(
+    [
+        ('catNo', '<i4'),
+        ('x', '<f4'),
+        ('y', '<f4'),
+        ('z', '<f4'),
+        ('abs_magnitude', '<i2'),
+        ('spectral_type', '<i2'),
+    ]
+)
+
+
+def read_bin(filepath):
+    """
+    Reads a Celestia binary star catalogue, returns the arrays of catalogue numbers, absolute positions in km,
+    absolute magnitudes and packed spectral types or None if the file is invalid.
+    """
     data = open(filepath, 'rb')
     field = data.read(8 + 2 + 4)
     header, version, count = struct.unpack("<8shi", field)
     if not header == b"CELSTARS":
         print("Invalid header", header)
-        return
+        return None
     if not version == 0x0100:
         print("Invalid version", version)
-        return
+        return None
     print("Found", count, "stars")
-    fmt = "<ifffhh"
-    size = struct.calcsize(fmt)
-    for i in range(count):
-        fields = data.read(size)
-        catNo, x, y, z, abs_magnitude, spectral_type = struct.unpack(fmt, fields)
-        if catNo in names:
-            name = names[catNo]
-        else:
-            name = "HIP %d" % catNo
-        position = LVector3d(x * units.Ly, -z * units.Ly, y * units.Ly)
-        orbit = AbsoluteFixedPosition(
-            absolute_reference_point=position, frame=J2000BarycentricEclipticReferenceFrame()
-        )
-        star = Star(
-            name,
-            source_names=[],
-            surface_factory=celestiaStarSurfaceFactory,
-            spectral_type=spectralTypeIntDecoder.decode(spectral_type),
-            abs_magnitude=abs_magnitude / 256.0,
-            orbit=orbit,
-            rotation=UnknownRotation(),
+    records = numpy.fromfile(data, dtype=star_records, count=count)
+    positions = numpy.stack((records['x'], -records['z'], records['y']), axis=-1).astype(numpy.float64)
+    positions *= units.Ly
+    abs_magnitudes = records['abs_magnitude'] / 256.0
+    return (records['catNo'], positions, abs_magnitudes, records['spectral_type'])
+
+
+def do_load_bin(filepath, names, universe):
+    start = time()
+    print("Loading", filepath)
+    builtins.base.splash.set_text("Loading %s" % filepath)
+    result = read_bin(filepath)
+    if result is None:
+        return
+    (catNos, positions, abs_magnitudes, spectral_codes) = result
+    spectral_types, temperatures = spectralTypeIntDecoder.decode_array(spectral_codes)
+    point_colors = temp_to_RGB_array(temperatures, linear=True)
+    for catNo, position, abs_magnitude, spectral_type, temperature, point_color in zip(
+        catNos.tolist(),
+        positions.tolist(),
+        abs_magnitudes.tolist(),
+        spectral_types,
+        temperatures.tolist(),
+        point_colors.tolist(),
+    ):
+        star = create_star(
+            catNo,
+            names,
+            LVector3d(*position),
+            J2000BarycentricEclipticReferenceFrame(),
+            abs_magnitude,
+            spectral_type,
+            temperature,
+            point_color,
         )
         universe.add_child_fast(star)
     end = time()
@@ -140,23 +194,36 @@ def load_bin(filename, names, universe, context=defaultDirContext):
         return {}
 
 
-def parse_line_name(line):
-    data = re.split(':', line.rstrip('\r\n'))
-    catNo = int(data[0])
-    names = data[1:]
-    names.append("HIP %d" % catNo)
-    return (catNo, names)
+def parse_names(filepath):
+    """
+    Parses a Celestia star names file, returns the arrays of catalogue numbers, number of names of each star and
+    the names of all the stars.
+    """
+    data = io.open(filepath, encoding='latin-1')
+    lines = data.readlines()
+    if parallel_parser.use_chunks(os.path.getsize(filepath)):
+        chunks = split_lines(lines, settings.parallel_parsing_chunk_size)
+    else:
+        chunks = [lines]
+    entries = list(chain.from_iterable(parallel_parser.map(parse_names_lines, chunks)))
+    return {
+        'catNos': numpy.array([catNo for (catNo, aliases) in entries], dtype=numpy.int64),
+        'counts': numpy.array([len(aliases) for (catNo, aliases) in entries], dtype=numpy.int32),
+        'names': numpy.array(list(chain.from_iterable(aliases for (catNo, aliases) in entries)), dtype=str),
+    }
 
 
 def do_load_names(filepath):
     start = time()
     print("Loading", filepath)
     builtins.base.splash.set_text("Loading %s" % filepath)
+    catalogue = catalogue_snapshot.load('starnames', filepath, parse_names)
+    all_names = catalogue['names'].tolist()
     names = {}
-    data = io.open(filepath, encoding='latin-1')
-    for line in data.readlines():
-        catNo, aliases = parse_line_name(line)
-        names[catNo] = list(map(lambda x: bayer.canonize_name(x), aliases))
+    first = 0
+    for catNo, count in zip(catalogue['catNos'].tolist(), catalogue['counts'].tolist()):
+        names[catNo] = all_names[first : first + count]
+        first += count
     end = time()
     print("Load time:", end - start)
     return names
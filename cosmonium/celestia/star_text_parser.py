@@ -0,0 +1,61 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+# The parsing functions of the Celestia text star catalogues are executed in the parsing worker processes, which
+# import this module again when they are spawned: only lightweight modules must be imported here.
+
+import numpy
+import re
+
+from ..astro import bayer
+
+
+def parse_line(line):
+    data = re.split(' +', line.rstrip('\r\n'))
+    if len(data) == 6:
+        (catNo, ra, decl, distance, app_magnitude, spectral_type) = data
+        return (int(catNo), float(ra), float(decl), float(distance), float(app_magnitude), spectral_type)
+    else:
+        print("Malformed line", data)
+        return None
+
+
+def parse_lines(lines):
+    entries = [entry for entry in map(parse_line, lines) if entry is not None]
+    catNos = numpy.array([entry[0] for entry in entries], dtype=numpy.int64)
+    values = numpy.array([entry[1:5] for entry in entries], dtype=numpy.float64).reshape(-1, 4)
+    spectral_types = [entry[5] for entry in entries]
+    return (catNos, values, spectral_types)
+
+
+def parse_line_name(line):
+    data = re.split(':', line.rstrip('\r\n'))
+    catNo = int(data[0])
+    names = data[1:]
+    names.append("HIP %d" % catNo)
+    return (catNo, names)
+
+
+def parse_names_lines(lines):
+    entries = []
+    for line in lines:
+        catNo, aliases = parse_line_name(line)
+        entries.append((catNo, list(map(lambda x: bayer.canonize_name(x), aliases))))
+    return entries
@@ -29,6 +29,7 @@ from ... import settings
 class StellarBodyLabel(ObjectLabel):
     def create_instance(self):
         ObjectLabel.create_instance(self)
+        self.instance_fade = 1.0
         if settings.color_picking and self.label_source.oid_color is not None:
             self.instance.set_shader_input("color_picking", self.label_source.oid_color)
 
@@ -50,7 +51,19 @@ class StellarBodyLabel(ObjectLabel):
                 self.fade = min(1.0, max(0.0, (size - settings.orbit_fade) / settings.orbit_fade))
         self.fade = clamp(self.fade, 0.0, 1.0)
 
+    def get_declutter_priority(self):
+        point_radiance = self.label_source.anchor._point_radiance
+        if point_radiance > 0.0:
+            return radiance_to_mag(point_radiance)
+        else:
+            return float('inf')
+
     def update_instance(self, scene_manager, camera_pos, camera_rot):
+        forward = LVector3(*(camera_rot.xform(LVector3d.forward())))
+        up = LVector3(*(camera_rot.xform(LVector3d.up())))
+        self.update_label_instance(scene_manager, camera_pos, camera_rot, forward, up)
+
+    def update_label_instance(self, scene_manager, camera_pos, camera_rot, forward, up):
         body = self.label_source
         if body.is_emissive() and (not body.anchor.resolved or body.background):
             self.instance.set_pos(LPoint3())
@@ -64,9 +77,11 @@ class StellarBodyLabel(ObjectLabel):
             z_distance = (body.anchor.distance_to_obs - offset) * z_coef
             self.instance.set_pos(*position)
             scale = abs(self.context.observer.pixel_size * body.get_label_size() * z_distance * settings.ui_scale)
-        self.look_at.set_pos(LVector3(*(camera_rot.xform(LVector3d.forward()))))
-        self.label_instance.look_at(self.look_at, LVector3(), LVector3(*(camera_rot.xform(LVector3d.up()))))
-        self.instance.set_color_scale(LColor(self.fade, self.fade, self.fade, 1.0))
+        self.look_at.set_pos(forward)
+        self.label_instance.look_at(self.look_at, LVector3(), up)
+        if self.fade != self.instance_fade:
+            self.instance.set_color_scale(LColor(self.fade, self.fade, self.fade, 1.0))
+            self.instance_fade = self.fade
         if scale < 1e-7:
             print("Label too far", self.get_name(), scale)
             scale = 1e-7
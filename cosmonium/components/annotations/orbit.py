@@ -24,7 +24,8 @@ from panda3d.core import Geom, GeomNode, GeomLines
 from panda3d.core import NodePath
 
 from ...appearances import ModelAppearance
-from ...astro.orbits import FixedPosition
+from ...astro.ephemeriscache import ephemeris_cache
+from ...astro.orbits import FixedPosition, CachedFunctionOrbit
 from ...bodyclass import bodyClasses
 from ...foundation import VisibleObject
 from ...shaders.lighting.flat import FlatLightingModel
@@ -85,8 +86,9 @@ class Orbit(VisibleObject):
 
     def find_orbit(self, body):
         if body is not None:
-            if not isinstance(body.anchor.orbit, FixedPosition):
-                return body.anchor.orbit
+            orbit = body.anchor.orbit
+            if not isinstance(orbit, FixedPosition):
+                return orbit
             else:
                 return None, None
         else:
@@ -100,6 +102,14 @@ class Orbit(VisibleObject):
         if self.instance:
             self.instance.setColor(srgb_to_linear(self.color * self.fade))
 
+    def get_local_positions(self, epoch, step):
+        times = [epoch + step * i for i in range(self.nbOfPoints)]
+        series = ephemeris_cache.get_series(self.orbit) if isinstance(self.orbit, CachedFunctionOrbit) else None
+        if series is not None:
+            return series.get_local_positions_at(times)
+        else:
+            return [self.orbit.get_local_position_at(time) for time in times]
+
     def create_instance(self):
         self.vertexData = GeomVertexData('vertexData', GeomVertexFormat.getV3(), Geom.UHStatic)
         self.vertexWriter = GeomVertexWriter(self.vertexData, 'vertex')
@@ -111,10 +121,8 @@ class Orbit(VisibleObject):
             # TODO: Properly calculate orbit start and end time
             epoch = self.orbit.get_time_of_perihelion() - self.orbit.period * 5.0
             step = self.orbit.period * 10.0 / (self.nbOfPoints - 1)
-        for i in range(self.nbOfPoints):
-            time = epoch + step * i
-            pos = self.orbit.get_local_position_at(time) - delta
-            self.vertexWriter.addData3f(*pos)
+        for pos in self.get_local_positions(epoch, step):
+            self.vertexWriter.addData3f(*(pos - delta))
         self.lines = GeomLines(Geom.UHStatic)
         for i in range(self.nbOfPoints - 1):
             self.lines.addVertex(i)
@@ -168,10 +176,8 @@ class Orbit(VisibleObject):
             # TODO: Properly calculate orbit start and end time
             epoch = self.orbit.get_time_of_perihelion() - self.orbit.period * 5.0
             step = self.orbit.period * 10.0 / (self.nbOfPoints - 1)
-        for i in range(self.nbOfPoints):
-            time = epoch + step * i
-            pos = self.orbit.get_local_position_at(time) - delta
-            vwriter.setData3f(*pos)
+        for pos in self.get_local_positions(epoch, step):
+            vwriter.setData3f(*(pos - delta))
 
     def check_visibility(self, frustum, pixel_size):
         if (
@@ -20,6 +20,7 @@
 
 from math import floor, ceil
 from panda3d.core import LVector3, LQuaternion, LVector3d, LPoint3d
+import numpy
 
 from ...shapes.shape_object import ShapeObject
 from ...shadows import SphereShadowCaster, CustomShadowMapShadowCaster
@@ -70,6 +71,9 @@ class Surface(ShapeObject):
     def get_height_patch(self, patch, u, v):
         raise NotImplementedError
 
+    def get_heights_patch(self, patch, us, vs):
+        return numpy.array([self.get_height_patch(patch, u, v) for (u, v) in zip(us, vs)], dtype=numpy.float64)
+
     def parametric_to_shape_coord(self, x, y):
         return self.shape.parametric_to_shape_coord(x, y)
 
@@ -219,6 +223,23 @@ class MeshSurface(Surface):
         return self.shape.get_height_patch(patch, u, v)
 
 
+def get_mesh_heights_uv(heightmap, us, vs, density):
+    # Vectorized version of get_mesh_height_uv() of the heightmap surfaces
+    x0 = numpy.floor(us * density) / density * heightmap.width
+    y0 = numpy.floor(vs * density) / density * heightmap.height
+    x1 = numpy.ceil(us * density) / density * heightmap.width
+    y1 = numpy.ceil(vs * density) / density * heightmap.height
+    dx = us * heightmap.width - x0
+    dx = numpy.divide(dx, x1 - x0, out=dx, where=x1 != x0)
+    dy = vs * heightmap.height - y0
+    dy = numpy.divide(dy, y1 - y0, out=dy, where=y1 != y0)
+    h_00 = heightmap.get_heights(x0, y0)
+    h_01 = heightmap.get_heights(x0, y1)
+    h_10 = heightmap.get_heights(x1, y0)
+    h_11 = heightmap.get_heights(x1, y1)
+    return h_00 + (h_10 - h_00) * dx + (h_01 - h_00) * dy + (h_00 + h_11 - h_01 - h_10) * dx * dy
+
+
 class HeightmapSurface(EllipsoidSurface):
     def __init__(
         self,
@@ -422,6 +443,15 @@ class HeightmapFlatSurface(FlatSurface):
             height = 0
         return height
 
+    def get_heights_patch(self, patch, us, vs):
+        # The patch data is retrieved only once for all the points
+        patch_data = self.heightmap.get_patch_data(patch, strict=False)
+        if patch_data is None or not patch_data.data_ready:
+            return numpy.zeros(len(us))
+        us = numpy.asarray(us, dtype=numpy.float64)
+        vs = numpy.asarray(vs, dtype=numpy.float64)
+        return get_mesh_heights_uv(patch_data, us, vs, patch.density) * self.height_scale
+
     def get_alt_under(self, position, strict=False):
         # print("get_height_at", x, y)
         coord = self.shape.parametric_to_shape_coord(position[0], position[1])
@@ -38,6 +38,7 @@ import sys
 
 from .appstate import AppState
 from .astro.astro import abs_mag_to_lum
+from .astro.ephemeriscache import ephemeris_cache
 from .astro.frame import AnchorReferenceFrame, BodyReferenceFrames
 from .astro.frame import AbsoluteReferenceFrame, SynchroneReferenceFrame, OrbitReferenceFrame
 from .astro.units import J2000_Orientation, J200_EclipticOrientation
@@ -61,6 +62,8 @@ from .fonts import fontsManager
 from .foundation import BaseObject
 from .labels import Labels
 from .lights import GlobalLight, LightSources
+from .lodscheduler import lod_scheduler
+from .systemsindex import SystemsIndex
 from .nav import FreeNav, WalkNav, ControlNav
 from .objects.stellarobject import StellarObject
 from .objects.systems import StellarSystem, SimpleSystem
@@ -68,7 +71,7 @@ from .objects.universe import Universe
 from .opengl import OpenGLConfig
 from .parsers.configparser import configParser
 from .parsers.parsers import register_parsers
-from .parsers.yamlparser import YamlModuleParser
+from .parsers.yamlparser import YamlModuleParser, yaml_loader
 from .pgettext import patch_gettext
 from .pipeline.scenepipeline import BasicScenePipeline, ScenePipeline
 from .pointsset import PointsSetShapeObject, RegionsPointsSetShape, PassthroughPointsSetShape
@@ -76,10 +79,12 @@ from .pointsset import EmissivePointsSetShape, ScaledEmissivePointsSetShape, Hal
 from .pstats import pstat
 from .scene.scenemanager import StaticSceneManager, DynamicSceneManager, RegionSceneManager
 from .scene.scenemanager import C_CameraHolder, remove_main_region
-from .scene.sceneanchor import SceneAnchorCollection
+from .scene.sceneanchor import SceneAnchorCollection, scene_anchor_batch
 from .scene.sceneworld import ObserverCenteredWorld, Worlds
+from .shaderinputs import ShaderInputsCache
 from .ships import NoShip
 from .sprites import GaussianPointSprite, ExpPointSprite
+from .starstream import star_streams
 from .timecal import Time
 from .ui.gui import Gui
 from .ui.mouse import Mouse
@@ -448,6 +453,7 @@ class Cosmonium(CosmoniumBase):
 
         self.worlds = Worlds()
         self.universe = Universe(100 * units.GLy)
+        self.systems_index = SystemsIndex(self.universe)
         self.background = ObserverCenteredWorld("background", background=True)
         self.worlds.add_world(self.background)
         self.labels = Labels()
@@ -486,6 +492,8 @@ class Cosmonium(CosmoniumBase):
 
         self.splash = Splash() if not self.app_config.test_start else NoSplash()
 
+        self.exitFunc = self.save_caches
+
         if not settings.sync_data_load:
             self.async_start = workers.AsyncMethod("async_start", self, self.load_task, self.configure_scene)
         else:
@@ -901,6 +909,12 @@ class Cosmonium(CosmoniumBase):
         self.trigger_check_settings = True
         self.save_settings()
 
+    def save_caches(self):
+        if settings.ephemeris_cache and settings.ephemeris_cache_persist:
+            ephemeris_cache.save()
+        if settings.cache_yaml:
+            yaml_loader.save()
+
     def save_settings(self):
         configParser.save()
 
@@ -1161,8 +1175,10 @@ class Cosmonium(CosmoniumBase):
             * units.L0
             / (4 * pi * units.abs_mag_distance * units.abs_mag_distance / units.m / units.m)
         )
+        star_streams.update(self.observer.get_absolute_position(), lowest_radiance)
         traverser = UpdateTraverser(time, self.observer.anchor, lowest_radiance, self.update_id)
         self.universe.anchor.traverse(traverser)
+        star_streams.traverse(traverser)
         self.visibles = list(traverser.get_collected())
         self.visibles.sort(key=lambda v: v.z_distance)
         self.controllers_to_update = []
@@ -1187,6 +1203,7 @@ class Cosmonium(CosmoniumBase):
         )
         traverser = FindLightSourceTraverser(lowest_radiance, self.observer.get_absolute_position())
         self.universe.anchor.traverse(traverser)
+        star_streams.traverse(traverser)
         self.global_light_sources = sorted(traverser.get_collected(), key=lambda x: x._intrinsic_luminosity)
         # print("LIGHTS", list(map(lambda x: x.body.get_name(), self.global_light_sources)))
 
@@ -1382,8 +1399,11 @@ class Cosmonium(CosmoniumBase):
         scene_manager = self.scene_manager
         for newly_visible in self.becoming_visibles:
             newly_visible.body.scene_anchor.create_instance(scene_manager)
-        for visible in self.visibles:
-            visible.body.scene_anchor.update(scene_manager)
+        if scene_anchor_batch is not None:
+            scene_anchor_batch.update(scene_manager, self.visible_scene_anchors)
+        else:
+            for visible in self.visibles:
+                visible.body.scene_anchor.update(scene_manager)
         for old_visible in self.no_longer_visibles:
             old_visible.body.scene_anchor.remove_instance()
 
@@ -1425,6 +1445,7 @@ class Cosmonium(CosmoniumBase):
             body.update_obs(self.observer)
             body.check_visibility(frustum, pixel_size)
             body.update_lod(camera_pos, camera_rot)
+        lod_scheduler.process()
 
     @pstat
     def create_instances(self):
@@ -1475,20 +1496,31 @@ class Cosmonium(CosmoniumBase):
         pixel_size = self.observer.anchor.pixel_size
         self.labels.update_obs(self.observer)
         self.labels.check_visibility(frustum, pixel_size)
+        if settings.label_declutter:
+            self.labels.set_selected(self.selected)
+            self.labels.declutter(camera_rot, pixel_size)
         self.labels.check_and_create_instance(self.scene_manager, camera_pos, camera_rot)
         self.labels.check_and_update_instance(self.scene_manager, camera_pos, camera_rot)
 
     @pstat
     def find_nearest_system(self):
+        if settings.nearest_system_index:
+            nearest_system = self.systems_index.find_nearest(self.observer.anchor, self.nearest_system)
+            # The streamed stars are not in the index
+            if not star_streams.has_cells():
+                return nearest_system
+        else:
+            nearest_system = self.nearest_system
         # First iter over the visible object to have a first closest system
-        if self.nearest_system is not None:
-            nearest_system = self.nearest_system.anchor
-            distance = self.nearest_system.anchor.distance_to_obs
+        if nearest_system is not None:
+            distance = nearest_system.anchor.distance_to_obs
+            nearest_system = nearest_system.anchor
         else:
-            nearest_system = None
             distance = float('inf')
         traverser = FindClosestSystemTraverser(self.observer.anchor, nearest_system, distance)
-        self.universe.anchor.traverse(traverser)
+        if not settings.nearest_system_index:
+            self.universe.anchor.traverse(traverser)
+        star_streams.traverse(traverser)
         nearest_system = traverser.closest_system.body if traverser.closest_system is not None else None
         return nearest_system
 
@@ -1546,6 +1578,8 @@ class Cosmonium(CosmoniumBase):
         # print("FRAME", globalClock.get_frame_count())
         self.gui.update()
         self.time.update_time(dt)
+        if settings.ephemeris_cache:
+            ephemeris_cache.prefetch(self.time.time_full)
         self.add_focused_object(self.follow)
         self.add_focused_object(self.nearest_system)
         self.add_focused_object(self.selected)
@@ -1609,6 +1643,11 @@ class Cosmonium(CosmoniumBase):
         return Task.cont
 
     def update_instances_task(self, task):
+        # Report the shader inputs set since the previous frame, including the ones applied by the patch tasks
+        pstats.levelpstat('applied', 'ShaderInputs').set_level(ShaderInputsCache.nb_applied)
+        pstats.levelpstat('skipped', 'ShaderInputs').set_level(ShaderInputsCache.nb_skipped)
+        ShaderInputsCache.nb_applied = 0
+        ShaderInputsCache.nb_skipped = 0
         self.update_instances()
         self.scene_manager.build_scene(
             self.common_state, self.c_camera_holder, self.visible_scene_anchors, self.resolved_scene_anchors
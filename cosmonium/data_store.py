@@ -19,14 +19,64 @@
 
 
 from collections import deque
+from direct.task.TaskManagerGlobal import taskMgr
 from panda3d.core import Texture
-import struct
+import numpy
 
+from .pstats import levelpstat
+from . import settings
 from .shaders.data_source.data_store import DataStoreManagerShaderDataSource, ParametersDataStoreShaderDataSource
 
 
+class DataStoreFlusher:
+    """
+    Uploads once per frame, just before the rendering, the data stores modified during the frame.
+    """
+
+    def __init__(self):
+        self.managers = set()
+        self.dirty = set()
+        self.task = None
+        self.entries_pstat = levelpstat('entries', 'DataStore')
+        self.capacity_pstat = levelpstat('capacity', 'DataStore')
+        self.upload_pstat = levelpstat('upload-bytes', 'DataStore')
+
+    def add_manager(self, manager):
+        self.managers.add(manager)
+        if self.task is None:
+            self.task = taskMgr.add(self.flush_task, 'data-store-flush', sort=settings.data_store_flush_task_sort)
+
+    def remove_manager(self, manager):
+        self.managers.discard(manager)
+
+    def set_dirty(self, data_store):
+        self.dirty.add(data_store)
+
+    def flush(self):
+        uploaded = 0
+        for data_store in self.dirty:
+            uploaded += data_store.flush()
+        self.dirty = set()
+        entries = 0
+        capacity = 0
+        for manager in self.managers:
+            entries += manager.max_elem - len(manager.free_entries)
+            capacity += manager.max_elem
+        self.entries_pstat.set_level(entries)
+        self.capacity_pstat.set_level(capacity)
+        self.upload_pstat.set_level(uploaded)
+
+    def flush_task(self, task):
+        self.flush()
+        return task.cont
+
+
+data_store_flusher = DataStoreFlusher()
+
+
 class PatchDataStoreManager:
     def __init__(self, max_elem):
+        self.initial_max_elem = max_elem
         self.max_elem = max_elem
         self.entries = [None] * max_elem
         self.free_entries = deque(range(max_elem))
@@ -41,6 +91,7 @@ class PatchDataStoreManager:
     def init(self):
         for data_store in self.data_stores:
             data_store.init()
+        data_store_flusher.add_manager(self)
 
     def get_shader_data_source(self):
         shader_data_source = DataStoreManagerShaderDataSource()
@@ -53,11 +104,22 @@ class PatchDataStoreManager:
             data_store.apply(instance)
 
     def clear(self):
+        data_store_flusher.remove_manager(self)
+        self.max_elem = self.initial_max_elem
         self.entries = [None] * self.max_elem
         self.free_entries = deque(range(self.max_elem))
         for data_store in self.data_stores:
             data_store.clear()
 
+    def grow(self):
+        old_max_elem = self.max_elem
+        self.max_elem *= 2
+        print("Growing patch data store to", self.max_elem, "entries")
+        self.entries += [None] * (self.max_elem - old_max_elem)
+        self.free_entries.extendleft(range(self.max_elem - 1, old_max_elem - 1, -1))
+        for data_store in self.data_stores:
+            data_store.resize(self.max_elem)
+
     def apply_patch_data(self, patch, instance):
         if patch.entry_id is None:
             self.add_patch(patch)
@@ -65,6 +127,8 @@ class PatchDataStoreManager:
 
     def add_patch(self, patch):
         if patch.entry_id is None:
+            if len(self.free_entries) == 0:
+                self.grow()
             entry_id = self.free_entries.pop()
             patch.entry_id = entry_id
 
@@ -82,12 +146,20 @@ class PatchDataStoreManager:
 
 
 class PatchParametersDataStore:
+    """
+    Stores the parameters of the patches in a 1D float texture. The updates are accumulated in a staging array and
+    the modified range of entries is copied into the texture once per frame by the data store flusher.
+    """
+
     def __init__(self):
         self.texture_data = None
+        self.staging = None
         self.data_sources = []
         self.data_size = 0
+        self.entry_size = 0
         self.texture_size = 0
-        self.pack_format = ''
+        self.dirty_start = None
+        self.dirty_end = None
 
     def get_shader_data_source(self):
         return ParametersDataStoreShaderDataSource()
@@ -98,15 +170,29 @@ class PatchParametersDataStore:
             return
         self.data_sources.append(data_source)
         self.data_size += data_source.get_nb_shader_data()
-        self.texture_size = self.parent.max_elem * ((self.data_size * 4 + 15) // 16)
-        self.pack_format = 'f' * self.data_size
+        # Each entry starts on a texel boundary
+        self.entry_size = ((self.data_size + 3) // 4) * 4
+        self.texture_size = self.parent.max_elem * self.entry_size // 4
 
     def init(self):
-        if self.texture_size == 0:
+        if self.data_size == 0:
             return
         self.texture_data = Texture()
+        self.texture_data.set_clear_color(0.0)
+        self.resize(self.parent.max_elem)
+
+    def resize(self, max_elem):
+        if self.data_size == 0:
+            return
+        staging = numpy.zeros((max_elem, self.entry_size), dtype=numpy.float32)
+        if self.staging is not None:
+            staging[: len(self.staging)] = self.staging
+        self.staging = staging
+        self.texture_size = max_elem * self.entry_size // 4
+        # The texture is reconfigured in place as it is already used as shader input
         self.texture_data.setup_1d_texture(self.texture_size, Texture.T_float, Texture.F_rgba32)
         self.texture_data.set_clear_color(0.0)
+        self.set_dirty(0, max_elem)
 
     def apply(self, instance):
         if self.texture_size == 0:
@@ -115,14 +201,43 @@ class PatchParametersDataStore:
 
     def clear(self):
         self.texture_data = None
+        self.staging = None
+        self.dirty_start = None
+        self.dirty_end = None
+
+    def set_dirty(self, start, end):
+        if self.dirty_start is None:
+            self.dirty_start = start
+            self.dirty_end = end
+            data_store_flusher.set_dirty(self)
+        else:
+            self.dirty_start = min(self.dirty_start, start)
+            self.dirty_end = max(self.dirty_end, end)
 
     def update_patch(self, patch):
-        if self.texture_size == 0:
+        if self.staging is None:
             return
         data = []
         for data_source in self.data_sources:
             data_source.collect_shader_data(data, patch)
-        data_buffer = memoryview(self.texture_data.modify_ram_image())
-        offset = patch.entry_id * self.data_size * 4
-        packed_data = struct.pack(self.pack_format, *data)
-        data_buffer[offset : offset + self.data_size * 4] = packed_data
+        entry_id = patch.entry_id
+        self.staging[entry_id, : self.data_size] = data
+        self.set_dirty(entry_id, entry_id + 1)
+
+    def flush(self):
+        """
+        Copies the modified entries into the texture and returns the number of bytes copied.
+        """
+        if self.dirty_start is None:
+            return 0
+        start = self.dirty_start
+        end = self.dirty_end
+        self.dirty_start = None
+        self.dirty_end = None
+        if self.texture_data is None:
+            return 0
+        data_buffer = memoryview(self.texture_data.modify_ram_image()).cast('B')
+        dirty_data = self.staging[start:end].tobytes()
+        offset = start * self.entry_size * 4
+        data_buffer[offset : offset + len(dirty_data)] = dirty_data
+        return len(dirty_data)
@@ -21,6 +21,8 @@
 from direct.task.Task import gather
 from direct.task.TaskManagerGlobal import taskMgr
 
+from . import settings
+
 
 class DataSourceTasksTree:
     def __init__(self, sources):
@@ -142,9 +144,21 @@ class DataSourcesHandler(DataSource):
         for source in self.sources:
             source.create(shape)
 
+    def get_instance(self, shape):
+        if settings.shader_inputs_cache:
+            return shape.shader_inputs.bind(shape.instance)
+        else:
+            return shape.instance
+
+    def flush_instance(self, instance):
+        if settings.shader_inputs_cache:
+            instance.flush()
+
     def early_apply(self, shape):
+        instance = self.get_instance(shape)
         for source in self.sources:
-            source.early_apply(shape, shape.instance)
+            source.early_apply(shape, instance)
+        self.flush_instance(instance)
 
     async def load(self, shape):
         for source in self.sources:
@@ -154,13 +168,19 @@ class DataSourcesHandler(DataSource):
         await tasks_tree.run_tasks()
 
     def apply(self, shape):
+        instance = self.get_instance(shape)
         for source in self.sources:
-            source.apply(shape, shape.instance)
+            source.apply(shape, instance)
+        self.flush_instance(instance)
 
     def update(self, shape, camera_pos, camera_rot):
+        instance = self.get_instance(shape)
         for source in self.sources:
-            source.update(shape, shape.instance, camera_pos, camera_rot)
+            source.update(shape, instance, camera_pos, camera_rot)
+        self.flush_instance(instance)
 
     def clear(self, shape, instance):
+        instance = self.get_instance(shape)
         for source in self.sources:
-            source.clear(shape, shape.instance)
+            source.clear(shape, instance)
+        self.flush_instance(instance)
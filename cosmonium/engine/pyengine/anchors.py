@@ -29,9 +29,41 @@ from ...mathutil.quaternion import relative_rotation
 from ... import settings
 
 from ..octree import OctreeNode
+from .octree import OctreeNode as octree_snapshot_node
+from .octreesnapshot import octree_snapshot
 
 
 class AnchorBase:
+    # Most of the anchors are the anchors of catalogue stars, their attributes are stored in slots and the __dict__ is
+    # only created for the attributes specific to the subclasses
+    __slots__ = (
+        'content',
+        'body',
+        'parent',
+        'rebuild_needed',
+        'was_visible',
+        'visible',
+        'visibility_override',
+        'was_resolved',
+        'resolved',
+        'update_id',
+        'update_frozen',
+        'force_update',
+        'transform_id',
+        '_position',
+        '_global_position',
+        '_local_position',
+        '_orientation',
+        'bounding_radius',
+        '_height_under',
+        'rel_position',
+        'distance_to_obs',
+        'vector_to_obs',
+        'visible_size',
+        'z_distance',
+        '__dict__',
+    )
+
     def __init__(self, anchor_class, body):
         self.content = anchor_class
         self.body = body
@@ -46,6 +78,8 @@ class AnchorBase:
         self.update_id = -1
         self.update_frozen = False
         self.force_update = False
+        # Incremented each time the position or orientation of the anchor is modified
+        self.transform_id = 0
         # Cached values
         self._position = LPoint3d()
         self._global_position = LPoint3d()
@@ -60,6 +94,9 @@ class AnchorBase:
         self.visible_size = 0.0
         self.z_distance = 0.0
 
+    def get_transform_key(self):
+        return self.transform_id
+
     def set_rebuild_needed(self):
         self.rebuild_needed = True
         if self.parent is not None:
@@ -157,10 +194,23 @@ class CartesianAnchor(AnchorBase):
         self._intrinsic_luminosity = 0
         self._reflected_luminosity = 0
         self._point_radiance = 0
+        self._transform_key = None
+        self._cached_local_position = None
+        self._cached_absolute_orientation = None
 
     def is_stellar(self):
         return False
 
+    def get_transform_key(self):
+        return (self.transform_id, self.frame.get_cache_key())
+
+    def check_transform_cache(self):
+        key = self.get_transform_key()
+        if key != self._transform_key:
+            self._transform_key = key
+            self._cached_local_position = None
+            self._cached_absolute_orientation = None
+
     def has_frame(self):
         return True
 
@@ -169,6 +219,7 @@ class CartesianAnchor(AnchorBase):
         self._global_position = other.get_absolute_reference_point()
         self._frame_position = other.get_frame_position()
         self._frame_orientation = other.get_frame_orientation()
+        self.transform_id += 1
 
     def get_frame(self):
         return self.frame
@@ -179,6 +230,7 @@ class CartesianAnchor(AnchorBase):
         rot = self.get_absolute_orientation()
         # Update reference frame
         self.frame = frame
+        self.transform_id += 1
         # Set back the position to calculate the position in the new reference frame
         self.set_local_position(pos)
         self.set_absolute_orientation(rot)
@@ -218,25 +270,32 @@ class CartesianAnchor(AnchorBase):
         new_local = (self._global_position - new_reference_point) + old_local
         self._global_position = new_reference_point
         self._frame_position = self.frame.get_frame_position(new_local)
+        self.transform_id += 1
         self.do_update()
 
     def set_frame_position(self, position):
         self._frame_position = position
+        self.transform_id += 1
 
     def get_frame_position(self):
         return self._frame_position
 
     def set_frame_orientation(self, rotation):
         self._frame_orientation = rotation
+        self.transform_id += 1
 
     def get_frame_orientation(self):
         return self._frame_orientation
 
     def get_local_position(self):
-        return self.frame.get_local_position(self._frame_position)
+        self.check_transform_cache()
+        if self._cached_local_position is None:
+            self._cached_local_position = self.frame.get_local_position(self._frame_position)
+        return self._cached_local_position
 
     def set_local_position(self, position):
         self._frame_position = self.frame.get_frame_position(position)
+        self.transform_id += 1
 
     def get_absolute_reference_point(self):
         return self._global_position
@@ -247,12 +306,17 @@ class CartesianAnchor(AnchorBase):
     def set_absolute_position(self, position):
         position -= self._global_position
         self._frame_position = self.frame.get_frame_position(position)
+        self.transform_id += 1
 
     def get_absolute_orientation(self):
-        return self.frame.get_absolute_orientation(self._frame_orientation)
+        self.check_transform_cache()
+        if self._cached_absolute_orientation is None:
+            self._cached_absolute_orientation = self.frame.get_absolute_orientation(self._frame_orientation)
+        return self._cached_absolute_orientation
 
     def set_absolute_orientation(self, orientation):
         self._frame_orientation = self.frame.get_frame_orientation(orientation)
+        self.transform_id += 1
 
     def calc_absolute_position_of(self, frame_position):
         return self._global_position + self.frame.get_local_position(frame_position)
@@ -367,6 +431,17 @@ class ControlledCartesianAnchor(CartesianAnchor):
 
 
 class StellarAnchor(AnchorBase):
+    __slots__ = (
+        'point_color',
+        'orbit',
+        'rotation',
+        '_intrinsic_luminosity',
+        '_reflected_luminosity',
+        '_point_radiance',
+        '_equatorial',
+        '_albedo',
+        'transform_update_id',
+    )
     Emissive = 1
     Reflective = 2
     System = 4
@@ -385,6 +460,7 @@ class StellarAnchor(AnchorBase):
         self._point_radiance = 0.0
         self._equatorial = LQuaterniond()
         self._albedo = 0.5
+        self.transform_update_id = -1
         # TODO: Should be done properly
         # orbit.body = body
         # rotation.body = body
@@ -439,13 +515,15 @@ class StellarAnchor(AnchorBase):
         return (self._intrinsic_luminosity + self._reflected_luminosity) / (4 * pi * distance * distance * 1000 * 1000)
 
     def update(self, time, update_id):
-        if self.update_id == update_id:
+        if self.update_id == update_id or self.transform_update_id == update_id:
             return
         self._orientation = self.rotation.get_absolute_rotation_at(time)
         self._equatorial = self.rotation.get_equatorial_orientation_at(time)
         self._local_position = self.orbit.get_local_position_at(time)
         self._global_position = self.orbit.get_absolute_reference_point_at(time)
         self._position = self._global_position + self._local_position
+        self.transform_id += 1
+        self.transform_update_id = update_id
 
     def get_reflected_luminosity(self, star):
         vector_to_star = self.calc_absolute_relative_position(star)
@@ -477,6 +555,8 @@ class StellarAnchor(AnchorBase):
 
 
 class FixedStellarAnchor(StellarAnchor):
+    __slots__ = ()
+
     def __init__(self, body, orbit, rotation, point_color):
         StellarAnchor.__init__(self, body, orbit, rotation, point_color)
         # self.update_frozen = True
@@ -484,7 +564,7 @@ class FixedStellarAnchor(StellarAnchor):
 
 
 class DynamicStellarAnchor(StellarAnchor):
-    pass
+    __slots__ = ()
 
 
 class SystemAnchor(DynamicStellarAnchor):
@@ -582,9 +662,28 @@ class OctreeAnchor(SystemAnchor):
             # TODO: this should be done properly at anchor creation
             child.update(0, None)
             child.rebuild()
+        use_snapshot = (
+            settings.octree_snapshot
+            and self.body.octree_snapshot
+            and len(self.children) >= settings.octree_snapshot_min_leaves
+            and type(self.octree) is octree_snapshot_node
+        )
+        if use_snapshot:
+            key = octree_snapshot.calc_key(self.octree, self.children)
+            creation_time = octree_snapshot.restore(self.octree, self.children, key)
+            if creation_time is not None:
+                end = time()
+                print("Octree restored from snapshot in", end - start, "(created in", creation_time, ")")
+                if settings.octree_snapshot_validate:
+                    differences = octree_snapshot.validate(self.octree, self.children)
+                    print("Octree snapshot validation:", differences, "different cells")
+                return
+        for child in self.children:
             self.octree.add(child)
         end = time()
         print("Creation time:", end - start)
+        if use_snapshot:
+            octree_snapshot.save(self.octree, self.children, key, end - start)
 
     def dump_octree(self):
         self.octree.dump_octree()
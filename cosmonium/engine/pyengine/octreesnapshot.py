@@ -0,0 +1,200 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import LPoint3d
+import hashlib
+import numpy
+import os
+
+from ... import cache
+from ... import settings
+from .octree import OctreeNode
+
+
+class OctreeSnapshot:
+    """
+    Stores the layout of an octree, the cells and the leaves they contain, in a compact binary file so that it can be
+    recreated directly at the next start instead of inserting again each leaf in the octree.
+    The snapshot is keyed by the positions, luminosities and radius of the leaves and the octree parameters, so it is
+    only used when the content of the octree did not change.
+    """
+
+    snapshot_version = 1
+
+    def __init__(self):
+        self.cache_path = None
+
+    def get_cache_path(self):
+        if self.cache_path is None:
+            self.cache_path = cache.create_path_for('snapshots')
+        return self.cache_path
+
+    def calc_key(self, root, leaves):
+        data = numpy.empty((len(leaves), 5))
+        for i, leaf in enumerate(leaves):
+            position = leaf._global_position
+            data[i] = (position[0], position[1], position[2], leaf._intrinsic_luminosity, leaf.bounding_radius)
+        parameters = (
+            self.snapshot_version,
+            OctreeNode.max_level,
+            OctreeNode.max_leaves,
+            OctreeNode.child_factor,
+            tuple(root.center),
+            root.width,
+            root.threshold,
+        )
+        key = hashlib.sha1(repr(parameters).encode('utf-8'))
+        key.update(data.tobytes())
+        return key.hexdigest()
+
+    def get_filename(self, key):
+        return os.path.join(self.get_cache_path(), 'octree-' + key + '.npz')
+
+    def save(self, root, leaves, key, creation_time):
+        leaf_ids = {id(leaf): i for i, leaf in enumerate(leaves)}
+        nodes = []
+        parents = []
+        stack = [(root, -1)]
+        while stack:
+            (node, parent) = stack.pop()
+            node_id = len(nodes)
+            nodes.append(node)
+            parents.append(parent)
+            for child in reversed(node.children):
+                if child is not None:
+                    stack.append((child, node_id))
+        count = len(nodes)
+        centers = numpy.empty((count, 3))
+        values = numpy.empty((count, 3))
+        indexes = numpy.empty((count, 3), dtype=numpy.int32)
+        leaf_counts = numpy.empty(count, dtype=numpy.int32)
+        node_leaves = []
+        for i, node in enumerate(nodes):
+            centers[i] = tuple(node.center)
+            values[i] = (node.width, node.threshold, node.max_luminosity)
+            indexes[i] = (node.index, node.nb_leaves, node.has_children)
+            leaf_counts[i] = len(node.leaves)
+            node_leaves += [leaf_ids[id(leaf)] for leaf in node.leaves]
+        filename = self.get_filename(key)
+        temp_filename = filename + '.tmp.npz'
+        try:
+            numpy.savez(
+                temp_filename,
+                parents=numpy.array(parents, dtype=numpy.int32),
+                centers=centers,
+                values=values,
+                indexes=indexes,
+                leaf_counts=leaf_counts,
+                leaves=numpy.array(node_leaves, dtype=numpy.int32),
+                creation_time=numpy.array(creation_time),
+            )
+            os.replace(temp_filename, filename)
+        except OSError as e:
+            print("Could not write octree snapshot", filename, ':', e)
+        # The snapshots of the previous versions of the catalogues are never used again
+        cache.prune_files(self.get_cache_path(), 'octree-', settings.octree_snapshot_max_files)
+
+    def restore(self, root, leaves, key):
+        """
+        Recreates the content of the root node from the snapshot, returns the creation time of the original octree or
+        None if there is no valid snapshot.
+        """
+        filename = self.get_filename(key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            with numpy.load(filename) as data:
+                parents = data['parents'].tolist()
+                centers = data['centers'].tolist()
+                values = data['values'].tolist()
+                indexes = data['indexes'].tolist()
+                leaf_counts = data['leaf_counts'].tolist()
+                node_leaves = data['leaves'].tolist()
+                creation_time = float(data['creation_time'])
+        except (OSError, ValueError, KeyError) as e:
+            print("Could not read octree snapshot", filename, ':', e)
+            return None
+        if len(node_leaves) != len(leaves):
+            return None
+        try:
+            # Mark the snapshot as recently used so that it is not pruned
+            os.utime(filename)
+        except OSError:
+            pass
+        nodes = []
+        start = 0
+        for i, parent_id in enumerate(parents):
+            (width, threshold, max_luminosity) = values[i]
+            (index, nb_leaves, has_children) = indexes[i]
+            if parent_id < 0:
+                node = root
+            else:
+                parent = nodes[parent_id]
+                node = OctreeNode(parent.level + 1, parent, LPoint3d(*centers[i]), width, threshold, index)
+                parent.children[index] = node
+            node.max_luminosity = max_luminosity
+            node.nb_leaves = nb_leaves
+            node.has_children = has_children != 0
+            end = start + leaf_counts[i]
+            node.leaves = [leaves[leaf_id] for leaf_id in node_leaves[start:end]]
+            for leaf in node.leaves:
+                leaf.parent = node
+            start = end
+            nodes.append(node)
+        return creation_time
+
+    def compare_nodes(self, restored, fresh, differences):
+        if (
+            restored.center != fresh.center
+            or restored.width != fresh.width
+            or restored.threshold != fresh.threshold
+            or restored.has_children != fresh.has_children
+            or restored.max_luminosity != fresh.max_luminosity
+            or restored.nb_leaves != fresh.nb_leaves
+            or list(map(id, restored.leaves)) != list(map(id, fresh.leaves))
+        ):
+            differences.append(restored)
+        for restored_child, fresh_child in zip(restored.children, fresh.children):
+            if (restored_child is None) != (fresh_child is None):
+                differences.append(restored)
+            elif restored_child is not None:
+                self.compare_nodes(restored_child, fresh_child, differences)
+
+    def validate(self, root, leaves):
+        """
+        Creates a new octree with the same leaves and compares it with the restored one, returns the number of cells
+        that differ.
+        """
+        fresh = OctreeNode(root.level, root.parent, LPoint3d(root.center), root.width, root.threshold, root.index)
+        for leaf in leaves:
+            fresh.add(leaf)
+        differences = []
+        self.compare_nodes(root, fresh, differences)
+        # Adding the leaves in the new octree changed their parent
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for leaf in node.leaves:
+                leaf.parent = node
+            stack += [child for child in node.children if child is not None]
+        return len(differences)
+
+
+octree_snapshot = OctreeSnapshot()
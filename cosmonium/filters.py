@@ -19,6 +19,7 @@
 
 
 from math import floor
+import numpy
 from panda3d.core import LColor, Texture
 
 from .shaders.filters import TextureNearestFilter, TextureBilinearFilter, TextureSmoothstepFilter
@@ -52,9 +53,56 @@ class TexFilter(object):
             return 0.0
         return value[0]
 
+    def get_single_values(self, data, xs, ys, clamp=True):
+        (height, width) = data.shape
+        us = xs / width
+        vs = ys / height
+        if clamp:
+            us = numpy.clip(us, 0.0, 1.0)
+            vs = numpy.clip(vs, 0.0, 1.0)
+        # Same texel selection as TexturePeeker.lookup(), which wraps the coordinates and works in single precision
+        us = us.astype(numpy.float32)
+        vs = vs.astype(numpy.float32)
+        x = ((us - numpy.floor(us)) * numpy.float32(width)).astype(numpy.intp) % width
+        y = ((vs - numpy.floor(vs)) * numpy.float32(height)).astype(numpy.intp) % height
+        return data[y, x]
+
+    def get_bilinear_values(self, data, xs, ys, clamp=True):
+        (height, width) = data.shape
+        if clamp:
+            xs = numpy.clip(xs, 0.0, width)
+            ys = numpy.clip(ys, 0.0, height)
+        us = xs - 0.5
+        vs = ys - 0.5
+        x0 = numpy.floor(us).astype(numpy.intp)
+        y0 = numpy.floor(vs).astype(numpy.intp)
+        fx = us - x0
+        fy = vs - y0
+        values = numpy.zeros(len(us))
+        weights = numpy.zeros(len(us))
+        # Like TexturePeeker.lookup_bilinear(), the texels outside of the texture are ignored
+        for dx, dy, weight in (
+            (0, 0, (1.0 - fx) * (1.0 - fy)),
+            (1, 0, fx * (1.0 - fy)),
+            (0, 1, (1.0 - fx) * fy),
+            (1, 1, fx * fy),
+        ):
+            x = x0 + dx
+            y = y0 + dy
+            weight = numpy.where((x >= 0) & (x < width) & (y >= 0) & (y < height), weight, 0.0)
+            values += weight * data[numpy.clip(y, 0, height - 1), numpy.clip(x, 0, width - 1)]
+            weights += weight
+        return numpy.divide(values, weights, out=numpy.zeros(len(us)), where=weights > 0)
+
     def get_value(self, peeker, x, y):
         raise NotImplementedError()
 
+    def get_values(self, data, xs, ys):
+        """
+        Vectorized version of get_value(), the texture is given as a 2D array of its first component.
+        """
+        raise NotImplementedError()
+
     def update_texture_config(self, texture_config):
         raise NotImplementedError()
 
@@ -66,6 +114,9 @@ class NearestFilter(TexFilter):
     def get_value(self, peeker, x, y):
         return self.get_single_value(peeker, x, y)
 
+    def get_values(self, data, xs, ys):
+        return self.get_single_values(data, xs, ys)
+
     def update_texture_config(self, texture_config):
         texture_config.minfilter = Texture.FT_nearest
         texture_config.magfilter = Texture.FT_nearest
@@ -78,6 +129,9 @@ class BilinearFilter(TexFilter):
     def get_value(self, peeker, x, y):
         return self.get_bilinear_value(peeker, x, y)
 
+    def get_values(self, data, xs, ys):
+        return self.get_bilinear_values(data, xs, ys)
+
     def update_texture_config(self, texture_config):
         texture_config.minfilter = Texture.FT_linear
         texture_config.magfilter = Texture.FT_linear
@@ -101,6 +155,17 @@ class SmoothstepFilter(TexFilter):
 
         return self.get_bilinear_value(peeker, i_x + f_x - 0.5, i_y + f_y - 0.5)
 
+    def get_values(self, data, xs, ys):
+        xs = xs + 0.5
+        ys = ys + 0.5
+        i_x = numpy.floor(xs)
+        i_y = numpy.floor(ys)
+        f_x = xs - i_x
+        f_y = ys - i_y
+        f_x = f_x * f_x * (3.0 - 2.0 * f_x)
+        f_y = f_y * f_y * (3.0 - 2.0 * f_y)
+        return self.get_bilinear_values(data, i_x + f_x - 0.5, i_y + f_y - 0.5)
+
     def update_texture_config(self, texture_config):
         texture_config.minfilter = Texture.FT_linear
         texture_config.magfilter = Texture.FT_linear
@@ -124,6 +189,17 @@ class QuinticFilter(TexFilter):
 
         return self.get_bilinear_value(peeker, i_x + f_x - 0.5, i_y + f_y - 0.5)
 
+    def get_values(self, data, xs, ys):
+        xs = xs + 0.5
+        ys = ys + 0.5
+        i_x = numpy.floor(xs)
+        i_y = numpy.floor(ys)
+        f_x = xs - i_x
+        f_y = ys - i_y
+        f_x = f_x * f_x * f_x * (f_x * (f_x * 6.0 - 15.0) + 10.0)
+        f_y = f_y * f_y * f_y * (f_y * (f_y * 6.0 - 15.0) + 10.0)
+        return self.get_bilinear_values(data, i_x + f_x - 0.5, i_y + f_y - 0.5)
+
     def update_texture_config(self, texture_config):
         texture_config.minfilter = Texture.FT_linear
         texture_config.magfilter = Texture.FT_linear
@@ -181,3 +257,31 @@ class BSplineFilter(TexFilter):
         a = mix(p01, p00, sx)
         b = mix(p11, p10, sx)
         return mix(b, a, sy)
+
+    def get_values(self, data, xs, ys):
+        tc_x = numpy.floor(xs - 0.5) + 0.5
+        tc_y = numpy.floor(ys - 0.5) + 0.5
+
+        cubic_x = self.cubic(xs - tc_x)
+        cubic_y = self.cubic(ys - tc_y)
+
+        s_x = cubic_x[0] + cubic_x[1]
+        s_y = cubic_x[2] + cubic_x[3]
+        s_z = cubic_y[0] + cubic_y[1]
+        s_w = cubic_y[2] + cubic_y[3]
+        offset_x = tc_x - 1 + (cubic_x[1]) / s_x
+        offset_y = tc_x + 1 + (cubic_x[3]) / s_y
+        offset_z = tc_y - 1 + (cubic_y[1]) / s_z
+        offset_w = tc_y + 1 + (cubic_y[3]) / s_w
+
+        sx = s_x / (s_x + s_y)
+        sy = s_z / (s_z + s_w)
+
+        p00 = self.get_bilinear_values(data, offset_x, offset_z)
+        p01 = self.get_bilinear_values(data, offset_y, offset_z)
+        p10 = self.get_bilinear_values(data, offset_x, offset_w)
+        p11 = self.get_bilinear_values(data, offset_y, offset_w)
+
+        a = p01 * (1.0 - sx) + p00 * sx
+        b = p11 * (1.0 - sx) + p10 * sx
+        return b * (1.0 - sy) + a * sy
@@ -141,6 +141,8 @@ class BaseObject(object):
 class VisibleObject(BaseObject):
     ignore_light = False
     patchable = False
+    # Frame time at which a lazily created object was found hidden, used to release it
+    hidden_since = None
 
     def __init__(self, name):
         BaseObject.__init__(self, name)
@@ -299,10 +301,49 @@ class CompositeObject(BaseObject):
             component.remove_instance()
 
 
+class LabelNodePool:
+    """
+    Pool of label node hierarchies, the text node, card and holder of a removed label are reused by the next
+    created label instead of building and configuring new nodes.
+    The nodes keep the font and shader they were created with, the pool only holds nodes created with its current
+    configuration.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = []
+        self.config = None
+
+    def set_config(self, config):
+        if config != self.config:
+            self.clear()
+            self.config = config
+
+    def acquire(self):
+        if len(self.entries) > 0:
+            return self.entries.pop()
+        else:
+            return None
+
+    def release(self, entry, config):
+        instance = entry[0]
+        if config == self.config and len(self.entries) < self.max_size:
+            instance.detach_node()
+            instance.clear_shader_input("color_picking")
+            entry[3].clearPythonTag('owner')
+            self.entries.append(entry)
+        else:
+            instance.remove_node()
+
+    def clear(self):
+        for entry in self.entries:
+            entry[0].remove_node()
+        self.entries = []
+
+
 class ObjectLabel(VisibleObject):
     default_shown = False
     ignore_light = True
-    font_init = False
     font = None
     appearance = None
     shader = None
@@ -313,6 +354,26 @@ class ObjectLabel(VisibleObject):
         VisibleObject.__init__(self, name)
         self.fade = 1.0
         self.label_source = label_source
+        self.label_config = None
+
+    @classmethod
+    def get_pool(cls):
+        # Each label class has its own pool as the nodes are configured with the font and shader of the class
+        pool = cls.__dict__.get('pool')
+        if pool is None:
+            pool = LabelNodePool()
+            cls.pool = pool
+        return pool
+
+    @classmethod
+    def check_config(cls):
+        pool = cls.get_pool()
+        config = (settings.label_font, settings.color_picking and cls.color_picking)
+        if config != pool.config:
+            cls.load_font()
+            cls.create_shader()
+            pool.set_config(config)
+        return config
 
     @classmethod
     def create_shader(cls):
@@ -342,15 +403,15 @@ class ObjectLabel(VisibleObject):
             cls.font = font.load()
         else:
             cls.font = None
-        cls.font_init = True
 
     def create_instance(self):
         # print("Create label for", self.get_name())
-        self.label = TextNode(self.label_source.get_ascii_name() + '-label')
-        if not self.font_init:
-            self.load_font()
-        if self.font is not None:
-            self.label.set_font(self.font)
+        self.label_config = self.check_config()
+        entry = self.get_pool().acquire()
+        if entry is None:
+            entry = self.create_label_nodes()
+        (self.instance, self.label_instance, self.label, card_node, self.look_at) = entry
+        self.label.set_name(self.label_source.get_ascii_name() + '-label')
         name = bayer.decode_name(self.label_source.get_label_text())
         self.label.setText(name)
         self.label.setTextColor(*srgb_to_linear(self.label_source.get_label_color()))
@@ -361,34 +422,64 @@ class ObjectLabel(VisibleObject):
         cardMaker = CardMaker(self.label_source.get_ascii_name() + '-labelcard')
         cardMaker.setFrame(self.label.getFrameActual())
         cardMaker.setColor(0, 0, 0, 0)
-        card_node = cardMaker.generate()
-        self.label_instance = NodePath(card_node)
-        self.label_instance.attachNewNode(self.label)
+        card_node.set_name(self.label_source.get_ascii_name() + '-labelcard')
+        card_node.remove_all_geoms()
+        card_node.add_geoms_from(cardMaker.generate())
+        self.instance.reparent_to(self.scene_anchor.unshifted_instance)
+        self.instance_ready = True
+        self.instance.set_color_scale(LColor(1, 1, 1, 1))
+        card_node.setPythonTag('owner', self.label_source)
+
+    def create_label_nodes(self):
+        label = TextNode('label')
+        if self.font is not None:
+            label.set_font(self.font)
+        card_node = GeomNode('labelcard')
+        label_instance = NodePath(card_node)
+        label_instance.attachNewNode(label)
         # self.label_instance.setTransparency(TransparencyAttrib.MAlpha)
         # card.setEffect(DecalEffect.make())
         # Using look_at() instead of billboard effect to also rotate the collision solid
         # card.setBillboardPointEye()
         # Using a card holder as look_at() is changing the hpr parameters
-        self.instance = NodePath('label-holder')
-        self.label_instance.reparentTo(self.instance)
-        self.instance.reparent_to(self.scene_anchor.unshifted_instance)
-        self.instance_ready = True
-        self.instance.node().setBounds(OmniBoundingVolume())
-        self.instance.node().setFinal(True)
-        self.instance.hide(self.AllCamerasMask)
-        self.instance.show(self.default_camera_mask)
-
-        if self.shader is None:
-            self.create_shader()
-        self.appearance.apply(self, self.instance)
-        self.shader.apply(self.instance)
-        TransparencyBlend.apply(self.appearance.transparency_blend, self.instance)
-
-        self.instance.setCollideMask(GeomNode.getDefaultCollideMask())
-        self.instance.set_depth_write(False)
-        self.instance.set_color_scale(LColor(1, 1, 1, 1))
-        card_node.setPythonTag('owner', self.label_source)
-        self.look_at = self.instance.attachNewNode("dummy")
+        instance = NodePath('label-holder')
+        label_instance.reparentTo(instance)
+        instance.node().setBounds(OmniBoundingVolume())
+        instance.node().setFinal(True)
+        instance.hide(self.AllCamerasMask)
+        instance.show(self.default_camera_mask)
+
+        self.appearance.apply(self, instance)
+        self.shader.apply(instance)
+        TransparencyBlend.apply(self.appearance.transparency_blend, instance)
+
+        instance.setCollideMask(GeomNode.getDefaultCollideMask())
+        instance.set_depth_write(False)
+        look_at = instance.attachNewNode("dummy")
+        return (instance, label_instance, label, card_node, look_at)
+
+    def remove_instance(self):
+        if self.instance:
+            entry = (self.instance, self.label_instance, self.label, self.label_instance.node(), self.look_at)
+            self.get_pool().release(entry, self.label_config)
+            self.instance = None
+            self.instance_ready = False
+
+    def get_text_width(self):
+        """
+        Returns the width of the label text, relative to its height.
+        """
+        if self.instance is not None:
+            (left, right, bottom, top) = self.label.getFrameActual()
+            return right - left
+        else:
+            return len(self.label_source.get_label_text()) * 0.6
+
+    def update_label_instance(self, scene_manager, camera_pos, camera_rot, forward, up):
+        """
+        Update the label instance using the camera forward and up vectors precomputed by the label manager.
+        """
+        self.update_instance(scene_manager, camera_pos, camera_rot)
 
 
 class LabelledObject(CompositeObject):
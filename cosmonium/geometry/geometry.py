@@ -34,10 +34,10 @@ try:
 except ImportError as e:
     print("WARNING: Could not load geometry C implementation, fallback on python implementation")
     print("\t", e)
-    from .pygeometry.geometry import UVPatch  # noqa: F401
-    from .pygeometry.geometry import SquaredDistanceSquarePatch  # noqa: F401
-    from .pygeometry.geometry import NormalizedSquarePatch  # noqa: F401
-    from .pygeometry.geometry import Tile  # noqa: F401
+    from .pygeometry.npgeometry import UVPatch  # noqa: F401
+    from .pygeometry.npgeometry import SquaredDistanceSquarePatch  # noqa: F401
+    from .pygeometry.npgeometry import NormalizedSquarePatch  # noqa: F401
+    from .pygeometry.npgeometry import Tile  # noqa: F401
     from .pygeometry.geometry import TessellationInfo  # noqa: F401
 
 from .pygeometry.geometry import BoundingBoxGeom  # noqa: F401
@@ -0,0 +1,430 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+# NumPy implementation of the patch generators.
+# All the vertex attributes of a patch are computed as arrays and uploaded with a single copy into the vertex data,
+# the index buffers only depend on the tessellation configuration and are shared between the patches.
+
+from panda3d.core import Geom, GeomVertexArrayFormat, GeomVertexData, GeomVertexFormat, GeomTriangles, InternalName
+
+import numpy
+
+from ...pstats import named_pstat
+from .geometry import empty_node, convert_xy
+from .geometry import make_square_primitives, make_primitives_skirt
+from .geometry import make_adapted_square_primitives, make_adapted_square_primitives_skirt
+from .geometry import UVPatchOffsetVector, NormalizedSquarePatchOffsetVector, SquaredDistanceSquarePatchOffsetVector
+
+# Layout of a vertex row : vertex, texcoord, normal, tangent and binormal
+VERTEX = slice(0, 3)
+TEXCOORD = slice(3, 5)
+NORMAL = slice(5, 8)
+TANGENT = slice(8, 11)
+BINORMAL = slice(11, 14)
+ROW_SIZE = 14
+
+vertex_format = None
+grids = {}
+square_primitives = {}
+uv_primitives = {}
+tile_templates = {}
+
+
+def get_vertex_format():
+    global vertex_format
+    if vertex_format is None:
+        array = GeomVertexArrayFormat()
+        array.add_column(InternalName.get_vertex(), 3, Geom.NTFloat32, Geom.CPoint)
+        array.add_column(InternalName.get_texcoord(), 2, Geom.NTFloat32, Geom.CTexcoord)
+        array.add_column(InternalName.get_normal(), 3, Geom.NTFloat32, Geom.CVector)
+        array.add_column(InternalName.get_tangent(), 3, Geom.NTFloat32, Geom.CVector)
+        array.add_column(InternalName.get_binormal(), 3, Geom.NTFloat32, Geom.CVector)
+        format = GeomVertexFormat()
+        format.addArray(array)
+        vertex_format = GeomVertexFormat.registerFormat(format)
+    return vertex_format
+
+
+def make_geom(rows, prim):
+    gvd = GeomVertexData('gvd', get_vertex_format(), Geom.UHStatic)
+    gvd.unclean_set_num_rows(len(rows))
+    memoryview(gvd.modify_array(0)).cast('B')[:] = numpy.ascontiguousarray(rows, dtype=numpy.float32).tobytes()
+    geom = Geom(gvd)
+    geom.add_primitive(prim)
+    return geom
+
+
+def normalize(vectors):
+    lengths = numpy.sqrt((vectors * vectors).sum(axis=1))[:, numpy.newaxis]
+    return numpy.divide(vectors, lengths, out=vectors.copy(), where=lengths != 0)
+
+
+def square_grid(inner, use_patch_skirts):
+    """
+    Returns the i and j indices of the vertices of a square patch, including its skirt if any, and the skirt mask.
+    """
+    key = (inner, use_patch_skirts)
+    grid = grids.get(key)
+    if grid is None:
+        nb_vertices = inner + 1
+        i = numpy.repeat(numpy.arange(nb_vertices), nb_vertices)
+        j = numpy.tile(numpy.arange(nb_vertices), nb_vertices)
+        if use_patch_skirts:
+            b = numpy.arange(nb_vertices)
+            low = numpy.zeros(nb_vertices, dtype=b.dtype)
+            high = numpy.full(nb_vertices, inner)
+            i = numpy.concatenate((i, low, high, b, b))
+            j = numpy.concatenate((j, b, b, low, high))
+        skirt = numpy.arange(len(i)) >= nb_vertices * nb_vertices
+        grid = (i.astype(numpy.float64), j.astype(numpy.float64), skirt)
+        grids[key] = grid
+    return grid
+
+
+def get_square_primitive(tessellation, use_patch_adaptation, use_patch_skirts):
+    inner = tessellation.inner
+    if use_patch_adaptation:
+        key = (inner, tuple(tessellation.ratio), use_patch_adaptation, use_patch_skirts)
+    else:
+        key = (inner, None, use_patch_adaptation, use_patch_skirts)
+    prim = square_primitives.get(key)
+    if prim is None:
+        nb_vertices = inner + 1
+        nb_primitives = inner * inner
+        if use_patch_skirts:
+            nb_primitives += inner * 4
+        prim = GeomTriangles(Geom.UHStatic)
+        prim.reserve_num_vertices(nb_primitives)
+        if use_patch_adaptation:
+            make_adapted_square_primitives(prim, inner, nb_vertices, tessellation.ratio)
+            if use_patch_skirts:
+                make_adapted_square_primitives_skirt(prim, inner, nb_vertices, tessellation.ratio)
+        else:
+            make_square_primitives(prim, inner, nb_vertices)
+            if use_patch_skirts:
+                make_primitives_skirt(prim, inner, nb_vertices)
+        prim.closePrimitive()
+        square_primitives[key] = prim
+    return prim
+
+
+def get_uv_primitive(rings, sectors):
+    key = (rings, sectors)
+    prim = uv_primitives.get(key)
+    if prim is None:
+        r_sectors = sectors + 1
+        r = numpy.repeat(numpy.arange(rings), sectors)
+        s = numpy.tile(numpy.arange(sectors), rings)
+        v = r * r_sectors + s
+        indices = numpy.stack((v, v + 1, v + r_sectors, v + 1, v + r_sectors + 1, v + r_sectors), axis=1).ravel()
+        prim = GeomTriangles(Geom.UHStatic)
+        if (rings + 1) * r_sectors > 65535:
+            prim.set_index_type(Geom.NT_uint32)
+            dtype = numpy.uint32
+        else:
+            dtype = numpy.uint16
+        array = prim.modify_vertices()
+        array.unclean_set_num_rows(len(indices))
+        memoryview(array).cast('B')[:] = indices.astype(dtype).tobytes()
+        uv_primitives[key] = prim
+    return prim
+
+
+def make_texcoords(u, v, inv_u, inv_v, swap_uv):
+    if inv_u:
+        u = 1.0 - u
+    if inv_v:
+        v = 1.0 - v
+    if swap_uv:
+        u, v = v, u
+    return numpy.stack((u, v), axis=1)
+
+
+def orient_tangent_space(rows, tangent, binormal, inv_u, inv_v, swap_uv):
+    if inv_u:
+        tangent = -tangent
+    if inv_v:
+        binormal = -binormal
+    if swap_uv:
+        tangent, binormal = binormal, tangent
+    rows[:, TANGENT] = tangent
+    rows[:, BINORMAL] = binormal
+
+
+def make_patch_path(rows, prim):
+    (path, node) = empty_node('uv')
+    node.add_geom(make_geom(rows, prim))
+    return path
+
+
+@named_pstat("geom")
+def UVPatch(
+    axes, rings, sectors, x0, y0, x1, y1, global_texture=False, inv_texture_u=False, inv_texture_v=False, offset=0.0
+):
+    r_sectors = sectors + 1
+    r_rings = rings + 1
+    axes_array = numpy.array(tuple(axes))
+    dx = x1 - x0
+    dy = y1 - y0
+    r = numpy.repeat(numpy.arange(r_rings), r_sectors).astype(numpy.float64)
+    s = numpy.tile(numpy.arange(r_sectors), r_rings).astype(numpy.float64)
+    cos_s = numpy.cos(2 * numpy.pi * (x0 + s * dx / sectors) + numpy.pi)
+    sin_s = numpy.sin(2 * numpy.pi * (x0 + s * dx / sectors) + numpy.pi)
+    sin_r = numpy.sin(numpy.pi * (y0 + r * dy / rings))
+    cos_r = numpy.cos(numpy.pi * (y0 + r * dy / rings))
+    point = numpy.stack((cos_s * sin_r, sin_s * sin_r, -cos_r), axis=1)
+    tangent = numpy.stack((-axes_array[0] * point[:, 1], axes_array[1] * point[:, 0], numpy.zeros(len(point))), axis=1)
+    tangent[sin_r == 0] = (-axes_array[0], 0, 0)
+    rows = numpy.empty((len(point), ROW_SIZE), dtype=numpy.float32)
+    if global_texture:
+        rows[:, TEXCOORD] = numpy.stack((x0 + s * dx / sectors, y0 + r * dy / rings), axis=1)
+    else:
+        rows[:, TEXCOORD] = make_texcoords(s / sectors, r / rings, inv_texture_u, inv_texture_v, False)
+    vertices = point * axes_array
+    if offset != 0.0:
+        vertices -= numpy.array(tuple(UVPatchOffsetVector(axes, x0, y0, x1, y1) * offset))
+    rows[:, VERTEX] = vertices
+    normal_coefs = numpy.array(
+        (axes_array[1] * axes_array[2], axes_array[0] * axes_array[2], axes_array[0] * axes_array[1])
+    )
+    normal = normalize(point * normal_coefs)
+    tangent = normalize(tangent)
+    rows[:, NORMAL] = normal
+    rows[:, TANGENT] = tangent
+    rows[:, BINORMAL] = normalize(numpy.cross(normal, tangent))
+    return make_patch_path(rows, get_uv_primitive(rings, sectors))
+
+
+def square_patch_rows(
+    axes,
+    tessellation,
+    x0,
+    y0,
+    x1,
+    y1,
+    project,
+    inv_u,
+    inv_v,
+    swap_uv,
+    x_inverted,
+    y_inverted,
+    xy_swap,
+    offset_vector,
+    use_patch_skirts,
+    skirt_size,
+    skirt_binormal_sign,
+):
+    inner = tessellation.inner
+    (x0, y0, x1, y1, dx, dy) = convert_xy(x0, y0, x1, y1, x_inverted, y_inverted, xy_swap)
+    (i, j, skirt) = square_grid(inner, use_patch_skirts)
+    axes = numpy.array(tuple(axes))
+    x = 2.0 * (x0 + i * dx / inner) - 1.0
+    y = 2.0 * (y0 + j * dy / inner) - 1.0
+    (point, tangent) = project(x, y)
+    rows = numpy.empty((len(i), ROW_SIZE), dtype=numpy.float32)
+    rows[:, TEXCOORD] = make_texcoords(i / inner, j / inner, inv_u, inv_v, swap_uv)
+    vertices = point * axes
+    if use_patch_skirts:
+        reduced_axes = axes - max(dx, dy) * skirt_size
+        vertices[skirt] = point[skirt] * reduced_axes
+    if offset_vector is not None:
+        vertices -= numpy.array(tuple(offset_vector))
+    rows[:, VERTEX] = vertices
+    normal_coefs = numpy.array((axes[1] * axes[2], axes[0] * axes[2], axes[0] * axes[1]))
+    normal = normalize(point * normal_coefs)
+    tangent = normalize(tangent * axes)
+    binormal = normalize(numpy.cross(normal, tangent))
+    if skirt_binormal_sign != 1:
+        binormal[skirt] *= skirt_binormal_sign
+    rows[:, NORMAL] = normal
+    orient_tangent_space(rows, tangent, binormal, inv_u, inv_v, swap_uv)
+    return rows
+
+
+def normalized_projection(x, y):
+    point = normalize(numpy.stack((x, y, numpy.ones(len(x))), axis=1))
+    tangent = numpy.stack((1.0 + y * y, -x * y, -x), axis=1)
+    return (point, tangent)
+
+
+def squared_distance_projection(x, y):
+    x2 = x * x
+    y2 = y * y
+    xp = x * numpy.sqrt(1.0 - y2 * 0.5 - 0.5 + y2 / 3.0)
+    yp = y * numpy.sqrt(1.0 - 0.5 - x2 * 0.5 + x2 / 3.0)
+    zp = numpy.sqrt(1.0 - x2 * 0.5 - y2 * 0.5 + x2 * y2 / 3.0)
+    point = numpy.stack((xp, yp, zp), axis=1)
+    tangent = numpy.stack((numpy.ones(len(x)), x * y * (1.0 / 3.0 - 0.5), x * (y2 / 3.0 - 0.5)), axis=1)
+    return (point, tangent)
+
+
+@named_pstat("geom")
+def NormalizedSquarePatch(
+    axes,
+    tessellation,
+    x0,
+    y0,
+    x1,
+    y1,
+    inv_u=False,
+    inv_v=False,
+    swap_uv=False,
+    x_inverted=False,
+    y_inverted=False,
+    xy_swap=False,
+    has_offset=False,
+    offset=None,
+    use_patch_adaptation=True,
+    use_patch_skirts=True,
+    skirt_size=0.001,
+    skirt_uv=0.001,
+):
+    if has_offset:
+        offset_vector = (
+            NormalizedSquarePatchOffsetVector(axes, x0, y0, x1, y1, x_inverted, y_inverted, xy_swap) * offset
+        )
+    else:
+        offset_vector = None
+    rows = square_patch_rows(
+        axes,
+        tessellation,
+        x0,
+        y0,
+        x1,
+        y1,
+        normalized_projection,
+        inv_u,
+        inv_v,
+        swap_uv,
+        x_inverted,
+        y_inverted,
+        xy_swap,
+        offset_vector,
+        use_patch_skirts,
+        skirt_size,
+        # The binormal of the skirt is computed as tangent x normal
+        skirt_binormal_sign=-1,
+    )
+    return make_patch_path(rows, get_square_primitive(tessellation, use_patch_adaptation, use_patch_skirts))
+
+
+@named_pstat("geom")
+def SquaredDistanceSquarePatch(
+    axes,
+    tessellation,
+    x0,
+    y0,
+    x1,
+    y1,
+    inv_u=False,
+    inv_v=False,
+    swap_uv=False,
+    x_inverted=False,
+    y_inverted=False,
+    xy_swap=False,
+    has_offset=False,
+    offset=None,
+    use_patch_adaptation=True,
+    use_patch_skirts=True,
+    skirt_size=0.001,
+    skirt_uv=0.001,
+):
+    if offset is not None:
+        offset_vector = (
+            SquaredDistanceSquarePatchOffsetVector(axes, x0, y0, x1, y1, x_inverted, y_inverted, xy_swap) * offset
+        )
+    else:
+        offset_vector = None
+    rows = square_patch_rows(
+        axes,
+        tessellation,
+        x0,
+        y0,
+        x1,
+        y1,
+        squared_distance_projection,
+        inv_u,
+        inv_v,
+        swap_uv,
+        x_inverted,
+        y_inverted,
+        xy_swap,
+        offset_vector,
+        use_patch_skirts,
+        skirt_size,
+        skirt_binormal_sign=1,
+    )
+    return make_patch_path(rows, get_square_primitive(tessellation, use_patch_adaptation, use_patch_skirts))
+
+
+@named_pstat("geom")
+def Tile(
+    size,
+    tessellation,
+    inv_u=False,
+    inv_v=False,
+    swap_uv=False,
+    use_patch_adaptation=True,
+    use_patch_skirts=True,
+    skirt_size=0.1,
+    skirt_uv=0.1,
+):
+    # The tiles are not deformed on the CPU, the same geometry can be shared by all the tiles with the same
+    # configuration.
+    key = (
+        size,
+        tessellation.inner,
+        tuple(tessellation.ratio),
+        inv_u,
+        inv_v,
+        swap_uv,
+        use_patch_adaptation,
+        use_patch_skirts,
+        skirt_size,
+        skirt_uv,
+    )
+    geom = tile_templates.get(key)
+    if geom is None:
+        inner = tessellation.inner
+        nb_vertices = inner + 1
+        nb_points = nb_vertices * nb_vertices
+        (i, j, skirt) = square_grid(inner, use_patch_skirts)
+        x = i / inner
+        y = j / inner
+        u = x.copy()
+        v = y.copy()
+        z = numpy.zeros(len(i))
+        if use_patch_skirts:
+            u[nb_points : nb_points + nb_vertices] = -skirt_uv
+            u[nb_points + nb_vertices : nb_points + 2 * nb_vertices] = 1.0 + skirt_uv
+            v[nb_points + 2 * nb_vertices : nb_points + 3 * nb_vertices] = -skirt_uv
+            v[nb_points + 3 * nb_vertices :] = 1.0 + skirt_uv
+            z[skirt] = -skirt_size * size
+        rows = numpy.empty((len(i), ROW_SIZE), dtype=numpy.float32)
+        rows[:, VERTEX] = numpy.stack((x * size, y * size, z), axis=1)
+        rows[:, TEXCOORD] = make_texcoords(u, v, inv_u, inv_v, swap_uv)
+        rows[:, NORMAL] = (0, 0, 1.0)
+        rows[:, TANGENT] = (1, 0, 0)
+        rows[:, BINORMAL] = (0, 1, 0)
+        geom = make_geom(rows, get_square_primitive(tessellation, use_patch_adaptation, use_patch_skirts))
+        tile_templates[key] = geom
+    (path, node) = empty_node('uv')
+    node.add_geom(geom)
+    return path
@@ -40,6 +40,7 @@ class HeightmapPatch(PatchData):
     def __init__(self, parent, patch, width, height, overlap):
         PatchData.__init__(self, parent, patch, width, height, overlap)
         self.texture_peeker = None
+        self.heights = None
         self.min_height = None
         self.max_height = None
         self.mean_height = None
@@ -47,6 +48,7 @@ class HeightmapPatch(PatchData):
     def copy_from(self, parent_data):
         PatchData.copy_from(self, parent_data)
         self.texture_peeker = parent_data.texture_peeker
+        self.heights = parent_data.heights
         self.min_height = parent_data.min_height
         self.max_height = parent_data.max_height
         self.mean_height = parent_data.mean_height
@@ -72,6 +74,18 @@ class HeightmapPatch(PatchData):
         # TODO: This should be done in PatchedHeightmap.get_height()
         return height * self.parent.height_scale + self.parent.height_offset
 
+    def get_heights(self, xs, ys):
+        """
+        Vectorized version of get_height(), the heights are sampled from the texture data copied in an array.
+        """
+        if self.heights is None:
+            print("No height data", self.patch.str_id(), self.patch.instance_ready)
+            return numpy.zeros(len(xs))
+        new_xs = numpy.minimum(xs * self.texture_scale[0] + self.texture_offset[0] * self.width, self.width - 1)
+        new_ys = numpy.minimum(ys * self.texture_scale[1] + self.texture_offset[1] * self.height, self.height - 1)
+        heights = self.parent.filter.get_values(self.heights, new_xs, new_ys)
+        return heights * self.parent.height_scale + self.parent.height_offset
+
     def get_height_uv(self, u, v, shape_patch=None):
         return self.get_height(u * self.width, v * self.height, shape_patch)
 
@@ -88,6 +102,7 @@ class HeightmapPatch(PatchData):
     def clear(self, instance):
         PatchData.clear(self, instance)
         self.texture_peeker = None
+        self.heights = None
 
     def collect_shader_data(self, data):
         # Data is set as RGBA, but stored as BGRA
@@ -134,6 +149,9 @@ class HeightmapPatch(PatchData):
                 scale = 65535.0
         np_buffer = numpy.frombuffer(data, buffer_type)
         np_buffer.shape = (self.texture.getYSize(), self.texture.getXSize(), self.texture.getNumComponents())
+        # The peeker returns the red component, which is stored last in the BGR(A) RAM images
+        channel = 2 if np_buffer.shape[2] >= 3 else 0
+        self.heights = np_buffer[:, :, channel].astype(numpy.float64) / scale
         self.min_height = np_buffer.min() / scale
         self.max_height = np_buffer.max() / scale
         self.mean_height = np_buffer.mean() / scale
@@ -397,6 +415,12 @@ class StackedHeightmapPatch(HeightmapPatch):
             height += patch.get_height(x, y)
         return height
 
+    def get_heights(self, xs, ys):
+        heights = numpy.zeros(len(xs))
+        for patch in self.patches:
+            heights += patch.get_heights(xs, ys)
+        return heights
+
     def load(self):
         if self.count is not None:
             return
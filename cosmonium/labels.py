@@ -18,13 +18,23 @@
 #
 
 
+from math import floor
+from panda3d.core import LMatrix3d, LVector3, LVector3d
+import numpy
+
 from .namedobject import NamedObject
+from .pstats import levelpstat
+from . import settings
 
 
 class Labels:
     def __init__(self):
         self.labeled_objects = dict()
         self.labels = []
+        self.drawn_labels = []
+        self.selected = None
+        self.culled_pstat = levelpstat('culled', 'Labels')
+        self.drawn_pstat = levelpstat('drawn', 'Labels')
 
     def add_label(self, named_object: NamedObject):
         label = named_object.create_label()
@@ -50,14 +60,84 @@ class Labels:
         for label in self.labels:
             label.update_obs(observer)
 
+    def set_selected(self, selected):
+        self.selected = selected
+
     def check_visibility(self, frustum, pixel_size):
         for label in self.labels:
             label.check_visibility(frustum, pixel_size)
 
+    def declutter(self, camera_rot, pixel_size):
+        """
+        Project all the visible labels on the screen and hide the labels overlapping a label with a higher priority.
+        The selected body has the highest priority, then the labels are sorted by apparent magnitude.
+        """
+        candidates = []
+        positions = []
+        priorities = []
+        self.drawn_labels = []
+        for label in self.labels:
+            if not (label.shown and label.visible):
+                continue
+            if not hasattr(label, 'get_declutter_priority'):
+                self.drawn_labels.append(label)
+                continue
+            candidates.append(label)
+            positions.append(tuple(label.label_source.anchor.rel_position))
+            if label.label_source is self.selected:
+                priorities.append(float('-inf'))
+            else:
+                priorities.append(label.get_declutter_priority())
+        nb_culled = 0
+        if len(candidates) > 0:
+            # Transform all the positions in camera space at once, Panda3D uses row vectors
+            matrix = LMatrix3d()
+            camera_rot.conjugate().extract_to_matrix(matrix)
+            rotation = numpy.array([tuple(matrix.get_row(i)) for i in range(3)])
+            camera_positions = numpy.array(positions) @ rotation
+            depth = camera_positions[:, 1]
+            in_front = depth > 0
+            depth = numpy.where(in_front, depth, 1.0) * pixel_size
+            screen_x = camera_positions[:, 0] / depth
+            screen_y = camera_positions[:, 2] / depth
+            cell_size = settings.label_declutter_cell_size
+            occupied = set()
+            for index in numpy.argsort(numpy.array(priorities), kind='stable'):
+                label = candidates[index]
+                if not in_front[index]:
+                    label.visible = False
+                    nb_culled += 1
+                    continue
+                height = label.label_source.get_label_size() * settings.ui_scale
+                width = height * label.get_text_width()
+                x = screen_x[index]
+                y = screen_y[index]
+                cells = [
+                    (i, j)
+                    for i in range(int(floor(x / cell_size)), int(floor((x + width) / cell_size)) + 1)
+                    for j in range(int(floor(y / cell_size)), int(floor((y + height) / cell_size)) + 1)
+                ]
+                if occupied.isdisjoint(cells):
+                    occupied.update(cells)
+                    self.drawn_labels.append(label)
+                else:
+                    label.visible = False
+                    nb_culled += 1
+        self.culled_pstat.set_level(nb_culled)
+        self.drawn_pstat.set_level(len(self.drawn_labels))
+
     def check_and_create_instance(self, scene_manager, camera_pos, camera_rot):
         for label in self.labels:
             label.check_and_create_instance(scene_manager, camera_pos, camera_rot)
 
     def check_and_update_instance(self, scene_manager, camera_pos, camera_rot):
-        for label in self.labels:
-            label.check_and_update_instance(scene_manager, camera_pos, camera_rot)
+        if settings.label_declutter:
+            # Only the labels that survived the decluttering need to be updated, the camera vectors are shared
+            forward = LVector3(*(camera_rot.xform(LVector3d.forward())))
+            up = LVector3(*(camera_rot.xform(LVector3d.up())))
+            for label in self.drawn_labels:
+                if label.instance is not None:
+                    label.update_label_instance(scene_manager, camera_pos, camera_rot, forward, up)
+        else:
+            for label in self.labels:
+                label.check_and_update_instance(scene_manager, camera_pos, camera_rot)
@@ -0,0 +1,151 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from time import perf_counter
+
+from .pstats import levelpstat
+from . import settings
+
+
+class LodOperation:
+    SHOW = 0
+    SPLIT = 1
+    MERGE = 2
+
+    # Missing patches leave holes in the surface, they are always more urgent than refinement
+    show_priority_boost = 1e6
+
+    def __init__(self, state, kind, node):
+        self.state = state
+        self.kind = kind
+        self.patch = node.patch
+        self.key = (id(self.patch), kind)
+        if node.density > 0 and node.apparent_size is not None:
+            vertex_size = node.apparent_size / node.density
+        else:
+            vertex_size = 0.0
+        if kind == self.SHOW:
+            self.error = self.show_priority_boost + vertex_size
+        elif kind == self.SPLIT:
+            self.error = vertex_size
+        else:
+            # The smaller the patches are on screen, the more useless their children are
+            self.error = 1.0 / (1.0 + vertex_size)
+        self.priority = self.error
+
+
+class ShapeLodState:
+    def __init__(self, shape_object):
+        self.shape_object = shape_object
+        self.shape = shape_object.shape
+        self.to_show = []
+        self.update = []
+        self.touched = set()
+
+
+class LodScheduler:
+    """
+    Collects the split, merge and show candidates of all the patched shapes, ranks them by screen-space error and
+    executes them within a per-frame time budget. The candidates that could not be processed are reevaluated on the
+    next frame and their priority is increased with their age to avoid starvation.
+    Merges usually rank below the splits, a minimum number of them is done each frame regardless of the budget.
+    """
+
+    def __init__(self):
+        self.states = []
+        self.operations = []
+        self.backlog = {}
+        self.backlog_pstat = levelpstat('backlog', 'LodScheduler')
+        self.executed_pstat = levelpstat('executed', 'LodScheduler')
+        self.budget_pstat = levelpstat('budget-used', 'LodScheduler')
+
+    def add_candidates(self, shape_object, lod_result):
+        state = ShapeLodState(shape_object)
+        self.states.append(state)
+        shape = state.shape
+        # Removing a patch instance is cheap and releases resources, it is never delayed
+        for node in lod_result.to_remove:
+            shape.remove_patch_lod(node.patch)
+        for node in lod_result.to_show:
+            self.add_operation(LodOperation(state, LodOperation.SHOW, node))
+        for node in lod_result.to_split:
+            self.add_operation(LodOperation(state, LodOperation.SPLIT, node))
+        for node in lod_result.to_merge:
+            self.add_operation(LodOperation(state, LodOperation.MERGE, node))
+
+    def add_operation(self, operation):
+        age = self.backlog.get(operation.key, 0)
+        operation.age = age
+        operation.priority = operation.error * (1.0 + age)
+        self.operations.append(operation)
+
+    def is_valid(self, operation):
+        patch = operation.patch
+        touched = operation.state.touched
+        if patch in touched or patch.parent in touched:
+            return False
+        if operation.kind == LodOperation.SPLIT:
+            return len(patch.children) == 0
+        elif operation.kind == LodOperation.MERGE:
+            return patch.quadtree_node.can_merge_children() and not any(child in touched for child in patch.children)
+        else:
+            return True
+
+    def execute(self, operation):
+        state = operation.state
+        shape = state.shape
+        patch = operation.patch
+        if operation.kind == LodOperation.SHOW:
+            shape.show_patch_lod(patch, state.to_show, state.update)
+        elif operation.kind == LodOperation.SPLIT:
+            shape.split_patch_lod(patch, state.to_show, state.update)
+        elif not shape.merge_patch_lod(patch, state.to_show, state.update):
+            return False
+        state.touched.add(patch)
+        return True
+
+    def process(self):
+        start = perf_counter()
+        budget = settings.lod_scheduler_budget / 1000.0
+        self.operations.sort(key=lambda operation: operation.priority, reverse=True)
+        backlog = {}
+        executed = 0
+        merged = 0
+        for operation in self.operations:
+            if executed > 0 and perf_counter() - start > budget:
+                if operation.kind != LodOperation.MERGE or merged >= settings.lod_scheduler_min_merges:
+                    backlog[operation.key] = operation.age + 1
+                    continue
+            if self.is_valid(operation) and self.execute(operation):
+                executed += 1
+                if operation.kind == LodOperation.MERGE:
+                    merged += 1
+        for state in self.states:
+            state.shape.finish_lod(state.update)
+            state.shape_object.apply_lod_changes(state.to_show, state.update)
+        self.backlog = backlog
+        self.states = []
+        self.operations = []
+        self.backlog_pstat.set_level(len(backlog))
+        self.executed_pstat.set_level(executed)
+        self.budget_pstat.set_level((perf_counter() - start) * 1000.0)
+
+
+lod_scheduler = LodScheduler()
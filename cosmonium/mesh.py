@@ -21,8 +21,10 @@
 import builtins
 from gltf import GltfSettings
 from gltf._loader import GltfLoader
+import hashlib
 import os
 from panda3d.core import loadPrcFileData, LoaderFileTypeRegistry, Filename, get_model_path
+from panda3d.core import AsyncFuture, NodePath
 
 from .dircontext import main_dir
 from . import cache
@@ -57,3 +59,133 @@ def init_mesh_loader():
 
 def load_panda_model_sync(pattern):
     return builtins.base.loader.loadModel(pattern)
+
+
+class ModelCacheEntry:
+    def __init__(self):
+        self.model = None
+        self.radius = None
+        self.future = AsyncFuture()
+        self.users = 0
+
+
+class ModelCache:
+    """
+    Keeps one loaded copy of each model and hands out copies of it to the mesh shapes.
+    The source models are also converted to BAM files, flattened if requested, in the models cache directory. The
+    conversion is invalidated when the modification time of the source file changes.
+    """
+
+    cache_version = 1
+
+    def __init__(self):
+        self.entries = {}
+
+    def get_bam_filename(self, fullpath, flatten):
+        key = '{}:{}:{}'.format(self.cache_version, fullpath, flatten)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.bam'
+        return os.path.join(cache.create_path_for('models', 'bam'), name)
+
+    def get_source_mtime(self, fullpath, panda):
+        if panda or fullpath.lower().endswith('.bam'):
+            return None
+        try:
+            return str(os.stat(fullpath).st_mtime_ns)
+        except OSError:
+            return None
+
+    async def load_model(self, fullpath, panda):
+        if panda:
+            path = fullpath
+        else:
+            path = Filename.from_os_specific(fullpath).get_fullpath()
+        return await builtins.base.loader.loadModel(path, blocking=False, noCache=True)
+
+    async def load_bam(self, bam_filename, mtime):
+        if not os.path.exists(bam_filename):
+            return None
+        try:
+            model = await builtins.base.loader.loadModel(
+                Filename.from_os_specific(bam_filename).get_fullpath(), blocking=False, noCache=True
+            )
+        except IOError as e:
+            print("Could not load cached model", bam_filename, e)
+            return None
+        if model is None or model.get_tag('source-mtime') != mtime:
+            return None
+        return model
+
+    def save_bam(self, model, bam_filename, mtime):
+        model.set_tag('source-mtime', mtime)
+        if not model.write_bam_file(Filename.from_os_specific(bam_filename)):
+            print("Could not write cached model", bam_filename)
+
+    async def load_entry(self, entry, fullpath, flatten, panda):
+        model = None
+        try:
+            model = await self.do_load_entry(fullpath, flatten, panda)
+            if model is not None:
+                bounds = model.get_tight_bounds()
+                if bounds is not None:
+                    (lower, upper) = bounds
+                    entry.radius = max(upper - lower) / 2
+        finally:
+            # Always wake up the other shapes waiting for this model, even if the load failed
+            entry.model = model
+            entry.future.set_result(model)
+
+    async def do_load_entry(self, fullpath, flatten, panda):
+        model = None
+        bam_filename = None
+        mtime = None
+        if settings.model_disk_cache:
+            mtime = self.get_source_mtime(fullpath, panda)
+            if mtime is not None:
+                bam_filename = self.get_bam_filename(fullpath, flatten)
+                model = await self.load_bam(bam_filename, mtime)
+        if model is None:
+            print("Loading model", fullpath)
+            try:
+                model = await self.load_model(fullpath, panda)
+            except IOError as e:
+                print("Could not load model", fullpath, e)
+                model = None
+            if model is not None:
+                if flatten:
+                    model.clear_model_nodes()
+                    model.flatten_strong()
+                if bam_filename is not None:
+                    self.save_bam(model, bam_filename, mtime)
+        return model
+
+    async def get(self, fullpath, flatten, panda=False):
+        """
+        Returns a copy of the model and the radius of its bounding box, the copy shares the geometry of the cached
+        model.
+        """
+        key = (fullpath, flatten)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = ModelCacheEntry()
+            self.entries[key] = entry
+            await self.load_entry(entry, fullpath, flatten, panda)
+        elif not entry.future.done():
+            await entry.future
+        if entry.model is None:
+            if self.entries.get(key) is entry:
+                del self.entries[key]
+            return (None, None)
+        entry.users += 1
+        return (NodePath(entry.model.node().copy_subgraph()), entry.radius)
+
+    def release(self, fullpath, flatten):
+        key = (fullpath, flatten)
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry.users -= 1
+        if entry.users <= 0:
+            del self.entries[key]
+
+
+model_cache = ModelCache()
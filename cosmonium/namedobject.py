@@ -24,6 +24,9 @@ from .foundation import ObjectLabel
 
 
 class NamedObject:
+    # The attributes of the catalogue bodies are stored in slots, the __dict__ is only created for the attributes added
+    # once a body is resolved or by the subclasses
+    __slots__ = ('names', 'source_names', 'description', 'label', '__dict__')
 
     to_alphanum = re.compile('[^a-zA-Z0-9]')
 
@@ -26,6 +26,7 @@ from .stellarbody import StellarBody
 
 
 class EmissiveBody(StellarBody):
+    __slots__ = ()
     anchor_class = StellarAnchor.Emissive
     has_halo = True
     has_resolved_halo = True
@@ -27,6 +27,8 @@ from .emissive import EmissiveBody
 
 
 class Star(EmissiveBody):
+    __slots__ = ('spectral_type', 'temperature')
+
     def __init__(
         self,
         names,
@@ -47,6 +49,7 @@ class Star(EmissiveBody):
         body_class='star',
         point_color=None,
         description='',
+        linear_point_color=None,
     ):
         if spectral_type is None:
             self.spectral_type = SpectralType()
@@ -61,7 +64,7 @@ class Star(EmissiveBody):
                 self.temperature = self.spectral_type.temperature
         else:
             self.temperature = temperature
-        if point_color is None:
+        if point_color is None and linear_point_color is None:
             point_color = temp_to_RGB(self.temperature)
         if radius is None:
             if self.spectral_type.white_dwarf:
@@ -87,4 +90,5 @@ class Star(EmissiveBody):
             body_class=body_class,
             point_color=point_color,
             description=description,
+            linear_point_color=linear_point_color,
         )
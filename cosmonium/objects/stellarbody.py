@@ -29,6 +29,17 @@ from .systems import SimpleSystem
 
 
 class StellarBody(StellarObject):
+    __slots__ = (
+        'surface',
+        'clouds',
+        'atmosphere',
+        'surface_factory',
+        'surfaces',
+        'auto_surface',
+        'radius',
+        'oblateness',
+        'scale',
+    )
     has_rotation_axis = True
     has_reference_axis = True
 
@@ -49,8 +60,11 @@ class StellarBody(StellarObject):
         body_class=None,
         point_color=None,
         description='',
+        linear_point_color=None,
     ):
-        StellarObject.__init__(self, names, source_names, orbit, rotation, frame, body_class, point_color, description)
+        StellarObject.__init__(
+            self, names, source_names, orbit, rotation, frame, body_class, point_color, description, linear_point_color
+        )
         self.surface = None
         self.clouds = clouds
         self.atmosphere = atmosphere
@@ -18,9 +18,11 @@
 #
 
 
+from direct.showbase.ShowBaseGlobal import globalClock
 from panda3d.core import LColor, LVector3d
 
-from ..astro.orbits import FixedPosition
+from ..astro.ephemeriscache import ephemeris_cache
+from ..astro.orbits import FixedPosition, FunctionOrbit
 from ..bodyclass import bodyClasses
 from ..catalogs import objectsDB
 from ..components.annotations.body_label import StellarBodyLabel, FixedOrbitLabel
@@ -39,6 +41,27 @@ from .. import settings
 
 
 class StellarObject(NamedObject):
+    __slots__ = (
+        'system',
+        'body_class',
+        'anchor',
+        'scene_anchor',
+        'oid',
+        'oid_color',
+        'selected',
+        'focused',
+        'light_color',
+        'orbit_object',
+        'rotation_axis',
+        'reference_axes',
+        'resolved_halo',
+        'init_components',
+        'shown',
+        'visible',
+        'parent',
+        'lights',
+        '_components',
+    )
     context = None
     anchor_class = 0
     has_rotation_axis = False
@@ -67,13 +90,17 @@ class StellarObject(NamedObject):
         body_class=None,
         point_color=None,
         description='',
+        linear_point_color=None,
     ):
         NamedObject.__init__(self, names, source_names, description)
         self.system = None
         self.body_class = body_class
-        if point_color is None:
-            point_color = LColor(1.0, 1.0, 1.0, 1.0)
-        point_color = srgb_to_linear(point_color)
+        if linear_point_color is not None:
+            point_color = linear_point_color
+        else:
+            if point_color is None:
+                point_color = LColor(1.0, 1.0, 1.0, 1.0)
+            point_color = srgb_to_linear(point_color)
         # if not (orbit.dynamic or rotation.dynamic):
         #    self.anchor = FixedStellarAnchor(self, orbit, rotation, point_color)
         # else:
@@ -107,9 +134,16 @@ class StellarObject(NamedObject):
         self.visible = False
         self.parent = None
         self.lights = None
+        self._components = None
 
-        self.components = CompositeObject(self.get_ascii_name())
-        self.components.set_scene_anchor(self.scene_anchor)
+    @property
+    def components(self):
+        # The composite is only created when the body gets components, most of the bodies of a catalogue never do
+        if self._components is None:
+            self._components = CompositeObject(self.get_ascii_name())
+            self._components.set_scene_anchor(self.scene_anchor)
+            self._components.set_lights(self.lights)
+        return self._components
 
     def set_parent(self, parent):
         self.parent = parent
@@ -118,19 +152,26 @@ class StellarObject(NamedObject):
         if self.lights is not None:
             self.lights.remove_all()
         self.lights = lights
-        self.components.set_lights(lights)
+        if self._components is not None:
+            self._components.set_lights(lights)
 
     def create_anchor(self, anchor_class, orbit, rotation, frame, point_color):
         if rotation is None and orbit is None:
             return CartesianAnchor(anchor_class, self, frame, point_color)
         else:
+            if isinstance(orbit, FunctionOrbit) and settings.ephemeris_cache:
+                # The anchor positions are served by the ephemeris cache instead of evaluating the series each frame
+                orbit = ephemeris_cache.get_cached_orbit(orbit)
             return DynamicStellarAnchor(anchor_class, self, orbit, rotation, point_color)
 
     def is_system(self):
         return False
 
     def check_settings(self):
-        self.components.check_settings()
+        if self.init_components:
+            self.create_annotations()
+        if self._components is not None:
+            self._components.check_settings()
         if self.body_class is None:
             print("No class for", self.get_name())
             return
@@ -166,7 +207,8 @@ class StellarObject(NamedObject):
         return group
 
     def update_user_parameters(self):
-        self.components.update_user_parameters()
+        if self._components is not None:
+            self._components.update_user_parameters()
         if isinstance(self.orbit, FixedPosition) and self.system is not None:
             self.system.orbit.update_user_parameters()
             if self.system.orbit_object is not None:
@@ -200,13 +242,39 @@ class StellarObject(NamedObject):
     def get_description(self):
         return self.description
 
-    def create_components(self):
-        if self.has_rotation_axis:
+    def create_annotations(self):
+        if self.has_rotation_axis and self.rotation_axis is None and settings.show_rotation_axis:
             self.rotation_axis = RotationAxis(self)
             self.components.add_component(self.rotation_axis)
-        if self.has_reference_axis:
+        if self.has_reference_axis and self.reference_axes is None and settings.show_reference_axis:
             self.reference_axes = ReferenceAxes(self)
             self.components.add_component(self.reference_axes)
+
+    def is_expired(self, annotation, now):
+        """
+        Returns True if the annotation has been hidden for longer than the release delay.
+        """
+        if annotation.shown:
+            annotation.hidden_since = None
+            return False
+        if annotation.hidden_since is None:
+            annotation.hidden_since = now
+            return False
+        return now - annotation.hidden_since > settings.annotations_release_delay
+
+    def release_hidden_annotations(self):
+        if self.rotation_axis is None and self.reference_axes is None:
+            return
+        now = globalClock.get_frame_time()
+        if self.rotation_axis is not None and self.is_expired(self.rotation_axis, now):
+            self.components.remove_component(self.rotation_axis)
+            self.rotation_axis = None
+        if self.reference_axes is not None and self.is_expired(self.reference_axes, now):
+            self.components.remove_component(self.reference_axes)
+            self.reference_axes = None
+
+    def create_components(self):
+        self.create_annotations()
         if not settings.use_pbr and self.has_resolved_halo:
             self.resolved_halo = Halo(self)
             self.components.add_component(self.resolved_halo)
@@ -228,10 +296,30 @@ class StellarObject(NamedObject):
     def set_body_class(self, body_class):
         self.body_class = body_class
 
+    def has_dynamic_orbit(self):
+        return self.anchor.has_orbit() and self.anchor.orbit.is_dynamic()
+
     def create_orbit_object(self):
-        if self.orbit_object is None and self.anchor.has_orbit() and self.anchor.orbit.is_dynamic():
+        if self.orbit_object is None and self.has_dynamic_orbit():
             self.orbit_object = Orbit(self)
             self.orbit_object.check_settings()
+            if self.selected:
+                self.orbit_object.set_selected(True)
+
+    def update_orbit_object(self, now):
+        """
+        Creates the orbit object when the orbit must be shown and releases it once it has been hidden long enough.
+        """
+        if self.orbit_object is None:
+            if (
+                settings.show_orbits
+                and self.body_class is not None
+                and bodyClasses.get_show_orbit(self.body_class)
+                and self.has_dynamic_orbit()
+            ):
+                self.create_orbit_object()
+        elif self.is_expired(self.orbit_object, now):
+            self.remove_orbit_object()
 
     def remove_orbit_object(self):
         if self.orbit_object is not None:
@@ -275,9 +363,9 @@ class StellarObject(NamedObject):
         self.selected = selected
         if self.orbit_object:
             self.orbit_object.set_selected(selected)
-        else:
-            if self.parent:
-                self.parent.set_selected(selected)
+        elif self.parent and not (self.parent.init_components and self.has_dynamic_orbit()):
+            # The orbit object of a resolved system child is created lazily and applies the selection itself
+            self.parent.set_selected(selected)
 
     def is_emissive(self):
         return False
@@ -344,13 +432,17 @@ class StellarObject(NamedObject):
             self.check_visibility(self.context.observer.anchor.frustum, self.context.observer.anchor.pixel_size)
 
     def update_obs(self, observer):
-        self.components.update_obs(observer)
+        if self._components is not None:
+            self._components.update_obs(observer)
 
     def check_visibility(self, frustum, pixel_size):
-        self.components.check_visibility(frustum, pixel_size)
+        if self._components is not None:
+            self.release_hidden_annotations()
+            self._components.check_visibility(frustum, pixel_size)
 
     def update_lod(self, frustum, pixel_size):
-        self.components.update_lod(frustum, pixel_size)
+        if self._components is not None:
+            self._components.update_lod(frustum, pixel_size)
 
     def on_resolved(self, scene_manager):
         if not self.init_components:
@@ -364,16 +456,20 @@ class StellarObject(NamedObject):
             self.components.remove_instance()
             self.remove_components()
             self.init_components = False
+            if len(self._components.components) == 0:
+                self._components = None
 
     def check_and_create_instance(self, scene_manager, camera_pos, camera_rot):
-        self.components.check_and_create_instance(scene_manager, camera_pos, camera_rot)
+        if self._components is not None:
+            self._components.check_and_create_instance(scene_manager, camera_pos, camera_rot)
 
     def check_and_update_instance(self, scene_manager, camera_pos, camera_rot):
         StellarObject.nb_instance += 1
         if self.lights is not None:
             self.lights.update_instances(camera_pos)
         self.update_components(camera_pos)
-        self.components.check_and_update_instance(scene_manager, camera_pos, camera_rot)
+        if self._components is not None:
+            self._components.check_and_update_instance(scene_manager, camera_pos, camera_rot)
 
     def show_rotation_axis(self):
         if self.rotation_axis:
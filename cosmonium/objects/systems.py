@@ -18,6 +18,8 @@
 #
 
 
+from direct.showbase.ShowBaseGlobal import globalClock
+
 from .stellarobject import StellarObject
 
 from ..catalogs import ObjectsDB, objectsDB
@@ -164,8 +166,9 @@ class StellarSystem(StellarObject):
 
     def on_resolved(self, scene_manager):
         StellarObject.on_resolved(self, scene_manager)
+        now = globalClock.get_frame_time()
         for child in self.children:
-            child.create_orbit_object()
+            child.update_orbit_object(now)
 
     def on_point(self, scene_manager):
         StellarObject.on_point(self, scene_manager)
@@ -179,7 +182,9 @@ class StellarSystem(StellarObject):
         StellarObject.check_visibility(self, frustum, pixel_size)
         if not self.anchor.resolved:
             return
+        now = globalClock.get_frame_time()
         for child in self.children:
+            child.update_orbit_object(now)
             if child.orbit_object is not None:
                 child.orbit_object.check_visibility(frustum, pixel_size)
 
@@ -199,6 +204,9 @@ class StellarSystem(StellarObject):
 
 
 class OctreeSystem(StellarSystem):
+    # The octree of the system can be saved in and restored from a snapshot
+    octree_snapshot = True
+
     def __init__(
         self,
         names,
@@ -212,11 +220,27 @@ class OctreeSystem(StellarSystem):
         description='',
     ):
         self.radius = radius
+        self.content_version = 0
         StellarSystem.__init__(self, names, source_names, orbit, rotation, frame, body_class, point_color, description)
 
     def create_anchor(self, anchor_class, orbit, rotation, frame, point_color):
         return OctreeAnchor(self, orbit, rotation, self.radius, point_color)
 
+    def content_changed(self):
+        self.content_version += 1
+        if isinstance(self.parent, OctreeSystem):
+            self.parent.content_changed()
+
+    def add_child_fast(self, child):
+        StellarSystem.add_child_fast(self, child)
+        self.content_changed()
+
+    add_child_star_fast = add_child_fast
+
+    def remove_child_fast(self, child):
+        StellarSystem.remove_child_fast(self, child)
+        self.content_changed()
+
     def dumpOctree(self):
         self.anchor.dump_octree()
 
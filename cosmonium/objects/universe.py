@@ -46,3 +46,30 @@ class Universe(OctreeSystem):
 
     def get_fullname(self, separator='/'):
         return ''
+
+
+class UniverseCell(OctreeSystem):
+    """
+    Part of a streamed star catalogue, the cell has the same octree layout as the universe but is only traversed
+    while it is loaded.
+    """
+
+    # The cells are loaded and unloaded constantly, their snapshots would evict the one of the main catalogue
+    octree_snapshot = False
+
+    def __init__(self, name, radius):
+        OctreeSystem.__init__(
+            self,
+            [name],
+            [],
+            orbit=AbsoluteFixedPosition(absolute_reference_point=LPoint3d(), frame=AbsoluteReferenceFrame()),
+            rotation=FixedRotation(LQuaterniond(), frame=AbsoluteReferenceFrame()),
+            radius=radius,
+            description=name,
+        )
+
+    def create_anchor(self, anchor_class, orbit, rotation, frame, point_color):
+        return UniverseAnchor(self, orbit, rotation, self.radius, point_color)
+
+    def get_fullname(self, separator='/'):
+        return ''
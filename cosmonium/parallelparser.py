@@ -0,0 +1,147 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import re
+import sys
+
+from . import settings
+
+
+def init_worker(values):
+    # The settings are not inherited when the workers are spawned
+    for name, value in values.items():
+        setattr(settings, name, value)
+
+
+def split_lines(lines, chunk_size):
+    """
+    Splits a list of lines in chunks of about chunk_size characters.
+    """
+    chunks = []
+    start = 0
+    size = 0
+    for i, line in enumerate(lines):
+        size += len(line)
+        if size >= chunk_size:
+            chunks.append(lines[start : i + 1])
+            start = i + 1
+            size = 0
+    if start < len(lines):
+        chunks.append(lines[start:])
+    return chunks
+
+
+config_tokens = re.compile(r'"[^"\n]*"|#[^\n]*|[{}]')
+
+
+def split_items(data, chunk_size):
+    """
+    Splits the content of a Celestia catalogue in chunks of about chunk_size characters, the chunks are only cut
+    after the closing brace of a top level item.
+    """
+    chunks = []
+    start = 0
+    depth = 0
+    pending = False
+    for match in config_tokens.finditer(data):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                end = match.end()
+                if end - start >= chunk_size:
+                    chunks.append(data[start:end])
+                    start = end
+                    pending = False
+                else:
+                    pending = True
+    if pending or len(chunks) == 0:
+        chunks.append(data[start:])
+    else:
+        # Only comments or spaces are left
+        chunks[-1] += data[start:]
+    return chunks
+
+
+class ParallelParser:
+    """
+    Applies a parsing function on the chunks of a large catalogue file using a pool of worker processes.
+    The functions must only return plain Python or numpy data, the results are returned in the order of the chunks
+    so that the objects are created exactly like with a sequential parsing.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.nb_workers = None
+
+    def get_nb_workers(self):
+        if not settings.parallel_parsing or getattr(sys, 'frozen', False):
+            return 1
+        if settings.parallel_parsing_workers is not None:
+            return max(1, settings.parallel_parsing_workers)
+        return os.cpu_count() or 1
+
+    def use_chunks(self, size):
+        return size >= settings.parallel_parsing_min_size and self.get_nb_workers() > 1
+
+    def get_executor(self, nb_workers):
+        if self.executor is not None and self.nb_workers != nb_workers:
+            self.shutdown()
+        if self.executor is None:
+            values = {
+                name: value
+                for name, value in vars(settings).items()
+                if not name.startswith('_') and isinstance(value, (bool, int, float, str))
+            }
+            # Forking the process would duplicate the Panda3D state and the running threads, always spawn the workers
+            self.executor = ProcessPoolExecutor(
+                nb_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(values,),
+            )
+            self.nb_workers = nb_workers
+        return self.executor
+
+    def map(self, func, chunks):
+        nb_workers = self.get_nb_workers()
+        if nb_workers < 2 or len(chunks) < 2:
+            return list(map(func, chunks))
+        try:
+            return list(self.get_executor(nb_workers).map(func, chunks))
+        except (OSError, BrokenProcessPool) as e:
+            print("Parallel parsing failed, using sequential parsing:", e)
+            self.shutdown()
+            return list(map(func, chunks))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.nb_workers = None
+
+
+parallel_parser = ParallelParser()
@@ -18,9 +18,10 @@
 #
 
 
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 import builtins
 import hashlib
-import io
 import os
 import pickle
 import ruamel.yaml
@@ -140,35 +141,6 @@ class YamlModuleParser(YamlParser):
             new_context.add_path(category, os.path.join(path, category))
         return new_context
 
-    def load_from_cache(self, filename, filepath):
-        data = None
-        config_path = create_path_for('config')
-        md5 = hashlib.md5(filepath.encode()).hexdigest()
-        cache_file = os.path.join(config_path, md5 + ".dat")
-        if os.path.exists(cache_file):
-            file_timestamp = os.path.getmtime(filepath)
-            cache_timestamp = os.path.getmtime(cache_file)
-            if cache_timestamp > file_timestamp:
-                print("Loading %s (cached)" % filepath)
-                builtins.base.splash.set_text("Loading %s (cached)" % filepath)
-                try:
-                    with open(cache_file, "rb") as f:
-                        data = pickle.load(f)
-                except (IOError, ValueError) as e:
-                    print("Could not read cache for", filename, cache_file, ':', e)
-        return data
-
-    def store_to_cache(self, data, filename, filepath):
-        config_path = create_path_for('config')
-        md5 = hashlib.md5(filepath.encode()).hexdigest()
-        cache_file = os.path.join(config_path, md5 + ".dat")
-        try:
-            with open(cache_file, "wb") as f:
-                print("Caching into", cache_file)
-                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
-        except IOError as e:
-            print("Could not write cache for", filename, cache_file, ':', e)
-
     def load_and_parse(self, filename, parent=None, context=None):
         data = None
         if context is None:
@@ -177,29 +149,284 @@ class YamlModuleParser(YamlParser):
         if filepath is not None:
             saved_context = YamlModuleParser.context
             YamlModuleParser.context = self.create_new_context(context, filepath)
-            if settings.cache_yaml:
-                data = self.load_from_cache(filename, filepath)
-            if data is None:
-                print("Loading %s" % filepath)
-                builtins.base.splash.set_text("Loading %s" % filepath)
-                try:
-                    text = io.open(filepath, encoding='utf8').read()
-                    data = self.parse(text, filepath)
-                except IOError as e:
-                    print("Could not read", filename, filepath, ':', e)
-                if settings.cache_yaml and data is not None:
-                    self.store_to_cache(data, filename, filepath)
-            if data is not None:
-                if parent is not None:
-                    data = self.decode(data, parent)
+            yaml_loader.begin_load()
+            try:
+                (data, cached) = yaml_loader.get(filepath, self)
+                if cached:
+                    print("Loading %s (cached)" % filepath)
+                    builtins.base.splash.set_text("Loading %s (cached)" % filepath)
                 else:
-                    data = self.decode(data)
-            YamlModuleParser.context = saved_context
+                    print("Loading %s" % filepath)
+                    builtins.base.splash.set_text("Loading %s" % filepath)
+                if data is not None:
+                    if settings.yaml_parallel_load:
+                        yaml_loader.prefetch_includes(data, YamlModuleParser.context)
+                    if parent is not None:
+                        data = self.decode(data, parent)
+                    else:
+                        data = self.decode(data)
+            finally:
+                YamlModuleParser.context = saved_context
+                yaml_loader.end_load()
         else:
             print("Could not find", filename)
         return data
 
 
+class YamlCacheManifest:
+    """
+    Records for each configuration file its modification time, size, content hash and included files.
+    A whole configuration tree can then be validated with only stat calls, without reading the files.
+    """
+
+    version = 1
+
+    def __init__(self):
+        self.entries = {}
+        self.validated = {}
+        self.lock = Lock()
+        self.dirty = False
+        self.loaded = False
+
+    def get_manifest_file(self):
+        return os.path.join(create_path_for('config'), 'manifest.dat')
+
+    def load(self):
+        self.loaded = True
+        manifest_file = self.get_manifest_file()
+        if not os.path.exists(manifest_file):
+            return
+        try:
+            with open(manifest_file, "rb") as f:
+                (version, entries) = pickle.load(f)
+            if version == self.version:
+                self.entries = entries
+        except (IOError, ValueError, EOFError, pickle.UnpicklingError) as e:
+            print("Could not read configuration cache manifest", manifest_file, ':', e)
+
+    def save(self):
+        if not self.dirty:
+            return
+        manifest_file = self.get_manifest_file()
+        try:
+            with self.lock:
+                entries = dict(self.entries)
+            with open(manifest_file, "wb") as f:
+                pickle.dump((self.version, entries), f, pickle.HIGHEST_PROTOCOL)
+            self.dirty = False
+        except IOError as e:
+            print("Could not write configuration cache manifest", manifest_file, ':', e)
+
+    def check_entry(self, filepath):
+        entry = self.entries.get(filepath)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != entry[:2]:
+            return None
+        return entry
+
+    def validate_tree(self, filepath):
+        """
+        Validate the given file and all the files it includes, recursively.
+        """
+        if not self.loaded:
+            self.load()
+        pending = [filepath]
+        while len(pending) > 0:
+            filepath = pending.pop()
+            if filepath in self.validated:
+                continue
+            entry = self.check_entry(filepath)
+            with self.lock:
+                self.validated[filepath] = entry
+            if entry is not None:
+                pending += entry[3]
+
+    def get_hash(self, filepath):
+        if filepath in self.validated:
+            entry = self.validated[filepath]
+        else:
+            entry = self.check_entry(filepath)
+        if entry is not None:
+            return entry[2]
+        else:
+            return None
+
+    def update(self, filepath, stat, content_hash, dependencies):
+        with self.lock:
+            entry = (stat.st_mtime_ns, stat.st_size, content_hash, dependencies)
+            self.entries[filepath] = entry
+            self.validated[filepath] = entry
+            self.dirty = True
+
+    def clear_validated(self):
+        with self.lock:
+            self.validated.clear()
+
+
+class YamlLoader:
+    """
+    Loads and parses the configuration files, using a cache keyed on the content of the file and the version of
+    the parser. The files included by a configuration are read and parsed in a thread pool while the configuration
+    is decoded, the decoding itself is still done serially by the caller.
+    """
+
+    cache_version = 1
+
+    def __init__(self):
+        self.manifest = YamlCacheManifest()
+        self.config_path = None
+        self.executor = None
+        self.futures = {}
+        # Number of nested configuration files being loaded
+        self.depth = 0
+        self.lock = Lock()
+        self.parser_version = "%d-%s" % (self.cache_version, ruamel.yaml.__version__)
+
+    def get_cache_file(self, content_hash):
+        if self.config_path is None:
+            self.config_path = create_path_for('config')
+        return os.path.join(self.config_path, content_hash + ".dat")
+
+    def calc_hash(self, content):
+        digest = hashlib.sha1(self.parser_version.encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def load_from_cache(self, filepath, content_hash):
+        data = None
+        cache_file = self.get_cache_file(content_hash)
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    data = pickle.load(f)
+            except (IOError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                print("Could not read cache for", filepath, cache_file, ':', e)
+        return data
+
+    def store_to_cache(self, data, filepath, content_hash):
+        cache_file = self.get_cache_file(content_hash)
+        try:
+            with open(cache_file, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        except IOError as e:
+            print("Could not write cache for", filepath, cache_file, ':', e)
+
+    def load(self, filepath, parser, context):
+        """
+        Load and parse the given file, returns the parsed data and whether it was found in the cache.
+        This method can be called from any thread.
+        """
+        if settings.cache_yaml:
+            content_hash = self.manifest.get_hash(filepath)
+            if content_hash is not None:
+                data = self.load_from_cache(filepath, content_hash)
+                if data is not None:
+                    return (data, True)
+        try:
+            with open(filepath, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                content = f.read()
+        except IOError as e:
+            print("Could not read", filepath, ':', e)
+            return (None, False)
+        content_hash = self.calc_hash(content)
+        data = None
+        cached = False
+        if settings.cache_yaml:
+            data = self.load_from_cache(filepath, content_hash)
+            cached = data is not None
+        if data is None:
+            data = parser.parse(content.decode('utf8'), filepath)
+            if settings.cache_yaml and data is not None:
+                self.store_to_cache(data, filepath, content_hash)
+        if settings.cache_yaml and data is not None:
+            dependencies = [path for (filename, path) in self.find_includes(data, context) if path is not None]
+            self.manifest.update(filepath, stat, content_hash, dependencies)
+        return (data, cached)
+
+    def begin_load(self):
+        with self.lock:
+            self.depth += 1
+
+    def end_load(self):
+        """
+        At the end of a top-level load, drops the prefetched files that were not used and the validated manifest
+        entries, so the files are checked again by the next load.
+        """
+        with self.lock:
+            self.depth -= 1
+            if self.depth > 0:
+                return
+            futures = list(self.futures.values())
+            self.futures.clear()
+        for future in futures:
+            future.cancel()
+        self.manifest.clear_validated()
+
+    def get(self, filepath, parser):
+        with self.lock:
+            future = self.futures.pop(filepath, None)
+        if future is not None:
+            return future.result()
+        if settings.cache_yaml:
+            self.manifest.validate_tree(filepath)
+        return self.load(filepath, parser, YamlModuleParser.context)
+
+    @classmethod
+    def find_include_names(cls, data, names):
+        if isinstance(data, list):
+            for entry in data:
+                cls.find_include_names(entry, names)
+        elif isinstance(data, dict):
+            if len(data) == 1 and isinstance(data.get('include'), str):
+                names.append(data['include'])
+            elif data.get('type') == 'include' and isinstance(data.get('include'), str):
+                names.append(data['include'])
+            else:
+                for value in data.values():
+                    if isinstance(value, (list, dict)):
+                        cls.find_include_names(value, names)
+        return names
+
+    def find_includes(self, data, context):
+        return [(filename, context.find_data(filename)) for filename in self.find_include_names(data, [])]
+
+    def prefetch_includes(self, data, context):
+        for filename, filepath in self.find_includes(data, context):
+            if filepath is not None:
+                self.prefetch(filepath, context)
+
+    def prefetch(self, filepath, context):
+        if self.executor is None:
+            self.config_path = create_path_for('config')
+            self.executor = ThreadPoolExecutor(max_workers=settings.yaml_load_threads, thread_name_prefix='YamlLoader')
+        with self.lock:
+            # The prefetch tasks still running after the end of the load must not start new ones
+            if self.depth == 0 or filepath in self.futures:
+                return
+            self.futures[filepath] = self.executor.submit(self.prefetch_task, filepath, context)
+
+    def prefetch_task(self, filepath, context):
+        parser = YamlModuleParser()
+        new_context = parser.create_new_context(context, filepath)
+        (data, cached) = self.load(filepath, parser, new_context)
+        if data is not None:
+            # Independent include files are read and parsed concurrently, recursively
+            self.prefetch_includes(data, new_context)
+        return (data, cached)
+
+    def save(self):
+        self.manifest.save()
+
+
+yaml_loader = YamlLoader()
+
+
 class TypedYamlParser(YamlParser):
 
     parsers = None
@@ -51,6 +51,7 @@ except ImportError as e:
     from .pyrendering.lodresult import LodResult
     from .pyrendering.lodcontrol import LodControl, TextureLodControl, TextureOrVertexSizeLodControl  # noqa: F401
     from .pyrendering.lodcontrol import VertexSizeLodControl, VertexSizeMaxDistanceLodControl  # noqa: F401
+from .pyrendering.quadtreelod import QuadTreeLodEvaluator
 
 
 class BoundingBoxShape:
@@ -605,6 +606,7 @@ class PatchedShapeBase(Shape):
         self.patches = []
         self.linked_objects = []
         self.lod_control = lod_control
+        self.lod_evaluator = self.create_lod_evaluator()
         self.max_lod = 0
         self.culling_frustum = None
         self.frustum_node = None
@@ -647,9 +649,21 @@ class PatchedShapeBase(Shape):
 
     def set_lod_control(self, lod_control):
         self.lod_control = lod_control
+        self.lod_evaluator = self.create_lod_evaluator()
         if self.factory is not None:
             self.factory.set_lod_control(lod_control)
 
+    def create_lod_evaluator(self):
+        # The vectorized evaluator is only available with the python implementation of the quadtree
+        if (
+            settings.vectorized_lod
+            and hasattr(QuadTreeNode, 'get_lod_data')
+            and hasattr(self.lod_control, 'should_split_array')
+        ):
+            return QuadTreeLodEvaluator()
+        else:
+            return None
+
     def add_linked_object(self, linked_object):
         self.linked_objects.append(linked_object)
 
@@ -793,16 +807,19 @@ class PatchedShapeBase(Shape):
             self.frustum_node.set_light_off(True)
             # The frustum position is updated in place_patches()
 
-    @pstat
-    def update_lod(self, camera_pos, distance_to_obs, pixel_size, appearance):
+    def evaluate_lod(self, camera_pos, distance_to_obs, pixel_size, appearance):
+        """
+        Evaluate the quadtree of the shape and returns the LodResult with the patches to split, merge, show and
+        remove, or None if the lod can not be evaluated.
+        """
         if settings.debug_lod_freeze:
-            return [], []
+            return None
         if self.instance is None:
-            return [], []
+            return None
         min_radius = self.parent.body.surface.get_min_radius()
         if distance_to_obs < min_radius:
             print("Too low !")
-            return [], []
+            return None
         self.update_model_body_center_offset()
         (model_camera_pos, model_camera_vector, coord) = self.xform_cam_to_model(camera_pos)
         (tangent, binormal, normal) = self.parent.body.get_tangent_plane_under(camera_pos)
@@ -817,16 +834,15 @@ class PatchedShapeBase(Shape):
         self.to_merge = []
         self.to_show = []
         self.to_remove = []
-        process_nb = 0
         self.new_max_lod = 0
-        frame = globalClock.get_frame_count()
         if appearance is not None and appearance.texture is not None:
             self.lod_control.set_texture_size(appearance.texture.source.texture_size)
         else:
             self.lod_control.set_texture_size(0)
         lod_result = LodResult()
-        for patch in self.root_patches:
-            patch.quadtree_node.check_lod(
+        if self.lod_evaluator is not None:
+            self.lod_evaluator.check_lod(
+                [patch.quadtree_node for patch in self.root_patches],
                 lod_result,
                 self.culling_frustum,
                 LPoint2d(*coord),
@@ -836,77 +852,115 @@ class PatchedShapeBase(Shape):
                 pixel_size,
                 self.lod_control,
             )
+        else:
+            for patch in self.root_patches:
+                patch.quadtree_node.check_lod(
+                    lod_result,
+                    self.culling_frustum,
+                    LPoint2d(*coord),
+                    LPoint3d(model_camera_pos),
+                    LVector3d(model_camera_vector),
+                    altitude_to_ground,
+                    pixel_size,
+                    self.lod_control,
+                )
         lod_result.sort_by_distance()
+        self.lod_parameters = (coord, model_camera_pos, model_camera_vector, altitude_to_ground, pixel_size)
+        return lod_result
+
+    def split_patch_lod(self, patch, to_show, update):
+        frame = globalClock.get_frame_count()
+        (coord, model_camera_pos, model_camera_vector, altitude_to_ground, pixel_size) = self.lod_parameters
+        if settings.debug_lod_split_merge:
+            print(frame, "Split", patch.str_id())
+        self.split_patch(patch)
+        patch.split_neighbours(update)
+        for linked_object in self.linked_objects:
+            linked_object.split_patch(patch)
+            linked_object.remove_patch_instance(patch)
+        for child in patch.children:
+            child.quadtree_node.check_visibility(
+                self.culling_frustum, coord, model_camera_pos, model_camera_vector, altitude_to_ground, pixel_size
+            )
+            # print(child.str_id(), child.visible)
+            if self.lod_control.should_instanciate(child.quadtree_node, 0, 0):
+                to_show.append(child)
+                self.create_patch_instance(child)
+                if settings.debug_lod_split_merge:
+                    print(frame, "Show child", child.str_id(), child.instance_ready)
+                for linked_object in self.linked_objects:
+                    linked_object.create_patch_instance(child)
+        self.remove_patch_instance(patch)
+        patch.last_split = frame
+
+    def show_patch_lod(self, patch, to_show, update):
+        frame = globalClock.get_frame_count()
+        to_show.append(patch)
+        if settings.debug_lod_split_merge:
+            print(frame, "Show", patch.str_id(), patch.quadtree_node.patch_in_view, patch.instance_ready)
+        if patch.lod == 0:
+            self.add_root_patches(patch, update)
+        self.create_patch_instance(patch)
+        for linked_object in self.linked_objects:
+            linked_object.create_patch_instance(patch)
+
+    def remove_patch_lod(self, patch):
+        frame = globalClock.get_frame_count()
+        if settings.debug_lod_split_merge:
+            print(frame, "Remove", patch.str_id(), patch.quadtree_node.patch_in_view)
+        for linked_object in self.linked_objects:
+            linked_object.remove_patch_instance(patch)
+        self.remove_patch_instance(patch)
+
+    def merge_patch_lod(self, patch, to_show, update):
+        frame = globalClock.get_frame_count()
+        # Dampen high frequency split-merge anomaly
+        if frame - patch.last_split < 5:
+            return False
+        if settings.debug_lod_split_merge:
+            print(frame, "Merge", patch.str_id(), patch.quadtree_node.visible)
+        self.merge_patch(patch)
+        patch.merge_neighbours(update)
+        if patch.quadtree_node.visible:
+            if settings.debug_lod_split_merge:
+                print(frame, "Show", patch.str_id(), patch.quadtree_node.patch_in_view, patch.instance_ready)
+            to_show.append(patch)
+            self.create_patch_instance(patch)
+            for linked_object in self.linked_objects:
+                linked_object.create_patch_instance(patch)
+        for linked_object in self.linked_objects:
+            linked_object.merge_patch(patch)
+        for child in patch.children:
+            for linked_object in self.linked_objects:
+                linked_object.remove_patch_instance(child)
+            self.remove_patch_instance(child)
+        patch.remove_children()
+        return True
+
+    def finish_lod(self, update):
+        self.max_lod = self.new_max_lod
+        self.update_patch_instances(update)
+
+    @pstat
+    def update_lod(self, camera_pos, distance_to_obs, pixel_size, appearance):
+        lod_result = self.evaluate_lod(camera_pos, distance_to_obs, pixel_size, appearance)
+        if lod_result is None:
+            return [], []
         to_show = []
         update = []
+        process_nb = 0
         for node in lod_result.to_split:
-            patch = node.patch
             process_nb += 1
-            if settings.debug_lod_split_merge:
-                print(frame, "Split", patch.str_id())
-            self.split_patch(patch)
-            patch.split_neighbours(update)
-            for linked_object in self.linked_objects:
-                linked_object.split_patch(patch)
-                linked_object.remove_patch_instance(patch)
-            for child in patch.children:
-                child.quadtree_node.check_visibility(
-                    self.culling_frustum, coord, model_camera_pos, model_camera_vector, altitude_to_ground, pixel_size
-                )
-                # print(child.str_id(), child.visible)
-                if self.lod_control.should_instanciate(child.quadtree_node, 0, 0):
-                    to_show.append(child)
-                    self.create_patch_instance(child)
-                    if settings.debug_lod_split_merge:
-                        print(frame, "Show child", child.str_id(), child.instance_ready)
-                    for linked_object in self.linked_objects:
-                        linked_object.create_patch_instance(child)
-            self.remove_patch_instance(patch)
-            patch.last_split = frame
+            self.split_patch_lod(node.patch, to_show, update)
             if process_nb > 2:
                 break
         for node in lod_result.to_show:
-            patch = node.patch
-            to_show.append(patch)
-            if settings.debug_lod_split_merge:
-                print(frame, "Show", patch.str_id(), patch.quadtree_node.patch_in_view, patch.instance_ready)
-            if patch.lod == 0:
-                self.add_root_patches(patch, update)
-            self.create_patch_instance(patch)
-            for linked_object in self.linked_objects:
-                linked_object.create_patch_instance(patch)
+            self.show_patch_lod(node.patch, to_show, update)
         for node in lod_result.to_remove:
-            patch = node.patch
-            if settings.debug_lod_split_merge:
-                print(frame, "Remove", patch.str_id(), patch.quadtree_node.patch_in_view)
-            for linked_object in self.linked_objects:
-                linked_object.remove_patch_instance(patch)
-            self.remove_patch_instance(patch)
+            self.remove_patch_lod(node.patch)
         for node in lod_result.to_merge:
-            patch = node.patch
-            # Dampen high frequency split-merge anomaly
-            if frame - patch.last_split < 5:
-                continue
-            if settings.debug_lod_split_merge:
-                print(frame, "Merge", patch.str_id(), patch.quadtree_node.visible)
-            self.merge_patch(patch)
-            patch.merge_neighbours(update)
-            if patch.quadtree_node.visible:
-                if settings.debug_lod_split_merge:
-                    print(frame, "Show", patch.str_id(), patch.quadtree_node.patch_in_view, patch.instance_ready)
-                to_show.append(patch)
-                self.create_patch_instance(patch)
-                for linked_object in self.linked_objects:
-                    linked_object.create_patch_instance(patch)
-            for linked_object in self.linked_objects:
-                linked_object.merge_patch(patch)
-            for child in patch.children:
-                for linked_object in self.linked_objects:
-                    linked_object.remove_patch_instance(child)
-                self.remove_patch_instance(child)
-            patch.remove_children()
-        self.max_lod = self.new_max_lod
-        self.update_patch_instances(update)
+            self.merge_patch_lod(node.patch, to_show, update)
+        self.finish_lod(update)
         # Return True when new instances have been created
         return to_show, update
 
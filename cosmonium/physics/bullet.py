@@ -19,30 +19,160 @@
 
 
 import builtins
+from direct.task.TaskManagerGlobal import taskMgr
 from panda3d.bullet import BulletWorld, BulletDebugNode, BulletRigidBodyNode
-from panda3d.bullet import BulletTriangleMesh, BulletTriangleMeshShape, BulletCapsuleShape
+from panda3d.bullet import BulletTriangleMesh, BulletTriangleMeshShape, BulletCapsuleShape, BulletHeightfieldShape
 from panda3d.bullet import ZUp, BulletCharacterControllerNode
 from panda3d.core import LQuaterniond, LVector3d, NodePath, LVector3, BitMask32
 
+from ..pstats import levelpstat
+from ..workers import AsyncLoader
 from .base import PhysicsBase
 
 
+class HeightfieldEntry:
+    def __init__(self, name, texture, max_height, position, scale, bounds):
+        self.name = name
+        self.texture = texture
+        self.max_height = max_height
+        self.position = position
+        self.scale = scale
+        self.bounds = bounds
+        self.instance = None
+        self.pending = False
+        self.removed = False
+
+    def distance_to(self, position):
+        (x_min, y_min, x_max, y_max) = self.bounds
+        dx = max(x_min - position[0], 0.0, position[0] - x_max)
+        dy = max(y_min - position[1], 0.0, position[1] - y_max)
+        return (dx * dx + dy * dy) ** 0.5
+
+
+class BulletHeightfieldManager(AsyncLoader):
+    """
+    Manages the heightfield colliders of the terrain patches.
+    Only the patches within the given radius of a physics entity get a collider, the Bullet shapes are built in a
+    worker thread from the heightmap of the patch and the rigid body nodes are recycled through a pool.
+    The collider of the patch under an entity is built synchronously so that the entity never falls through it.
+    """
+
+    # Colliders are released only when the entities are further than radius * release_factor to avoid churn
+    release_factor = 1.25
+
+    def __init__(self, physics, radius, max_pool_size):
+        AsyncLoader.__init__(self, builtins.base, 'HeightfieldLoader')
+        self.physics = physics
+        self.radius = radius
+        self.max_pool_size = max_pool_size
+        self.entries = {}
+        self.pool = []
+        self.nb_live = 0
+        self.live_pstat = levelpstat('live', 'Heightfields')
+        self.pooled_pstat = levelpstat('pooled', 'Heightfields')
+        self.pending_pstat = levelpstat('pending', 'Heightfields')
+
+    def add_patch(self, key, name, texture, max_height, position, scale, bounds):
+        self.remove_patch(key)
+        self.entries[key] = HeightfieldEntry(name, texture, max_height, position, scale, bounds)
+
+    def remove_patch(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        entry.removed = True
+        self.release_collider(entry)
+
+    def update(self, positions):
+        nb_pending = 0
+        for entry in self.entries.values():
+            if len(positions) > 0:
+                distance = min(entry.distance_to(position) for position in positions)
+            else:
+                distance = float('inf')
+            if entry.instance is None and distance == 0.0:
+                # The collider must exist before the next physics step, the pending job result will be discarded
+                self.attach_collider(entry, self.build_shape(entry.texture, entry.max_height))
+            elif entry.instance is None and not entry.pending and distance <= self.radius:
+                entry.pending = True
+                taskMgr.add(self.create_collider(entry))
+            elif entry.instance is not None and distance > self.radius * self.release_factor:
+                self.release_collider(entry)
+            if entry.pending:
+                nb_pending += 1
+        self.live_pstat.set_level(self.nb_live)
+        self.pooled_pstat.set_level(len(self.pool))
+        self.pending_pstat.set_level(nb_pending)
+
+    def build_shape(self, texture, max_height):
+        shape = BulletHeightfieldShape(texture, max_height, ZUp)
+        shape.setUseDiamondSubdivision(True)
+        return shape
+
+    async def create_collider(self, entry):
+        shape = await self.add_job(self.build_shape, [entry.texture, entry.max_height])
+        entry.pending = False
+        if entry.removed or entry.instance is not None or self.physics.physics_world is None:
+            return
+        self.attach_collider(entry, shape)
+
+    def attach_collider(self, entry, shape):
+        if len(self.pool) > 0:
+            instance = self.pool.pop()
+            instance.node().set_name(entry.name)
+        else:
+            instance = NodePath(BulletRigidBodyNode(entry.name))
+        instance.node().add_shape(shape)
+        instance.set_pos(entry.position)
+        instance.set_scale(entry.scale)
+        instance.set_collide_mask(BitMask32.all_on())
+        self.physics.physics_world.attach_rigid_body(instance.node())
+        instance.reparent_to(self.physics.render_world)
+        entry.instance = instance
+        self.nb_live += 1
+
+    def release_collider(self, entry):
+        if entry.instance is None:
+            return
+        instance = entry.instance
+        entry.instance = None
+        self.nb_live -= 1
+        if self.physics.physics_world is not None:
+            self.physics.physics_world.remove_rigid_body(instance.node())
+        instance.detach_node()
+        node = instance.node()
+        for shape in node.get_shapes():
+            node.remove_shape(shape)
+        if len(self.pool) < self.max_pool_size:
+            self.pool.append(instance)
+
+    def release_all(self):
+        # The patches stay registered, their colliders are recreated when the physics is enabled again
+        for entry in self.entries.values():
+            self.release_collider(entry)
+
+
 class BulletPhysics(PhysicsBase):
 
     collision = True
     physics = True
     support_heightmap = True
 
-    def __init__(self, enable_debug):
+    def __init__(self, enable_debug, heightfield_radius=1000.0, heightfield_pool_size=64):
         self.enable_debug = enable_debug
+        self.heightfield_radius = heightfield_radius
+        self.heightfield_pool_size = heightfield_pool_size
         self.physics_world = None
         self.render_world = None
         self.debug = None
         self.gravity = 9.81
+        self.heightfields = None
+        self.entities = []
 
     def enable(self):
         self.physics_world = BulletWorld()
         self.render_world = NodePath('physics-root')
+        self.get_heightfields()
         if self.enable_debug:
             self.debug = builtins.base.render.attach_new_node(BulletDebugNode('Debug'))
             self.debug.show()
@@ -53,10 +183,19 @@ class BulletPhysics(PhysicsBase):
         self.gravity = self.gravity
         self.physics_world.set_gravity(*LVector3d(0, 0, -gravity))
 
+    def get_heightfields(self):
+        if self.heightfields is None:
+            self.heightfields = BulletHeightfieldManager(self, self.heightfield_radius, self.heightfield_pool_size)
+        return self.heightfields
+
     def disable(self):
+        if self.heightfields is not None:
+            self.heightfields.release_all()
+        self.entities = []
         self.physics_world = None
-        self.render_world.remove_node()
-        self.render_world = None
+        if self.render_world is not None:
+            self.render_world.remove_node()
+            self.render_world = None
         if self.debug is not None:
             self.debug.remove_node()
             self.debug = None
@@ -65,6 +204,16 @@ class BulletPhysics(PhysicsBase):
         physics_instance.set_collide_mask(BitMask32.all_on())
         self.physics_world.attach_rigid_body(physics_instance.node())
         physics_instance.reparent_to(self.render_world)
+        if physics_instance.node().get_mass() > 0:
+            self.entities.append(physics_instance)
+
+    def add_heightfield(self, key, name, texture, max_height, position, scale, bounds):
+        # The patches can be registered while the physics is disabled, the manager is then created on demand
+        self.get_heightfields().add_patch(key, name, texture, max_height, position, scale, bounds)
+
+    def remove_heightfield(self, key):
+        if self.heightfields is not None:
+            self.heightfields.remove_patch(key)
 
     def add_objects(self, entity, physics_instances):
         for physics_instance in physics_instances:
@@ -81,17 +230,23 @@ class BulletPhysics(PhysicsBase):
         physics_instance.set_collide_mask(BitMask32.all_on())
         physics_instance.set_transform(instance.get_transform())
         physics_instance.set_pos(entity.anchor.get_local_position())
+        self.entities.append(physics_instance)
         return physics_instance
 
     def remove_object(self, entity, physics_instance):
         self.physics_world.remove_rigid_body(physics_instance.node())
+        if physics_instance in self.entities:
+            self.entities.remove(physics_instance)
 
     def remove_controller(self, entity, physics_instance):
         self.physics_world.remove_character(physics_instance.node())
+        if physics_instance in self.entities:
+            self.entities.remove(physics_instance)
 
     def update(self, time, dt):
         if self.physics_world is None:
             return
+        self.heightfields.update([entity.get_pos() for entity in self.entities])
         self.physics_world.do_physics(dt)
 
     def ls(self):
@@ -18,13 +18,12 @@
 #
 
 
-from array import array
 from direct.task.TaskManagerGlobal import taskMgr
-from itertools import chain
+from math import ceil
 from panda3d.core import OmniBoundingVolume
 from panda3d.core import PTAVecBase4f
 from panda3d.core import Texture, GeomEnums
-from random import random, uniform
+import numpy
 
 from ..shaders.instancing import OffsetScaleInstanceControl
 from ..datasource import DataSource
@@ -91,14 +90,7 @@ class TerrainPopulatorBase(VisibleObject):
         nb_of_instances = self.calc_nb_of_instances(patch)
         if self.max_instances is not None:
             nb_of_instances = min(nb_of_instances, self.max_instances)
-        count = 0
-        offsets = []
-        while count < nb_of_instances:
-            offset = self.placer.place_new(self.terrain, count, patch)
-            if offset is not None:
-                offsets.append(offset)
-            count += 1
-        return offsets
+        return self.placer.place_batch(self.terrain, int(ceil(nb_of_instances)), patch)
 
     async def create_object_template(self, scene_anchor):
         if self.object_template.instance is None:
@@ -193,30 +185,16 @@ class PatchedTerrainPopulatorBase(TerrainPopulatorBase):
         patch = self.patch_map[terrain_patch]
         if patch.data is None:
             self.create_data_for(patch, terrain_patch)
-        bl = []
-        br = []
-        tr = []
-        tl = []
         # TODO: Terrain scale should be retrieved properly...
         size = self.terrain.size
-        for data in patch.data:
-            (x, y, height, scale) = data
-            (u, v) = terrain_patch.coord_to_uv((x / size, y / size))
-            if u < 0.5:
-                if v < 0.5:
-                    bl.append(data)
-                else:
-                    tl.append(data)
-            else:
-                if v < 0.5:
-                    br.append(data)
-                else:
-                    tr.append(data)
-        # print(len(bl), len(br), len(tr), len(tl))
-        self.patch_map[terrain_patch.children[0]] = TerrainPopulatorPatch(bl)
-        self.patch_map[terrain_patch.children[1]] = TerrainPopulatorPatch(br)
-        self.patch_map[terrain_patch.children[2]] = TerrainPopulatorPatch(tr)
-        self.patch_map[terrain_patch.children[3]] = TerrainPopulatorPatch(tl)
+        data = patch.data
+        (u, v) = terrain_patch.coord_to_uv((data[:, 0] / size, data[:, 1] / size))
+        left = u < 0.5
+        bottom = v < 0.5
+        self.patch_map[terrain_patch.children[0]] = TerrainPopulatorPatch(data[left & bottom])
+        self.patch_map[terrain_patch.children[1]] = TerrainPopulatorPatch(data[~left & bottom])
+        self.patch_map[terrain_patch.children[2]] = TerrainPopulatorPatch(data[~left & ~bottom])
+        self.patch_map[terrain_patch.children[3]] = TerrainPopulatorPatch(data[left & ~bottom])
 
     def merge_patch(self, terrain_patch):
         if terrain_patch not in self.patch_map:
@@ -275,7 +253,7 @@ class CpuTerrainPopulator(PatchedTerrainPopulatorBase):
 
     def create_object_instances(self, scene_anchor, patch, terrain_patch):
         instances = []
-        for i, offset in enumerate(patch.data):
+        for i, offset in enumerate(patch.data.tolist()):
             (x, y, height, scale) = offset
             child = scene_anchor.unshifted_instance.attach_new_node('instance_%d' % i)
             self.object_template.instance.instance_to(child)
@@ -302,11 +280,92 @@ class OffsetsDataSource(DataSource):
         instance.set_shader_input('instances_offset', self.offsets)
 
 
+class InstancesTable:
+    """
+    Packed table of the offset and scale of the instances of the visible patches.
+    Each patch owns a contiguous block of rows, when a patch is added or removed only the modified rows are copied
+    into the buffer texture image.
+    """
+
+    row_size = 4 * 4
+
+    def __init__(self, capacity):
+        self.capacity = max(capacity, 1)
+        self.data = numpy.zeros((self.capacity, 4), dtype=numpy.float32)
+        self.blocks = {}
+        self.size = 0
+        self.dirty_start = None
+        self.dirty_end = None
+        self.texture = None
+
+    def mark_dirty(self, start, end):
+        if self.dirty_start is None:
+            self.dirty_start = start
+            self.dirty_end = end
+        else:
+            self.dirty_start = min(self.dirty_start, start)
+            self.dirty_end = max(self.dirty_end, end)
+
+    def grow(self, min_capacity):
+        capacity = max(min_capacity, self.capacity * 2)
+        data = numpy.zeros((capacity, 4), dtype=numpy.float32)
+        data[: self.size] = self.data[: self.size]
+        self.data = data
+        self.capacity = capacity
+        # The buffer texture must be recreated with the new size
+        self.texture = None
+
+    def add(self, key, rows):
+        if key in self.blocks:
+            self.remove(key)
+        count = len(rows)
+        if self.size + count > self.capacity:
+            self.grow(self.size + count)
+        start = self.size
+        self.data[start : start + count] = rows
+        self.blocks[key] = (start, count)
+        self.size += count
+        self.mark_dirty(start, self.size)
+
+    def remove(self, key):
+        block = self.blocks.pop(key, None)
+        if block is None:
+            return
+        (start, count) = block
+        # Move down the following blocks to keep the table packed
+        self.data[start : self.size - count] = self.data[start + count : self.size]
+        for other, (other_start, other_count) in self.blocks.items():
+            if other_start > start:
+                self.blocks[other] = (other_start - count, other_count)
+        self.size -= count
+        self.mark_dirty(start, self.size)
+
+    def get_texture(self):
+        if self.texture is None:
+            self.texture = Texture()
+            self.texture.setup_buffer_texture(self.capacity, Texture.T_float, Texture.F_rgba32, GeomEnums.UH_static)
+            self.texture.set_ram_image(self.data.tobytes())
+        elif self.dirty_start is not None and self.dirty_end > self.dirty_start:
+            buffer = memoryview(self.texture.modify_ram_image())
+            start = self.dirty_start * self.row_size
+            end = self.dirty_end * self.row_size
+            buffer[start:end] = self.data[self.dirty_start : self.dirty_end].tobytes()
+        self.dirty_start = None
+        self.dirty_end = None
+        return self.texture
+
+    def get_array(self):
+        offsets = PTAVecBase4f.empty_array(self.size)
+        memoryview(offsets).cast('B')[:] = self.data[: self.size].tobytes()
+        return offsets
+
+
 class GpuTerrainPopulator(PatchedTerrainPopulatorBase):
     def __init__(self, object_template, count, max_instances, placer, min_lod=0):
         PatchedTerrainPopulatorBase.__init__(self, object_template, count, placer, min_lod)
         self.max_instances = max_instances
         self.object_template.shader.set_instance_control(OffsetScaleInstanceControl(self.max_instances))
+        self.table = InstancesTable(self.max_instances)
         self.rebuild = False
 
     def configure_object_template(self):
@@ -317,34 +376,22 @@ class GpuTerrainPopulator(PatchedTerrainPopulatorBase):
         self.generate_table()
 
     def create_object_instances(self, scene_anchor, patch, terrain_patch):
+        self.table.add(terrain_patch, patch.data)
         self.rebuild = True
 
     def remove_object_instances(self, scene_anchor, patch, terrain_patch):
+        self.table.remove(terrain_patch)
         self.rebuild = True
 
     def generate_table(self):
-        data = []
-        for patch in self.visible_patches.values():
-            data += patch.data
-        offsets_nb = len(data)
+        offsets_nb = self.table.size
         if settings.debug_lod_split_merge:
             print("Populator regenerate", offsets_nb)
+        data_source = self.object_template.get_source('offsets')
         if settings.instancing_use_tex:
-            offsets = data
+            data_source.set_offsets(self.table.get_texture())
         else:
-            offsets = PTAVecBase4f.emptyArray(offsets_nb)
-            for offset in data:
-                offsets[offsets_nb] = offset
-        if settings.instancing_use_tex:
-            texture = Texture()
-            texture.setup_buffer_texture(len(offsets), Texture.T_float, Texture.F_rgba32, GeomEnums.UH_static)
-            flattened_data = list(chain.from_iterable(offsets))
-            data = array("f", flattened_data)
-            texture.set_ram_image(data.tobytes())
-            data_source = self.object_template.get_source('offsets')
-            data_source.set_offsets(texture)
-        else:
-            data_source.set_offsets(offsets)
+            data_source.set_offsets(self.table.get_array())
         self.object_template.instance.set_instance_count(offsets_nb)
         self.object_template.update_shader()
         self.rebuild = False
@@ -371,24 +418,48 @@ class ObjectPlacer(object):
     def place_new(self, count):
         return None
 
+    def place_batch(self, terrain, count, patch=None):
+        offsets = (self.place_new(terrain, i, patch) for i in range(count))
+        offsets = [offset for offset in offsets if offset is not None]
+        return numpy.array(offsets, dtype=numpy.float32).reshape(-1, 4)
+
 
 class RandomObjectPlacer(ObjectPlacer):
+    def __init__(self):
+        ObjectPlacer.__init__(self)
+        self.rng = numpy.random.default_rng()
+
+    def place_batch(self, terrain, count, patch=None):
+        if patch is not None:
+            u = self.rng.random(count)
+            v = self.rng.random(count)
+            heights = terrain.get_heights_patch(patch, u, v)
+            x, y = patch.get_xy_for(u, v)
+            x = x * terrain.size
+            y = y * terrain.size
+        else:
+            x = self.rng.uniform(-terrain.size, terrain.size, count)
+            y = self.rng.uniform(-terrain.size, terrain.size, count)
+            heights = numpy.array([terrain.get_height(position) for position in zip(x, y)])
+        scales = self.rng.uniform(0.1, 0.5, count)
+        return numpy.stack((x, y, heights, scales), axis=1).astype(numpy.float32)
+
     def place_new(self, terrain, count, patch=None):
         if patch is not None:
-            u = random()
-            v = random()
+            u = self.rng.random()
+            v = self.rng.random()
             height = terrain.get_height_patch(patch, u, v)
             x, y = patch.get_xy_for(u, v)
             x *= terrain.size
             y *= terrain.size
         else:
-            x = uniform(-terrain.size, terrain.size)
-            y = uniform(-terrain.size, terrain.size)
+            x = self.rng.uniform(-terrain.size, terrain.size)
+            y = self.rng.uniform(-terrain.size, terrain.size)
             height = terrain.get_height((x, y))
         # TODO: Should not have such explicit dependency
         # TODO: Disabled for now
         if True or height > terrain.water.level:
-            scale = uniform(0.1, 0.5)
+            scale = self.rng.uniform(0.1, 0.5)
             return (x, y, height, scale)
         else:
             return None
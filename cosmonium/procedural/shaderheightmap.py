@@ -98,8 +98,8 @@ class ShaderHeightmap(TextureHeightmapBase):
             self.shader.scale = scale
         self.reset()
 
-    def apply(self, shape):
-        shape.instance.set_shader_input("heightmap_%s" % self.name, self.texture)
+    def apply(self, shape, instance):
+        instance.set_shader_input("heightmap_%s" % self.name, self.texture)
 
     async def load(self, tasks_tree, patch):
         result = await self.do_load(patch)
@@ -18,6 +18,9 @@
 #
 
 
+import numpy
+
+
 class LodControl(object):
     def __init__(self, density=32, max_lod=100):
         self.density = density
@@ -44,6 +47,21 @@ class LodControl(object):
     def should_remove(self, patch, apparent_patch_size, distance):
         return not patch.visible
 
+    # Vectorized versions of the predicates, used by QuadTreeLodEvaluator.
+    # The patches are given as arrays of lod, density, visibility and leaf flags.
+
+    def should_split_array(self, lods, densities, apparent_patch_sizes, distances):
+        return numpy.zeros(len(lods), dtype=bool)
+
+    def should_merge_array(self, lods, densities, apparent_patch_sizes, distances):
+        return numpy.zeros(len(lods), dtype=bool)
+
+    def should_instanciate_array(self, visibles, leaves, apparent_patch_sizes, distances):
+        return visibles & leaves
+
+    def should_remove_array(self, visibles, leaves, apparent_patch_sizes, distances):
+        return ~visibles
+
 
 # The lod control classes uses hysteresis to avoid cycle of split/merge due to
 # precision errors.
@@ -81,6 +99,15 @@ class TextureLodControl(LodControl):
     def should_merge(self, patch, apparent_patch_size, distance):
         return apparent_patch_size < self.texture_size / 1.1
 
+    def should_split_array(self, lods, densities, apparent_patch_sizes, distances):
+        if self.texture_size > 0:
+            return (lods < self.max_lod) & (apparent_patch_sizes > self.texture_size * 1.1)
+        else:
+            return numpy.zeros(len(lods), dtype=bool)
+
+    def should_merge_array(self, lods, densities, apparent_patch_sizes, distances):
+        return apparent_patch_sizes < self.texture_size / 1.1
+
 
 class TextureOrVertexSizeLodControl(TextureLodControl):
     def __init__(self, max_vertex_size, min_density, density, max_lod=100):
@@ -104,6 +131,19 @@ class TextureOrVertexSizeLodControl(TextureLodControl):
             apparent_vertex_size = apparent_patch_size / patch.density
             return apparent_vertex_size < self.max_vertex_size / 1.1
 
+    def should_split_array(self, lods, densities, apparent_patch_sizes, distances):
+        if self.texture_size > 0:
+            split = apparent_patch_sizes > self.texture_size * 1.1
+        else:
+            split = apparent_patch_sizes / densities > self.max_vertex_size
+        return (lods < self.max_lod) & split
+
+    def should_merge_array(self, lods, densities, apparent_patch_sizes, distances):
+        if self.texture_size > 0:
+            return apparent_patch_sizes < self.texture_size / 1.1
+        else:
+            return apparent_patch_sizes / densities < self.max_vertex_size / 1.1
+
 
 class VertexSizeLodControl(LodControl):
     def __init__(self, max_vertex_size, density, max_lod=100):
@@ -121,6 +161,12 @@ class VertexSizeLodControl(LodControl):
         apparent_vertex_size = apparent_patch_size / patch.density
         return apparent_vertex_size < self.max_vertex_size / 1.1
 
+    def should_split_array(self, lods, densities, apparent_patch_sizes, distances):
+        return (lods < self.max_lod) & (apparent_patch_sizes / densities > self.max_vertex_size * 1.1)
+
+    def should_merge_array(self, lods, densities, apparent_patch_sizes, distances):
+        return apparent_patch_sizes / densities < self.max_vertex_size / 1.1
+
 
 class VertexSizeMaxDistanceLodControl(VertexSizeLodControl):
     def __init__(self, max_distance, max_vertex_size, density, max_lod=100):
@@ -132,3 +178,6 @@ class VertexSizeMaxDistanceLodControl(VertexSizeLodControl):
 
     def should_remove(self, patch, apparent_patch_size, distance):
         return not patch.visible
+
+    def should_instanciate_array(self, visibles, leaves, apparent_patch_sizes, distances):
+        return visibles & (distances < self.max_distance)
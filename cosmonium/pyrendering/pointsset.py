@@ -21,9 +21,12 @@
 from panda3d.core import GeomVertexArrayFormat, InternalName, GeomVertexFormat, GeomVertexData, GeomVertexWriter
 from panda3d.core import GeomPoints, Geom, GeomNode
 from panda3d.core import NodePath, LPoint3, LColor
+from itertools import compress
+import numpy
 
-from ..astro.astro import radiance_to_mag
-from ..utils import mag_to_scale
+from ..astro.astro import radiance_to_mag, radiance_to_mag_array
+from ..scene.pyscene.sceneanchor import scene_anchor_batch
+from ..utils import mag_to_scale, mag_to_scale_array, vectors_to_array
 from .. import settings
 
 
@@ -91,7 +94,39 @@ class PointsSetShape:
     def add_object(self, scene_anchor):
         raise NotImplementedError()
 
+    def calc_points(self, scene_anchors):
+        """
+        Returns the mask of the anchors to add to the points set and the colors and sizes of the selected points.
+        """
+        return None
+
+    def add_points_array(self, positions, colors, sizes, oids):
+        count = len(positions)
+        columns = [positions, colors]
+        if self.has_size:
+            columns.append(sizes[:, numpy.newaxis])
+        if self.has_oid:
+            columns.append(oids)
+        rows = numpy.concatenate(columns, axis=1).astype(numpy.float32)
+        self.vdata.unclean_set_num_rows(count)
+        memoryview(self.vdata.modify_array(0)).cast('B')[:] = rows.tobytes()
+        if count > 0:
+            self.geom_points.add_consecutive_vertices(0, count)
+        self.index = count
+
     def add_objects(self, scene_manager, scene_anchors):
+        positions = scene_anchor_batch.get_positions(scene_anchors)
+        if positions is not None:
+            points = self.calc_points(scene_anchors)
+            if points is not None:
+                selected, colors, sizes = points
+                if self.has_oid:
+                    selected_scene_anchors = compress(scene_anchors, selected.tolist())
+                    oids = vectors_to_array([scene_anchor.oid_color for scene_anchor in selected_scene_anchors], 4)
+                else:
+                    oids = None
+                self.add_points_array(positions[selected], colors, sizes, oids)
+                return
         self.vdata.set_num_rows(len(scene_anchors))
         self.geom_points.reserve_num_vertices(len(scene_anchors))
         self.create_writers()
@@ -114,6 +149,22 @@ class ScaledEmissivePointsSetShape(PointsSetShape):
                 )
                 self.add_point(scene_anchor.scene_position, color, size, scene_anchor.oid_color)
 
+    def calc_points(self, scene_anchors):
+        anchors = [scene_anchor.anchor for scene_anchor in scene_anchors]
+        has_instance = numpy.array([scene_anchor.instance is not None for scene_anchor in scene_anchors], dtype=bool)
+        visible_sizes = numpy.array([anchor.visible_size for anchor in anchors])
+        radiances = numpy.array([anchor._point_radiance for anchor in anchors])
+        scales = mag_to_scale_array(radiance_to_mag_array(radiances))
+        selected = (visible_sizes < settings.min_body_size * 2) & has_instance & (scales > 0)
+        scales = scales[selected]
+        selected_anchors = compress(anchors, selected.tolist())
+        colors = vectors_to_array([anchor.point_color for anchor in selected_anchors], 4) * scales[:, numpy.newaxis]
+        sizes = (
+            numpy.maximum(settings.min_point_size, settings.min_point_size + scales * settings.mag_pixel_scale)
+            * self.screen_scale
+        )
+        return selected, colors, sizes
+
 
 class EmissivePointsSetShape(PointsSetShape):
     def add_object(self, scene_anchor):
@@ -126,6 +177,19 @@ class EmissivePointsSetShape(PointsSetShape):
             size = settings.min_point_size + settings.mag_pixel_scale
             self.add_point(scene_anchor.scene_position, color, size * self.screen_scale, scene_anchor.oid_color)
 
+    def calc_points(self, scene_anchors):
+        anchors = [scene_anchor.anchor for scene_anchor in scene_anchors]
+        has_instance = numpy.array([scene_anchor.instance is not None for scene_anchor in scene_anchors], dtype=bool)
+        visible_sizes = numpy.array([anchor.visible_size for anchor in anchors])
+        selected = (visible_sizes < settings.min_body_size * 2) & has_instance
+        selected_anchors = list(compress(anchors, selected.tolist()))
+        radiances = numpy.array([anchor.get_point_radiance(anchor.distance_to_obs) for anchor in selected_anchors])
+        colors = vectors_to_array([anchor.point_color for anchor in selected_anchors], 4)
+        colors[:, :3] *= radiances.reshape(-1, 1)
+        size = settings.min_point_size + settings.mag_pixel_scale
+        sizes = numpy.full(len(selected_anchors), size * self.screen_scale)
+        return selected, colors, sizes
+
 
 class HaloPointsSetShape(PointsSetShape):
     def add_object(self, scene_anchor):
@@ -144,6 +208,20 @@ class HaloPointsSetShape(PointsSetShape):
                 LPoint3(*scene_anchor.scene_position), point_color, size * self.screen_scale, scene_anchor.oid_color
             )
 
+    def calc_points(self, scene_anchors):
+        anchors = [scene_anchor.anchor for scene_anchor in scene_anchors]
+        visible_sizes = numpy.array([anchor.visible_size for anchor in anchors])
+        app_magnitudes = radiance_to_mag_array(numpy.array([anchor._point_radiance for anchor in anchors]))
+        selected = (visible_sizes < settings.min_body_size * 2) & (app_magnitudes < settings.smallest_glare_mag)
+        if not settings.show_halo:
+            selected[:] = False
+        selected_anchors = compress(anchors, selected.tolist())
+        colors = vectors_to_array([anchor.point_color for anchor in selected_anchors], 4)
+        coefs = settings.smallest_glare_mag - app_magnitudes[selected] + 6.0
+        radii = numpy.maximum(1.0, visible_sizes[selected])
+        sizes = radii * coefs * 4.0 * self.screen_scale
+        return selected, colors, sizes
+
 
 class PassthroughPointsSetShape:
     def __init__(self, shape):
@@ -41,6 +41,26 @@ class QuadTreeNode:
         self.instance_ready = False
         self.apparent_size = None
         self.patch_in_view = False
+        self.lod_data = None
+
+    def get_lod_data(self):
+        """
+        Returns the static data of the node used by the vectorized lod evaluator.
+        """
+        if self.lod_data is None:
+            bb_min = self.bounds.get_min()
+            bb_max = self.bounds.get_max()
+            self.lod_data = (
+                *self.centre,
+                self.length,
+                *bb_min,
+                *bb_max,
+                *self.offset_vector,
+                self.offset if self.offset is not None else 0.0,
+                self.lod,
+                self.density,
+            )
+        return self.lod_data + (len(self.children),)
 
     def set_shown(self, shown):
         self.shown = shown
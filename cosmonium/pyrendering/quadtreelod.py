@@ -0,0 +1,154 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import numpy
+
+from ..pstats import pstat
+
+
+class QuadTreeLodEvaluator:
+    """
+    Vectorized equivalent of QuadTreeNode.check_lod().
+    The quadtrees are flattened in depth-first order into arrays holding the patch bounds, centres, offsets and
+    flags; visibility, apparent size and the split, merge, show and remove decisions are then computed for all the
+    nodes at once. The nodes are added to the LodResult in the same order as the recursive version.
+    """
+
+    def __init__(self):
+        self.nodes = []
+
+    def flatten(self, root_nodes):
+        nodes = []
+        parents = []
+        depths = []
+        stack = [(node, -1, 0) for node in reversed(root_nodes)]
+        while len(stack) > 0:
+            (node, parent, depth) = stack.pop()
+            index = len(nodes)
+            nodes.append(node)
+            parents.append(parent)
+            depths.append(depth)
+            for child in reversed(node.children):
+                stack.append((child, index, depth + 1))
+        self.nodes = nodes
+        self.parents = numpy.array(parents, dtype=numpy.intp)
+        self.depths = numpy.array(depths, dtype=numpy.intp)
+        data = numpy.array([node.get_lod_data() for node in nodes], dtype=numpy.float64).reshape(-1, 17)
+        self.centres = data[:, 0:3]
+        self.lengths = data[:, 3]
+        self.bounds_min = data[:, 4:7].astype(numpy.float32)
+        self.bounds_max = data[:, 7:10].astype(numpy.float32)
+        self.offset_vectors = data[:, 10:13]
+        self.offsets = data[:, 13]
+        self.lods = data[:, 14].astype(numpy.intp)
+        self.densities = data[:, 15]
+        self.nb_children = data[:, 16].astype(numpy.intp)
+        self.shown = numpy.array([node.shown for node in nodes], dtype=bool)
+        self.instance_ready = numpy.array([node.instance_ready for node in nodes], dtype=bool)
+
+    def bb_in_view(self, culling_frustum):
+        if not hasattr(culling_frustum, 'lens_bounds'):
+            return numpy.array([culling_frustum.is_patch_in_view(node) for node in self.nodes], dtype=bool)
+        offsets = numpy.zeros((len(self.nodes), 3))
+        if culling_frustum.offset_body_center:
+            offsets += numpy.array(tuple(culling_frustum.model_body_center_offset))
+        if culling_frustum.shift_patch_origin:
+            offsets += self.offset_vectors * self.offsets[:, numpy.newaxis]
+        offsets = offsets.astype(numpy.float32)
+        bounds_min = self.bounds_min + offsets
+        bounds_max = self.bounds_max + offsets
+        lens_bounds = culling_frustum.lens_bounds
+        in_view = numpy.ones(len(self.nodes), dtype=bool)
+        for i in range(lens_bounds.get_num_planes()):
+            plane = numpy.array(tuple(lens_bounds.get_plane(i)), dtype=numpy.float32)
+            # The box is outside of the frustum if its corner closest to the plane is in front of or on it
+            nearest = numpy.where(plane[:3] > 0, bounds_min, bounds_max)
+            in_view &= nearest @ plane[:3] + plane[3] < 0
+        return in_view
+
+    @pstat
+    def check_lod(
+        self,
+        root_nodes,
+        lod_result,
+        culling_frustum,
+        local,
+        model_camera_pos,
+        model_camera_vector,
+        altitude,
+        pixel_size,
+        lod_control,
+    ):
+        self.flatten(root_nodes)
+        nb_nodes = len(self.nodes)
+        if nb_nodes == 0:
+            return
+        camera_pos = numpy.array(tuple(model_camera_pos))
+        centre_distances = numpy.sqrt(((self.centres - camera_pos) ** 2).sum(axis=1))
+        distances = numpy.maximum(abs(altitude), centre_distances - self.lengths * 0.7071067811865476)
+        patch_in_view = self.bb_in_view(culling_frustum)
+        visibles = patch_in_view
+        with numpy.errstate(divide='ignore'):
+            apparent_sizes = self.lengths / (distances * pixel_size)
+        leaves = self.nb_children == 0
+        # A node can merge its children if none of them has children
+        child_indices = numpy.nonzero(self.parents >= 0)[0]
+        nb_non_leaf_children = numpy.bincount(
+            self.parents[child_indices], weights=~leaves[child_indices], minlength=nb_nodes
+        )
+        can_merge = ~leaves & (nb_non_leaf_children == 0)
+        merge = can_merge & lod_control.should_merge_array(self.lods, self.densities, apparent_sizes, distances)
+        # Only the nodes whose ancestors were not merged are visited
+        visited = numpy.ones(nb_nodes, dtype=bool)
+        for depth in range(1, self.depths.max() + 1):
+            at_depth = numpy.nonzero(self.depths == depth)[0]
+            parents = self.parents[at_depth]
+            visited[at_depth] = visited[parents] & ~merge[parents]
+        split = lod_control.should_split_array(self.lods, self.densities, apparent_sizes, distances)
+        split &= (self.lods > 0) | self.instance_ready
+        visible_leaves = visited & leaves & visibles
+        to_split = visible_leaves & split
+        not_split = visible_leaves & ~split
+        to_remove = lod_control.should_remove_array(visibles, leaves, apparent_sizes, distances)
+        to_remove &= not_split & self.shown
+        to_remove |= visited & leaves & ~visibles & self.shown
+        to_show = (
+            not_split & ~self.shown & lod_control.should_instanciate_array(visibles, leaves, apparent_sizes, distances)
+        )
+        to_merge = visited & merge
+        lod_result.max_lod = max(lod_result.max_lod, int(self.lods[visited].max()))
+        nodes = self.nodes
+        for index in numpy.nonzero(visited)[0]:
+            node = nodes[index]
+            node.distance = float(distances[index])
+            node.patch_in_view = bool(patch_in_view[index])
+            node.visible = bool(visibles[index])
+            node.apparent_size = float(apparent_sizes[index])
+        for index in numpy.nonzero(to_split | to_merge | to_show | to_remove)[0]:
+            node = nodes[index]
+            if to_split[index]:
+                if node.are_children_visibles(culling_frustum):
+                    lod_result.add_to_split(node)
+            elif to_merge[index]:
+                lod_result.add_to_merge(node)
+            elif to_show[index]:
+                lod_result.add_to_show(node)
+            else:
+                lod_result.add_to_remove(node)
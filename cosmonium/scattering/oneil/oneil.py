@@ -724,41 +724,41 @@ class ONeilSimpleScatteringDataSource(ONeilScatteringDataSourceBase):
         outer_radius = parameters.body_radius * parameters.AtmosphereRatio
         scale = 1.0 / (outer_radius - inner_radius)
 
-        shape.instance.setShaderInput("fKr4PI", parameters.Kr * 4 * pi)
-        shape.instance.setShaderInput("fKm4PI", parameters.Km * 4 * pi)
+        instance.setShaderInput("fKr4PI", parameters.Kr * 4 * pi)
+        instance.setShaderInput("fKm4PI", parameters.Km * 4 * pi)
 
-        shape.instance.setShaderInput("fSamples", parameters.samples)
-        shape.instance.setShaderInput("nSamples", parameters.samples)
+        instance.setShaderInput("fSamples", parameters.samples)
+        instance.setShaderInput("nSamples", parameters.samples)
         # These do sunsets and sky colors
         # Brightness of sun
         # Reyleight Scattering (Main sky colors)
-        shape.instance.setShaderInput("fKrESun", parameters.Kr * parameters.ESun)
+        instance.setShaderInput("fKrESun", parameters.Kr * parameters.ESun)
         # Mie Scattering -- Haze and sun halos
-        shape.instance.setShaderInput("fKmESun", parameters.Km * parameters.ESun)
+        instance.setShaderInput("fKmESun", parameters.Km * parameters.ESun)
         # Color of sun
-        shape.instance.setShaderInput(
+        instance.setShaderInput(
             "v3InvWavelength",
             1.0 / pow(parameters.wavelength[0], 4),
             1.0 / pow(parameters.wavelength[1], 4),
             1.0 / pow(parameters.wavelength[2], 4),
         )
 
-        shape.instance.setShaderInput("fg", parameters.G)
-        shape.instance.setShaderInput("fg2", parameters.G * parameters.G)
+        instance.setShaderInput("fg", parameters.G)
+        instance.setShaderInput("fg2", parameters.G * parameters.G)
         if parameters.hdr:
             if self.atmosphere:
-                shape.instance.setShaderInput("exposure", parameters.atm_exposure)
+                instance.setShaderInput("exposure", parameters.atm_exposure)
             else:
-                shape.instance.setShaderInput("exposure", parameters.exposure)
+                instance.setShaderInput("exposure", parameters.exposure)
 
-        shape.instance.setShaderInput("fOuterRadius", outer_radius)
-        shape.instance.setShaderInput("fInnerRadius", inner_radius)
-        shape.instance.setShaderInput("fOuterRadius2", outer_radius * outer_radius)
-        shape.instance.setShaderInput("fInnerRadius2", inner_radius * inner_radius)
+        instance.setShaderInput("fOuterRadius", outer_radius)
+        instance.setShaderInput("fInnerRadius", inner_radius)
+        instance.setShaderInput("fOuterRadius2", outer_radius * outer_radius)
+        instance.setShaderInput("fInnerRadius2", inner_radius * inner_radius)
 
-        shape.instance.setShaderInput("fScale", scale)
-        shape.instance.setShaderInput("fScaleDepth", parameters.ScaleDepth)
-        shape.instance.setShaderInput("fScaleOverScaleDepth", scale / parameters.ScaleDepth)
+        instance.setShaderInput("fScale", scale)
+        instance.setShaderInput("fScaleDepth", parameters.ScaleDepth)
+        instance.setShaderInput("fScaleOverScaleDepth", scale / parameters.ScaleDepth)
 
 
 class ONeilLookupTableFragmentShader(ShaderProgram):
@@ -1089,7 +1089,7 @@ class ONeilScatteringDataSource(ONeilScatteringDataSourceBase):
         outer_radius = parameters.radius
         scale = 1.0 / (outer_radius - inner_radius)
 
-        shape.instance.setShaderInput("nSamples", int(parameters.samples))
+        instance.setShaderInput("nSamples", int(parameters.samples))
         # These do sunsets and sky colors
         # Brightness of sun
         # Reyleight Scattering (Main sky colors)
@@ -1098,31 +1098,31 @@ class ONeilScatteringDataSource(ONeilScatteringDataSourceBase):
             parameters.Kr / pow(parameters.wavelength[1], 4),
             parameters.Kr / pow(parameters.wavelength[2], 4),
         )
-        shape.instance.setShaderInput("v3KrESun", Kr * parameters.ESun)
-        shape.instance.setShaderInput("v3Kr4PI", Kr * 4 * pi)
-        shape.instance.setShaderInput("v3Absorption", parameters.rayleigh_absorption)
+        instance.setShaderInput("v3KrESun", Kr * parameters.ESun)
+        instance.setShaderInput("v3Kr4PI", Kr * 4 * pi)
+        instance.setShaderInput("v3Absorption", parameters.rayleigh_absorption)
         # Mie Scattering -- Haze and sun halos
         Km = LVector3d(
             parameters.Km_beta / pow(parameters.wavelength[0], parameters.Km_alpha),
             parameters.Km_beta / pow(parameters.wavelength[1], parameters.Km_alpha),
             parameters.Km_beta / pow(parameters.wavelength[2], parameters.Km_alpha),
         )
-        shape.instance.setShaderInput("v3KmESun", Km * parameters.ESun)
-        shape.instance.setShaderInput("v3Km4PI", Km * 4 * pi)
+        instance.setShaderInput("v3KmESun", Km * parameters.ESun)
+        instance.setShaderInput("v3Km4PI", Km * 4 * pi)
 
-        shape.instance.setShaderInput("fg", parameters.G)
-        shape.instance.setShaderInput("fg2", parameters.G * parameters.G)
+        instance.setShaderInput("fg", parameters.G)
+        instance.setShaderInput("fg2", parameters.G * parameters.G)
         if parameters.hdr:
             if self.atmosphere:
-                shape.instance.setShaderInput("exposure", parameters.atm_exposure)
+                instance.setShaderInput("exposure", parameters.atm_exposure)
             else:
-                shape.instance.setShaderInput("exposure", parameters.exposure)
+                instance.setShaderInput("exposure", parameters.exposure)
 
-        shape.instance.setShaderInput("fOuterRadius", outer_radius)
-        shape.instance.setShaderInput("fInnerRadius", inner_radius)
-        shape.instance.setShaderInput("fOuterRadius2", outer_radius * outer_radius)
-        shape.instance.setShaderInput("fInnerRadius2", inner_radius * inner_radius)
+        instance.setShaderInput("fOuterRadius", outer_radius)
+        instance.setShaderInput("fInnerRadius", inner_radius)
+        instance.setShaderInput("fOuterRadius2", outer_radius * outer_radius)
+        instance.setShaderInput("fInnerRadius2", inner_radius * inner_radius)
 
-        shape.instance.setShaderInput("fScale", scale)
+        instance.setShaderInput("fScale", scale)
 
-        shape.instance.setShaderInput("pbOpticalDepth", pbOpticalDepth)
+        instance.setShaderInput("pbOpticalDepth", pbOpticalDepth)
@@ -19,12 +19,36 @@
 
 
 from math import log
+import numpy
 from panda3d.core import LPoint3, LPoint3d, LVector3d, LQuaternion, NodePath
 
+from ...utils import vectors_to_array
 from ... import settings
 
 
 class SceneAnchor:
+    __slots__ = (
+        'anchor',
+        'support_offset_body_center',
+        'oid_color',
+        'apply_orientation',
+        'background',
+        'virtual_object',
+        'spread_object',
+        'instance',
+        'shifted_instance',
+        'unshifted_instance',
+        'scene_position',
+        'scene_orientation',
+        'scene_distance',
+        'scene_scale_factor',
+        'scene_rel_position',
+        'world_body_center_offset',
+        'scene_body_center_offset',
+        'lights',
+        'placed_instance',
+        '__dict__',
+    )
     anchor_name = 'scene-anchor'
 
     def __init__(
@@ -55,6 +79,8 @@ class SceneAnchor:
         self.world_body_center_offset = LVector3d()
         self.scene_body_center_offset = LVector3d()
         self.lights = []
+        # Instance last placed by the scene anchor batch
+        self.placed_instance = None
 
     def add_light(self, light):
         self.lights.append(light)
@@ -84,6 +110,7 @@ class SceneAnchor:
 
     def update(self, scene_manager):
         anchor = self.anchor
+        self.placed_instance = None
         if self.support_offset_body_center and anchor.visible and anchor.resolved and settings.offset_body_center:
             self.world_body_center_offset = (
                 -self.anchor.vector_to_obs * self.anchor._height_under * self.scene_scale_factor
@@ -141,6 +168,33 @@ class SceneAnchor:
             scale_factor = ratio / scene_manager.scale
         return position, distance, scale_factor
 
+    @classmethod
+    def calc_scene_params_array(cls, scene_manager, rel_positions, abs_positions, distances_to_obs, vectors_to_obs):
+        """
+        Array version of calc_scene_params, the positions and vectors are arrays of shape (n, 3).
+        """
+        if settings.camera_at_origin:
+            obj_positions = rel_positions
+        else:
+            obj_positions = abs_positions
+        midPlane = scene_manager.midPlane
+        distances_to_obs = distances_to_obs / scene_manager.scale
+        positions = obj_positions / scene_manager.scale
+        distances = distances_to_obs.copy()
+        scale_factors = numpy.full(len(distances), 1.0 / scene_manager.scale)
+        if settings.use_depth_scaling and (settings.use_inv_scaling or settings.use_log_scaling):
+            far = distances_to_obs > midPlane
+            far_distances = distances_to_obs[far]
+            if settings.use_inv_scaling:
+                scaled_distances = midPlane * (1 - midPlane / far_distances)
+            else:
+                scaled_distances = midPlane * (1 - numpy.log2(midPlane / far_distances + 1))
+            far_vectors = vectors_to_obs[far]
+            positions[far] = -far_vectors * midPlane + -far_vectors * scaled_distances[:, numpy.newaxis]
+            distances[far] = midPlane + scaled_distances
+            scale_factors[far] = distances[far] / far_distances / scene_manager.scale
+        return positions, distances, scale_factors
+
     @classmethod
     def calc_scene_position(cls, scene_manager, rel_position, abs_position, distance_to_obs, vector_to_obs):
         if settings.camera_at_origin:
@@ -194,6 +248,107 @@ class ObserverSceneAnchor(SceneAnchor):
             self.instance.set_scale(self.scene_scale_factor)
 
 
+class SceneAnchorBatch:
+    """
+    Places all the visible scene anchors at once. The scene parameters of the point-like anchors are computed as
+    arrays, their instance, if any, is then moved only if its position, orientation or scale has changed.
+    The resolved anchors and the specialized scene anchors are still updated one by one.
+    The scene positions are kept to be used directly by the points set.
+    """
+
+    def __init__(self):
+        self.scene_anchors = None
+        self.rows = {}
+        self.positions = numpy.empty((0, 3))
+
+    def update(self, scene_manager, scene_anchors):
+        count = len(scene_anchors)
+        rows = {}
+        positions = numpy.empty((count, 3))
+        batched = []
+        for i, scene_anchor in enumerate(scene_anchors):
+            rows[id(scene_anchor)] = i
+            if type(scene_anchor) is SceneAnchor and not scene_anchor.anchor.resolved:
+                batched.append(i)
+            else:
+                scene_anchor.update(scene_manager)
+                positions[i] = scene_anchor.scene_position
+        if len(batched) > 0:
+            batched_scene_anchors = [scene_anchors[i] for i in batched]
+            anchors = [scene_anchor.anchor for scene_anchor in batched_scene_anchors]
+            rel_positions = [anchor.rel_position for anchor in anchors]
+            batch_positions, distances, scale_factors = SceneAnchor.calc_scene_params_array(
+                scene_manager,
+                vectors_to_array(rel_positions, 3),
+                vectors_to_array([anchor._position for anchor in anchors], 3),
+                numpy.array([anchor.distance_to_obs for anchor in anchors]),
+                vectors_to_array([anchor.vector_to_obs for anchor in anchors], 3),
+            )
+            changed = self.find_changed(batched_scene_anchors, batch_positions, scale_factors)
+            for scene_anchor, rel_position, position, distance, scale_factor in zip(
+                batched_scene_anchors,
+                rel_positions,
+                batch_positions.tolist(),
+                distances.tolist(),
+                scale_factors.tolist(),
+            ):
+                scene_anchor.scene_rel_position = rel_position
+                scene_anchor.scene_position = LPoint3d(*position)
+                scene_anchor.scene_distance = distance
+                scene_anchor.scene_scale_factor = scale_factor
+            # The labels, halos and orbits of the children are still attached to the instance
+            for i in numpy.flatnonzero(changed).tolist():
+                scene_anchor = batched_scene_anchors[i]
+                instance = scene_anchor.instance
+                instance.set_pos(*scene_anchor.scene_position)
+                if scene_anchor.apply_orientation:
+                    scene_anchor.scene_orientation = LQuaternion(*scene_anchor.anchor._orientation)
+                    instance.set_quat(scene_anchor.scene_orientation)
+                instance.set_scale(scene_anchor.scene_scale_factor)
+                if scene_anchor.placed_instance is not instance:
+                    scene_anchor.unshifted_instance.set_pos(LPoint3())
+                    scene_anchor.placed_instance = instance
+            positions[batched] = batch_positions
+        self.scene_anchors = scene_anchors
+        self.rows = rows
+        self.positions = positions
+
+    def find_changed(self, scene_anchors, positions, scale_factors):
+        """
+        Returns the mask of the scene anchors whose instance must be moved: the instances not yet placed by the batch
+        and the ones whose position, orientation or scale has changed since the previous update.
+        """
+        has_instance = numpy.array([scene_anchor.instance is not None for scene_anchor in scene_anchors], dtype=bool)
+        placed = numpy.array([scene_anchor.placed_instance is scene_anchor.instance for scene_anchor in scene_anchors])
+        old_positions = vectors_to_array([scene_anchor.scene_position for scene_anchor in scene_anchors], 3)
+        old_scale_factors = numpy.array([scene_anchor.scene_scale_factor for scene_anchor in scene_anchors])
+        changed = ~placed | (old_positions != positions).any(axis=1) | (old_scale_factors != scale_factors)
+        oriented = [i for i, scene_anchor in enumerate(scene_anchors) if scene_anchor.apply_orientation]
+        if len(oriented) > 0:
+            # The scene orientation is stored in single precision
+            old_orientations = [scene_anchors[i].scene_orientation for i in oriented]
+            orientations = [scene_anchors[i].anchor._orientation for i in oriented]
+            old_orientations = vectors_to_array(old_orientations, 4, numpy.float32)
+            orientations = vectors_to_array(orientations, 4, numpy.float32)
+            changed[oriented] |= (old_orientations != orientations).any(axis=1)
+        return changed & has_instance
+
+    def get_positions(self, scene_anchors):
+        """
+        Returns the scene positions of the given anchors as an array, or None if one of them was not placed by the
+        last update.
+        """
+        if scene_anchors is self.scene_anchors:
+            return self.positions
+        rows = [self.rows.get(id(scene_anchor), -1) for scene_anchor in scene_anchors]
+        if -1 in rows:
+            return None
+        return self.positions[rows]
+
+
+scene_anchor_batch = SceneAnchorBatch()
+
+
 class SceneAnchorCollection(list):
     def add_scene_anchor(self, scene_anchor):
         self.append(scene_anchor)
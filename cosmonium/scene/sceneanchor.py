@@ -23,10 +23,13 @@ from .. import settings
 if settings.c_scene_manager:
     try:
         from cosmonium_engine import SceneAnchor, AbsoluteSceneAnchor, ObserverSceneAnchor, SceneAnchorCollection
+
+        scene_anchor_batch = None
     except ImportError as e:
         print("WARNING: Could not load Scene Anchor C implementation, fallback on python implementation")
         print("\t", e)
         from .pyscene.sceneanchor import SceneAnchor, AbsoluteSceneAnchor, ObserverSceneAnchor, SceneAnchorCollection
+        from .pyscene.sceneanchor import scene_anchor_batch
 else:
     from .pyscene.sceneanchor import SceneAnchor, AbsoluteSceneAnchor, ObserverSceneAnchor  # noqa: F401
-    from .pyscene.sceneanchor import SceneAnchorCollection  # noqa: F401
+    from .pyscene.sceneanchor import SceneAnchorCollection, scene_anchor_batch  # noqa: F401
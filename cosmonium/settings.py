@@ -31,6 +31,8 @@ app_name = 'cosmonium'
 
 use_double = LPoint3 == LPoint3d
 cache_yaml = True
+yaml_parallel_load = True
+yaml_load_threads = 4
 prc_file = 'config.prc'
 
 # OpenGL user configuration
@@ -84,11 +86,22 @@ patch_constant_density = 32
 use_horizon_culling = True
 cull_far_patches = False
 cull_far_patches_threshold = 10
+vectorized_lod = True
+lod_scheduler = True
+# Time budget in ms for the split and merge operations of all the patched shapes
+lod_scheduler_budget = 4.0
+# Number of merge operations done each frame even when the time budget is exhausted
+lod_scheduler_min_merges = 2
 
 patch_data_store = True
 patch_data_store_max_elems = 2048
 patch_parameters_data_store = True
 
+# Skip the shader inputs set by the data sources when their value did not change
+shader_inputs_cache = True
+# Relative tolerance used to compare the float values, close to the precision of the floats used in the shaders
+shader_inputs_tolerance = 1e-7
+
 use_patch_adaptation = True
 use_patch_skirts = True
 
@@ -119,6 +132,35 @@ last_script_path = None
 
 scene_manager = 'region'
 c_scene_manager = True
+# Use a k-d tree instead of the octree traversal to find the nearest system
+nearest_system_index = True
+# Store the layout of the large octrees to recreate them directly at the next start
+octree_snapshot = True
+octree_snapshot_min_leaves = 1000
+# Compare the restored octree with a newly created one
+octree_snapshot_validate = False
+# Number of octree snapshots kept in the cache, the least recently used are removed
+octree_snapshot_max_files = 4
+# Store the content of the large catalogue files once parsed to recreate the objects directly at the next start
+catalogue_snapshot = True
+# Compare the restored catalogue content with the parsed file
+catalogue_snapshot_validate = False
+# Parse the large catalogue files in chunks using a pool of worker processes
+parallel_parsing = True
+# Number of worker processes, None to use the number of CPUs
+parallel_parsing_workers = None
+# Minimum size of a catalogue file and size of the chunks, in characters
+parallel_parsing_min_size = 1024 * 1024
+parallel_parsing_chunk_size = 256 * 1024
+# Maximum number of stars of the streamed catalogues kept in memory
+star_stream_max_stars = 500000
+# Maximum number of cells loaded at the same time
+star_stream_max_pending = 4
+# Number of stars created in each frame while a cell is loaded
+star_stream_batch_size = 500
+# Interval between two checks of the cells to load or to evict, and delay before an unused cell is evicted (in seconds)
+star_stream_update_interval = 0.25
+star_stream_evict_delay = 10.0
 
 use_inv_scaling = True
 use_log_scaling = False
@@ -162,10 +204,31 @@ dump_panda_shaders = False
 debug_shadow_frustum = False
 debug_shape_task = False
 debug_tex_loading = False
+debug_star_stream = False
+
+ephemeris_cache = True
+ephemeris_cache_persist = True
+# Maximum position error, in Km
+ephemeris_cache_tolerance = 1.0
+ephemeris_cache_degree = 8
+ephemeris_cache_max_degree = 32
+ephemeris_cache_segments_per_period = 16
+# Window size, in days, used when the orbit has no period
+ephemeris_cache_default_window = 8.0
+ephemeris_cache_min_window = 1.0 / 24
 
 sync_data_load = False
 sync_texture_load = False
 workers_use_task_chain = False
+texture_array_parallel_load = True
+texture_array_load_threads = 4
+model_cache = True
+model_disk_cache = True
+# Store the decoded textures with their mipmaps in the cache, the cache files are larger than the source images
+texture_cache = False
+texture_cache_compress = False
+# Number of textures kept in the cache, the least recently used are removed
+texture_cache_max_files = 2000
 
 debug_jump = False
 
@@ -185,6 +248,8 @@ smallest_glare_mag = 1.0
 largest_glare_mag = -2.0
 
 label_lowest_app_magnitude = 4.0
+label_declutter = True
+label_declutter_cell_size = 16
 
 axis_fade = 20
 axis_thickness = 0.9
@@ -206,6 +271,9 @@ orbit_smooth_thickness = 3
 orbit_smooth_width = 1.5
 orbit_smooth_blend = 1.5
 
+# Orbits and axes are only created when shown and are released after being hidden for this delay (in seconds)
+annotations_release_delay = 30.0
+
 grid_thickness = 0.5
 
 asterism_thickness = 0.9
@@ -227,6 +295,10 @@ display_render_info = 'fps'
 menu_text_size = 12
 
 query_delay = 0.333
+# Maximum number of suggestions returned by the search
+query_max_results = 120
+# Maximum number of updates per second of the HUD text blocks, None to update them every frame
+hud_max_update_rate = 10.0
 
 default_window_width = 800
 default_window_height = 600
@@ -247,6 +319,8 @@ main_update_task_sort = 35
 update_lod_task_sort = 37
 # Slot 38 is used by tasks spawned within update_lod_task
 update_instances_task_sort = 40
+# Must run after all the updates and before the rendering task igLoop (sort 50)
+data_store_flush_task_sort = 49
 
 # Collision bits
 mouse_click_collision_bit = 0
@@ -0,0 +1,142 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import LVecBase2f, LVecBase3f, LVecBase4f, LVecBase2d, LVecBase3d, LVecBase4d
+from panda3d.core import LVecBase2i, LVecBase3i, LVecBase4i
+from panda3d.core import LMatrix3f, LMatrix4f, LMatrix3d, LMatrix4d
+from panda3d.core import NodePath
+
+from . import settings
+
+float_vector_types = (LVecBase2f, LVecBase3f, LVecBase4f, LVecBase2d, LVecBase3d, LVecBase4d)
+int_vector_types = (LVecBase2i, LVecBase3i, LVecBase4i)
+matrix_types = (LMatrix3f, LMatrix4f, LMatrix3d, LMatrix4d)
+
+
+def close_values(old, new, tolerance):
+    return old == new or abs(old - new) <= tolerance * max(abs(old), abs(new))
+
+
+def close_components(old, new, tolerance):
+    # Each component is compared with its own relative tolerance, the small components are not hidden by the large ones
+    return all(close_values(old_item, new_item, tolerance) for old_item, new_item in zip(old, new))
+
+
+class ShaderInputsCache:
+    """
+    Proxy of the instance of a shape given to the data sources. The shader inputs whose value did not change since the
+    last time they were set are skipped and the remaining ones are applied in a single ShaderAttrib update when the
+    cache is flushed. All the other methods are forwarded to the instance.
+    """
+
+    nb_applied = 0
+    nb_skipped = 0
+
+    def __init__(self):
+        self.instance = None
+        self.values = {}
+        self.pending = {}
+
+    def bind(self, instance):
+        if instance is not self.instance:
+            self.instance = instance
+            self.values = {}
+            self.pending = {}
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.instance, name)
+
+    def copy_value(self, value):
+        if isinstance(value, float_vector_types + int_vector_types + matrix_types):
+            return type(value)(value)
+        elif isinstance(value, (tuple, list)):
+            return tuple(value)
+        else:
+            return value
+
+    def same_value(self, old, new):
+        tolerance = settings.shader_inputs_tolerance
+        if old is new:
+            # Arrays and other objects updated in place are shared with the render state
+            return not isinstance(new, (tuple, list) + float_vector_types + int_vector_types + matrix_types)
+        if isinstance(new, (float, int)):
+            return isinstance(old, (float, int)) and close_values(old, new, tolerance)
+        elif isinstance(new, float_vector_types):
+            if type(old) is not type(new):
+                return False
+            return old == new or close_components(old, new, tolerance)
+        elif isinstance(new, matrix_types):
+            if type(old) is not type(new):
+                return False
+            return old == new or all(
+                close_components(old_row, new_row, tolerance) for old_row, new_row in zip(old, new)
+            )
+        elif isinstance(new, int_vector_types):
+            return type(old) is type(new) and old == new
+        elif isinstance(new, (tuple, list)):
+            if not isinstance(old, tuple) or len(old) != len(new):
+                return False
+            for old_item, new_item in zip(old, new):
+                if old_item is new_item:
+                    continue
+                if not isinstance(new_item, (float, int)) or not isinstance(old_item, (float, int)):
+                    return False
+                if not close_values(old_item, new_item, tolerance):
+                    return False
+            return True
+        elif isinstance(new, NodePath):
+            return isinstance(old, NodePath) and old == new
+        else:
+            return False
+
+    def set_shader_input(self, name, *value):
+        if len(value) == 1:
+            value = value[0]
+        name = str(name)
+        if name in self.values and self.same_value(self.values[name], value):
+            ShaderInputsCache.nb_skipped += 1
+            return
+        value = self.copy_value(value)
+        self.values[name] = value
+        self.pending[name] = value
+        ShaderInputsCache.nb_applied += 1
+
+    setShaderInput = set_shader_input
+
+    def set_shader_inputs(self, **inputs):
+        for name, value in inputs.items():
+            self.set_shader_input(name, value)
+
+    setShaderInputs = set_shader_inputs
+
+    def clear_shader_input(self, name):
+        name = str(name)
+        self.values.pop(name, None)
+        self.pending.pop(name, None)
+        self.instance.clear_shader_input(name)
+
+    clearShaderInput = clear_shader_input
+
+    def flush(self):
+        if self.pending:
+            if self.instance is not None:
+                self.instance.set_shader_inputs(**self.pending)
+            self.pending = {}
@@ -18,6 +18,7 @@
 #
 
 
+from ...datasource import DataSource
 from ..component import ShaderComponent
 
 
@@ -75,9 +76,18 @@ vec3 applyFog(in vec3  pixelColor, in vec3 position)
     def fragment_shader(self, code):
         code.append('    total_color.xyz = applyFog(total_color.xyz, world_vertex);')
 
-    def update_shader_shape_static(self, shape, appearance):
-        shape.instance.set_shader_input("fogFallOff", self.fog_fall_off)
-        shape.instance.set_shader_input("fogDensity", self.fog_density)
-        shape.instance.set_shader_input("fogGround", self.fog_ground)
-        shape.instance.set_shader_input("fogColor", self.fog_color)
-        shape.instance.set_shader_input("sunColor", self.sun_color)
+    def create_data_source(self):
+        return FogDataSource(self)
+
+
+class FogDataSource(DataSource):
+    def __init__(self, fog):
+        DataSource.__init__(self, 'fog')
+        self.fog = fog
+
+    def apply(self, shape, instance):
+        instance.set_shader_input("fogFallOff", self.fog.fog_fall_off)
+        instance.set_shader_input("fogDensity", self.fog.fog_density)
+        instance.set_shader_input("fogGround", self.fog.fog_ground)
+        instance.set_shader_input("fogColor", self.fog.fog_color)
+        instance.set_shader_input("sunColor", self.fog.sun_color)
@@ -381,10 +381,10 @@ class ShadowMapDataSource(DataSource):
         self.calculate_shadow_coef = calculate_shadow_coef
 
     def apply(self, shape, instance):
-        shape.instance.set_shader_input('%s_depthmap' % self.name, self.caster.shadow_map.depthmap)
-        shape.instance.set_shader_input("%sLightSource" % self.name, self.caster.shadow_map.cam)
+        instance.set_shader_input('%s_depthmap' % self.name, self.caster.shadow_map.depthmap)
+        instance.set_shader_input("%sLightSource" % self.name, self.caster.shadow_map.cam)
         if not self.calculate_shadow_coef or self.caster.occluder is None:
-            shape.instance.set_shader_input('%s_shadow_coef' % self.name, 1.0)
+            instance.set_shader_input('%s_shadow_coef' % self.name, 1.0)
 
     def update(self, shape, instance, camera_pos, camera_rot):
         # TODO: Shadow parameters should not be retrieved like that
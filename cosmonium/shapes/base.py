@@ -21,6 +21,7 @@ from panda3d.core import LVecBase3, LVector3
 from panda3d.core import BitMask32
 from panda3d.core import CollisionSphere, CollisionNode
 
+from ..shaderinputs import ShaderInputsCache
 from .. import settings
 
 
@@ -38,6 +39,7 @@ class Shape:
         self.owner = None
         self.instance_ready = False
         self.task = None
+        self.shader_inputs = ShaderInputsCache()
         self.clickable = False
         self.attribution = None
         # TODO: Used to fix ring textures
@@ -77,6 +79,7 @@ class Shape:
         if self.instance is not None:
             self.instance.detach_node()
             self.instance = None
+        self.shader_inputs.bind(None)
         self.instance_ready = False
         if self.task is not None:
             # print("KILL TASK", self.str_id())
@@ -23,10 +23,12 @@ from panda3d.core import LPoint3d, LVector3d
 from panda3d.core import NodePath, ModelPool, Filename
 
 from ..dircontext import defaultDirContext
+from ..mesh import model_cache
 from ..parameters import ParametersGroup, AutoUserParameter, UserParameter
 
 # TODO: There shouldn't be a dependency towards astro
 from ..astro import units
+from .. import settings
 
 from .base import Shape
 
@@ -110,37 +112,49 @@ class MeshShape(Shape):
         return False
 
     async def load(self):
+        if settings.model_cache:
+            if self.panda:
+                self.fullpath = self.model
+            else:
+                self.fullpath = self.context.find_model(self.model)
+                if self.fullpath is None:
+                    print("Model not found", self.model)
+                    return (None, None)
+            return await model_cache.get(self.fullpath, self.flatten, self.panda)
         if self.panda:
             self.fullpath = self.model
-            return await builtins.base.loader.loadModel(self.model, blocking=False)
+            return (await builtins.base.loader.loadModel(self.model, blocking=False), None)
         else:
             self.fullpath = self.context.find_model(self.model)
             if self.fullpath is not None:
                 print("Loading model", self.fullpath)
-                return await builtins.base.loader.loadModel(
+                mesh = await builtins.base.loader.loadModel(
                     Filename.from_os_specific(self.fullpath).get_fullpath(), blocking=False
                 )
+                return (mesh, None)
             else:
                 print("Model not found", self.model)
-                return None
+                return (None, None)
 
     async def create_instance(self):
         self.instance = NodePath('mesh-holder')
-        mesh = await self.load()
+        (mesh, major) = await self.load()
         if mesh is None:
             return None
         # The shape has been removed from the view while the mesh was loaded
         if self.instance is None:
+            self.release_mesh()
             return
         self.mesh = mesh
         if self.auto_scale_mesh:
-            (l, r) = mesh.getTightBounds()
-            major = max(r - l) / 2
+            if major is None:
+                (l, r) = mesh.getTightBounds()
+                major = max(r - l) / 2
             scale_factor = 1.0 / major
             self.scale_factor = self.source_scale_factor * scale_factor
         else:
             self.radius = max(*self.scale_factor)
-        if self.flatten:
+        if self.flatten and not settings.model_cache:
             self.mesh.clear_model_nodes()
             self.mesh.flatten_strong()
         self.update_shape()
@@ -150,10 +164,16 @@ class MeshShape(Shape):
         self.has_lights = len(self.lights) > 0
         return self.instance
 
+    def release_mesh(self):
+        if settings.model_cache:
+            model_cache.release(self.fullpath, self.flatten)
+        else:
+            ModelPool.release_model(self.fullpath)
+
     def remove_instance(self):
         Shape.remove_instance(self)
         if self.mesh is not None:
-            ModelPool.release_model(self.fullpath)
+            self.release_mesh()
             self.mesh = None
         self.has_lights = False
         self.lights = []
@@ -25,6 +25,7 @@ from panda3d.core import OmniBoundingVolume
 
 from ..datasource import DataSourcesHandler
 from ..foundation import VisibleObject
+from ..lodscheduler import lod_scheduler
 from ..parameters import ParametersGroup
 from ..shaders.base import AutoShader
 from ..shaders.lighting.scattering import NoScattering
@@ -156,7 +157,9 @@ class ShapeObject(VisibleObject):
         self.update_shader()
         self.sources.add_source(scattering_source)
         if self.instance is not None and self.instance_ready:
-            scattering_source.apply(self.shape, self.instance)
+            instance = self.sources.get_instance(self.shape)
+            scattering_source.apply(self.shape, instance)
+            self.sources.flush_instance(instance)
 
     def remove_scattering(self):
         self.shader.lighting_model.set_scattering(NoScattering())
@@ -341,16 +344,25 @@ class ShapeObject(VisibleObject):
     def update_lod(self, camera_pos, camera_rot):
         if not self.instance_ready:
             return
-        to_show, to_update = self.shape.update_lod(
-            self.context.observer.get_local_position(),
-            self.owner.anchor.distance_to_obs,
-            self.context.observer.pixel_size,
-            self.appearance,
-        )
-        self.schedule_jobs(to_show)
-        for patch in to_update:
-            if patch.instance is not None:
-                self.patch_sources.apply(patch)
+        if settings.lod_scheduler and self.shape.patchable:
+            lod_result = self.shape.evaluate_lod(
+                self.context.observer.get_local_position(),
+                self.owner.anchor.distance_to_obs,
+                self.context.observer.pixel_size,
+                self.appearance,
+            )
+            if lod_result is not None:
+                lod_scheduler.add_candidates(self, lod_result)
+            else:
+                self.apply_lod_changes([], [])
+        else:
+            to_show, to_update = self.shape.update_lod(
+                self.context.observer.get_local_position(),
+                self.owner.anchor.distance_to_obs,
+                self.context.observer.pixel_size,
+                self.appearance,
+            )
+            self.apply_lod_changes(to_show, to_update)
         if self.appearance is not None:
             self.appearance.update_lod(
                 self.shape,
@@ -359,6 +371,12 @@ class ShapeObject(VisibleObject):
                 self.context.observer.pixel_size,
             )
 
+    def apply_lod_changes(self, to_show, to_update):
+        self.schedule_jobs(to_show)
+        for patch in to_update:
+            if patch.instance is not None:
+                self.patch_sources.apply(patch)
+
     def update_instance(self, scene_manager, camera_pos, camera_rot):
         if self.context.observer.apply_scattering > 0:
             self.context.observer.scattering.add_attenuated_object(self)
@@ -0,0 +1,421 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from direct.showbase.ShowBaseGlobal import globalClock
+from direct.task import Task
+from direct.task.TaskManagerGlobal import taskMgr
+from math import pi, sqrt
+from panda3d.core import LVector3d
+from time import perf_counter
+import builtins
+import numpy
+import os
+import struct
+
+from .astro.astro import app_to_abs_mag, abs_mag_to_lum, luminosity_magnitude_factor
+from .astro.blackbody import temp_to_RGB_array
+from .astro.frame import J2000BarycentricEclipticReferenceFrame
+from .astro.spectraltype import spectralTypeIntDecoder
+from .astro import units
+from .catalogs import objectsDB
+from .dircontext import defaultDirContext
+from .celestia.star_parser import create_star
+from .objects.universe import UniverseCell
+from .pstats import levelpstat
+from .workers import AsyncLoader
+from . import settings
+
+cells_header = struct.Struct("<8sHI")
+cells_magic = b"COSCELLS"
+cells_version = 1
+
+cell_records = numpy.dtype(
+    [
+        ('center', '<f8', (3,)),
+        ('width', '<f8'),
+        ('max_luminosity', '<f8'),
+        ('offset', '<i8'),
+        ('count', '<i4'),
+    ]
+)
+
+star_records = numpy.dtype(
+    [
+        ('catNo', '<i4'),
+        ('position', '<f8', (3,)),
+        ('abs_magnitude', '<f4'),
+        ('spectral_type', '<i2'),
+    ]
+)
+
+
+def calc_luminosities(abs_magnitudes):
+    return numpy.exp((units.sun_abs_magnitude - abs_magnitudes) * luminosity_magnitude_factor) * units.L0
+
+
+def partition_stars(positions, luminosities, max_stars, child_factor=0.25, max_level=32):
+    """
+    Splits the stars in cells following the layout of the universe octree : the stars brighter than the threshold of
+    a node are kept in the node and the others are split in the octants of the node until they are less than
+    max_stars. Returns the list of (center, width, indexes) of the non empty cells, each star is in only one cell.
+    """
+    low = positions.min(axis=0)
+    high = positions.max(axis=0)
+    center = (low + high) / 2
+    width = max(float((high - low).max()) * 1.001, units.Ly)
+    abs_magnitude = app_to_abs_mag(6.0, width / 2 * sqrt(3))
+    threshold = abs_mag_to_lum(abs_magnitude) * units.L0
+    cells = []
+    stack = [(center, width, threshold, numpy.arange(len(positions)), 0)]
+    while stack:
+        (center, width, threshold, indexes, level) = stack.pop()
+        if len(indexes) <= max_stars or level >= max_level:
+            cells.append((center, width, indexes))
+            continue
+        bright = luminosities[indexes] > threshold
+        # Too many bright stars are split with the others, they will be kept in the smaller nodes
+        if bright.any() and bright.sum() <= max_stars:
+            cells.append((center, width, indexes[bright]))
+            indexes = indexes[~bright]
+        octants = ((positions[indexes] >= center) * (1, 2, 4)).sum(axis=1)
+        # Pushed in reverse order to store the octants in order
+        for octant in reversed(range(8)):
+            children = indexes[octants == octant]
+            if len(children) == 0:
+                continue
+            offset = numpy.array([octant & 1, (octant >> 1) & 1, (octant >> 2) & 1]) - 0.5
+            stack.append((center + offset * width / 2, width / 2, threshold * child_factor, children, level + 1))
+    return cells
+
+
+def write_cells(filepath, catNos, positions, abs_magnitudes, spectral_codes, max_stars):
+    """
+    Writes a star catalogue partitioned in cells. The file starts with a header and the index of the cells, followed
+    by the block of stars of each cell.
+    """
+    luminosities = calc_luminosities(abs_magnitudes)
+    cells = partition_stars(positions, luminosities, max_stars)
+    index = numpy.zeros(len(cells), dtype=cell_records)
+    offset = cells_header.size + index.nbytes
+    for i, (center, width, indexes) in enumerate(cells):
+        index[i] = (center, width, luminosities[indexes].max(), offset, len(indexes))
+        offset += len(indexes) * star_records.itemsize
+    with open(filepath, 'wb') as data:
+        data.write(cells_header.pack(cells_magic, cells_version, len(cells)))
+        index.tofile(data)
+        for center, width, indexes in cells:
+            stars = numpy.empty(len(indexes), dtype=star_records)
+            stars['catNo'] = catNos[indexes]
+            stars['position'] = positions[indexes]
+            stars['abs_magnitude'] = abs_magnitudes[indexes]
+            stars['spectral_type'] = spectral_codes[indexes]
+            stars.tofile(data)
+    return index
+
+
+class CellsFile:
+    """
+    Reads the index and the blocks of stars of a catalogue partitioned in cells. The blocks are read with a separate
+    file access so that they can be loaded concurrently from the workers.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as data:
+            (magic, version, count) = cells_header.unpack(data.read(cells_header.size))
+            if magic != cells_magic or version != cells_version:
+                raise ValueError("Invalid cells file {}".format(filepath))
+            self.index = numpy.fromfile(data, dtype=cell_records, count=count)
+        self.centers = self.index['center']
+        self.radii = self.index['width'] / 2.0 * sqrt(3)
+        self.max_luminosities = self.index['max_luminosity']
+        self.counts = self.index['count']
+
+    def read(self, cell_id):
+        return numpy.fromfile(
+            self.filepath,
+            dtype=star_records,
+            count=int(self.index['count'][cell_id]),
+            offset=int(self.index['offset'][cell_id]),
+        )
+
+
+class StreamedCell:
+    def __init__(self, stream, cell_id):
+        self.stream = stream
+        self.cell_id = cell_id
+        self.count = int(stream.cells_file.counts[cell_id])
+        self.loaded = False
+        self.pending = False
+        self.failed = False
+        self.system = None
+        self.stars = None
+        self.priority = 0.0
+        self.last_needed = 0.0
+        self.request_time = None
+
+    def is_locked(self):
+        # The stars seen, selected or followed by the user must stay in memory
+        for star in self.stars:
+            anchor = star.anchor
+            if anchor.visible or anchor.resolved or star.selected or star.focused:
+                return True
+        return False
+
+
+class StarStream:
+    """
+    Star catalogue partitioned in cells, only the cells that could contain stars visible from the observer are
+    loaded.
+    """
+
+    def __init__(self, filepath, names, radius):
+        self.filepath = filepath
+        self.cells_file = CellsFile(filepath)
+        self.names = names
+        self.radius = radius
+        self.cells = [StreamedCell(self, cell_id) for cell_id in range(len(self.cells_file.index))]
+        print("Found", len(self.cells), "cells and", self.cells_file.counts.sum(), "stars in", filepath)
+
+    def find_needed(self, position, lowest_radiance):
+        """
+        Applies the test of the octree traversal to each cell without the frustum test, so that the cells do not need
+        to be loaded again when the camera turns. Returns the mask of the needed cells and their radiance.
+        """
+        distances = numpy.linalg.norm(self.cells_file.centers - position, axis=1) - self.cells_file.radii
+        inside = distances <= 0.0
+        distances = numpy.maximum(distances, 1.0)
+        radiances = self.cells_file.max_luminosities / (4 * pi * distances * distances * 1000 * 1000)
+        radiances[inside] = float('inf')
+        return (inside | (radiances >= lowest_radiance), radiances)
+
+    def read_cell(self, cell):
+        # Executed in the loader thread
+        try:
+            records = self.cells_file.read(cell.cell_id)
+        except (OSError, ValueError) as e:
+            print("Could not read cell", cell.cell_id, "of", self.filepath, ':', e)
+            return None
+        spectral_types, temperatures = spectralTypeIntDecoder.decode_array(records['spectral_type'])
+        point_colors = temp_to_RGB_array(temperatures, linear=True)
+        return (
+            records['catNo'].tolist(),
+            records['position'].tolist(),
+            records['abs_magnitude'].astype(numpy.float64).tolist(),
+            spectral_types,
+            temperatures.tolist(),
+            point_colors.tolist(),
+        )
+
+    def create_system(self, cell):
+        system = UniverseCell("{} #{}".format(os.path.basename(self.filepath), cell.cell_id), self.radius)
+        # The cells are not bodies the user can look for
+        objectsDB.remove(system)
+        return system
+
+
+class StarStreams:
+    """
+    Loads and evicts the cells of the streamed catalogues according to the position of the observer, while keeping
+    the number of stars in memory under the configured budget.
+    The cells are read in a worker thread and their stars are created in batches in the main thread.
+    """
+
+    def __init__(self):
+        self.streams = []
+        self.resident = []
+        self.nb_pending = 0
+        self.resident_stars = 0
+        self.pending_stars = 0
+        self.candidates = []
+        self.last_update = None
+        self.loader = None
+        self.cells_pstat = levelpstat('cells', 'StarStream')
+        self.stars_pstat = levelpstat('stars', 'StarStream')
+        self.pending_pstat = levelpstat('pending', 'StarStream')
+        self.latency_pstat = levelpstat('load-latency', 'StarStream')
+        self.evicted_pstat = levelpstat('evicted', 'StarStream')
+
+    def get_loader(self):
+        if self.loader is None:
+            self.loader = AsyncLoader(builtins.base, 'starstream')
+        return self.loader
+
+    def add_stream(self, stream):
+        self.streams.append(stream)
+
+    def has_cells(self):
+        return len(self.resident) > 0
+
+    def traverse(self, traverser):
+        for cell in self.resident:
+            cell.system.anchor.traverse(traverser)
+
+    def update(self, position, lowest_radiance):
+        if len(self.streams) == 0:
+            return
+        now = globalClock.get_frame_time()
+        if self.last_update is None or now - self.last_update >= settings.star_stream_update_interval:
+            self.last_update = now
+            self.find_candidates(numpy.array(position), lowest_radiance)
+            self.evict_unused(now)
+        # The loads are started at each frame, as soon as the previous ones are done
+        while self.candidates and self.nb_pending < settings.star_stream_max_pending:
+            cell = self.candidates.pop(0)
+            if cell.loaded or cell.pending or not self.make_room(cell):
+                continue
+            self.request(cell)
+        self.update_pstats()
+
+    def find_candidates(self, position, lowest_radiance):
+        candidates = []
+        for stream in self.streams:
+            (needed, radiances) = stream.find_needed(position, lowest_radiance)
+            for cell_id in numpy.flatnonzero(needed).tolist():
+                cell = stream.cells[cell_id]
+                cell.priority = radiances[cell_id]
+                cell.last_needed = self.last_update
+                if not (cell.loaded or cell.pending or cell.failed):
+                    candidates.append(cell)
+        candidates.sort(key=lambda cell: cell.priority, reverse=True)
+        self.candidates = candidates
+
+    def evict_unused(self, now):
+        evicted = 0
+        for cell in list(self.resident):
+            if now - cell.last_needed > settings.star_stream_evict_delay and not cell.is_locked():
+                self.evict(cell)
+                evicted += 1
+        self.evicted_pstat.set_level(evicted)
+
+    def make_room(self, cell):
+        """
+        Evicts the cells not needed anymore, then the less bright cells, until the stars of the cell fit in the budget.
+        """
+        available = settings.star_stream_max_stars - self.resident_stars - self.pending_stars
+        if cell.count <= available:
+            return True
+        unused = sorted(
+            (other for other in self.resident if other.last_needed < self.last_update),
+            key=lambda other: other.last_needed,
+        )
+        dimmer = sorted(
+            (
+                other
+                for other in self.resident
+                if other.last_needed == self.last_update and other.priority < cell.priority
+            ),
+            key=lambda other: other.priority,
+        )
+        victims = []
+        for other in unused + dimmer:
+            if other.is_locked():
+                continue
+            victims.append(other)
+            available += other.count
+            if cell.count <= available:
+                break
+        else:
+            return False
+        for victim in victims:
+            self.evict(victim)
+        return True
+
+    def request(self, cell):
+        cell.pending = True
+        cell.request_time = perf_counter()
+        self.nb_pending += 1
+        self.pending_stars += cell.count
+        taskMgr.add(self.load_cell(cell), 'star stream load')
+
+    async def load_cell(self, cell):
+        stream = cell.stream
+        data = await self.get_loader().add_job(stream.read_cell, [cell])
+        if data is None:
+            cell.pending = False
+            cell.failed = True
+            self.nb_pending -= 1
+            self.pending_stars -= cell.count
+            return
+        system = stream.create_system(cell)
+        frame = J2000BarycentricEclipticReferenceFrame()
+        stars = []
+        batch_size = settings.star_stream_batch_size
+        for catNo, position, abs_magnitude, spectral_type, temperature, point_color in zip(*data):
+            star = create_star(
+                catNo,
+                stream.names,
+                LVector3d(*position),
+                frame,
+                abs_magnitude,
+                spectral_type,
+                temperature,
+                point_color,
+            )
+            system.add_child_fast(star)
+            stars.append(star)
+            if len(stars) % batch_size == 0:
+                await Task.pause(0)
+        system.rebuild()
+        cell.system = system
+        cell.stars = stars
+        cell.pending = False
+        cell.loaded = True
+        self.nb_pending -= 1
+        self.pending_stars -= cell.count
+        self.resident_stars += cell.count
+        self.resident.append(cell)
+        latency = (perf_counter() - cell.request_time) * 1000
+        self.latency_pstat.set_level(latency)
+        if settings.debug_star_stream:
+            print("Cell", cell.cell_id, "of", stream.filepath, "loaded in {:.1f}ms".format(latency))
+        self.update_pstats()
+
+    def evict(self, cell):
+        for star in cell.stars:
+            objectsDB.remove(star)
+        cell.system = None
+        cell.stars = None
+        cell.loaded = False
+        self.resident.remove(cell)
+        self.resident_stars -= cell.count
+        if settings.debug_star_stream:
+            print("Cell", cell.cell_id, "of", cell.stream.filepath, "evicted")
+
+    def update_pstats(self):
+        self.cells_pstat.set_level(len(self.resident))
+        self.stars_pstat.set_level(self.resident_stars)
+        self.pending_pstat.set_level(self.nb_pending)
+
+
+star_streams = StarStreams()
+
+
+def load(filename, names, radius, context=defaultDirContext):
+    filepath = context.find_data(filename)
+    if filepath is None:
+        print("File not found", filename)
+        return
+    try:
+        stream = StarStream(filepath, names, radius)
+    except (OSError, ValueError) as e:
+        print("Could not load", filepath, ':', e)
+        return
+    star_streams.add_stream(stream)
@@ -0,0 +1,195 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import numpy
+from time import time
+
+from .objects.systems import OctreeSystem
+from .pstats import levelpstat
+
+
+class SystemsIndex:
+    """
+    K-d tree over the positions of the systems contained in an octree system and its nested octree systems, used to
+    find the system closest to the observer without traversing the octree.
+    The tree is rebuilt lazily when the content of the octree systems changes.
+    """
+
+    leaf_size = 16
+
+    def __init__(self, root):
+        self.root = root
+        self.version = None
+        self.bodies = []
+        self.global_positions = None
+        self.local_positions = None
+        self.positions = None
+        self.node_start = None
+        self.node_end = None
+        self.node_left = None
+        self.node_right = None
+        self.node_min = None
+        self.node_max = None
+        self.leaf_of = None
+        self.body_index = {}
+        self.visited_pstat = levelpstat('visited', 'SystemsIndex')
+
+    def collect(self, system, bodies):
+        for child in system.children:
+            if isinstance(child, OctreeSystem):
+                self.collect(child, bodies)
+            else:
+                bodies.append(child)
+
+    def rebuild(self):
+        print("Creating systems index...")
+        start = time()
+        bodies = []
+        self.collect(self.root, bodies)
+        count = len(bodies)
+        self.global_positions = numpy.empty((count, 3))
+        self.local_positions = numpy.empty((count, 3))
+        for i, body in enumerate(bodies):
+            self.global_positions[i] = body.anchor.get_absolute_reference_point()
+            self.local_positions[i] = body.anchor.get_local_position()
+        positions = self.global_positions + self.local_positions
+        order = numpy.arange(count)
+        node_start = []
+        node_end = []
+        node_left = []
+        node_right = []
+        if count > 0:
+            stack = [(0, count, self.add_node(node_start, node_end, node_left, node_right, 0, count))]
+        else:
+            stack = []
+        while stack:
+            (first, last, node) = stack.pop()
+            if last - first <= self.leaf_size:
+                continue
+            points = positions[order[first:last]]
+            axis = numpy.argmax(points.max(axis=0) - points.min(axis=0))
+            middle = (last - first) // 2
+            partition = numpy.argpartition(points[:, axis], middle)
+            order[first:last] = order[first:last][partition]
+            left = self.add_node(node_start, node_end, node_left, node_right, first, first + middle)
+            right = self.add_node(node_start, node_end, node_left, node_right, first + middle, last)
+            node_left[node] = left
+            node_right[node] = right
+            stack.append((first, first + middle, left))
+            stack.append((first + middle, last, right))
+        self.global_positions = self.global_positions[order]
+        self.local_positions = self.local_positions[order]
+        self.positions = positions[order]
+        self.bodies = [bodies[i] for i in order.tolist()]
+        self.body_index = {id(body): i for i, body in enumerate(self.bodies)}
+        self.node_start = node_start
+        self.node_end = node_end
+        self.node_left = node_left
+        self.node_right = node_right
+        node_count = len(node_start)
+        self.node_min = numpy.empty((node_count, 3))
+        self.node_max = numpy.empty((node_count, 3))
+        self.leaf_of = numpy.empty(count, dtype=numpy.int32)
+        for node in range(node_count):
+            node_positions = self.positions[node_start[node] : node_end[node]]
+            self.node_min[node] = node_positions.min(axis=0)
+            self.node_max[node] = node_positions.max(axis=0)
+            if node_left[node] is None:
+                self.leaf_of[node_start[node] : node_end[node]] = node
+        self.version = self.root.content_version
+        end = time()
+        print("Creation time:", end - start)
+
+    def add_node(self, node_start, node_end, node_left, node_right, first, last):
+        node_start.append(first)
+        node_end.append(last)
+        node_left.append(None)
+        node_right.append(None)
+        return len(node_start) - 1
+
+    def check_index(self):
+        if self.version != self.root.content_version:
+            self.rebuild()
+
+    def search_leaf(self, node, global_position, local_position, best, best_distance):
+        first = self.node_start[node]
+        last = self.node_end[node]
+        deltas = (self.global_positions[first:last] - global_position) + (
+            self.local_positions[first:last] - local_position
+        )
+        distances = numpy.einsum('ij,ij->i', deltas, deltas)
+        closest = numpy.argmin(distances)
+        distance = distances[closest]
+        if distance < best_distance:
+            return (first + closest, distance)
+        else:
+            return (best, best_distance)
+
+    def box_distance(self, node, position):
+        delta = numpy.maximum(self.node_min[node] - position, 0.0) + numpy.maximum(position - self.node_max[node], 0.0)
+        return delta.dot(delta)
+
+    def find_nearest(self, observer, previous=None):
+        """
+        Returns the body closest to the observer anchor. If previous is given, its neighbours are checked first to
+        start with a tight bound, as the nearest system rarely changes between two frames.
+        """
+        self.check_index()
+        if len(self.bodies) == 0:
+            return None
+        global_position = numpy.array(observer.get_absolute_reference_point())
+        local_position = numpy.array(observer.get_local_position())
+        position = global_position + local_position
+        best = None
+        best_distance = float('inf')
+        first_leaf = None
+        if previous is not None:
+            previous_index = self.body_index.get(id(previous))
+            if previous_index is not None:
+                first_leaf = self.leaf_of[previous_index]
+                (best, best_distance) = self.search_leaf(
+                    first_leaf, global_position, local_position, best, best_distance
+                )
+        visited = 0
+        stack = [(self.box_distance(0, position), 0)]
+        while stack:
+            (distance, node) = stack.pop()
+            visited += 1
+            if distance >= best_distance:
+                continue
+            left = self.node_left[node]
+            if left is None:
+                if node != first_leaf:
+                    (best, best_distance) = self.search_leaf(
+                        node, global_position, local_position, best, best_distance
+                    )
+                continue
+            right = self.node_right[node]
+            left_distance = self.box_distance(left, position)
+            right_distance = self.box_distance(right, position)
+            # Push the farthest child first so the closest one is explored first
+            if left_distance < right_distance:
+                stack.append((right_distance, right))
+                stack.append((left_distance, left))
+            else:
+                stack.append((left_distance, left))
+                stack.append((right_distance, right))
+        self.visited_pstat.set_level(visited)
+        return self.bodies[best]
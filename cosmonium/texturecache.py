@@ -0,0 +1,144 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import Texture, SamplerState, Filename
+import hashlib
+import os
+import threading
+
+from . import cache
+from . import settings
+
+
+class TextureCache:
+    """
+    Stores the decoded texture files as Panda3D txo files, with their mipmaps precomputed and optionally compressed,
+    so they can be uploaded directly without decoding the source image again.
+    The cache files are keyed by the source path and modification time and by the texture configuration.
+    The number of cache files is bounded, the least recently used are removed.
+    """
+
+    cache_version = 1
+    prefix = 'texture-'
+    extensions = ('.jpg', '.jpeg', '.png', '.tga', '.tif', '.tiff', '.bmp')
+
+    def __init__(self):
+        self.cache_path = None
+        self.prune_lock = threading.Lock()
+
+    def get_cache_path(self):
+        # Must be called from the main thread, the directory creation is not thread-safe
+        if self.cache_path is None:
+            self.cache_path = cache.create_path_for('textures')
+        return self.cache_path
+
+    def has_mipmaps(self, texture_config):
+        return texture_config is not None and SamplerState.is_mipmap(texture_config.minfilter)
+
+    def get_cache_filename(self, filename, alpha_filename, texture_config):
+        if not settings.texture_cache:
+            return None
+        try:
+            mtime = os.stat(filename).st_mtime_ns
+            if alpha_filename is not None:
+                alpha_mtime = os.stat(alpha_filename).st_mtime_ns
+            else:
+                alpha_mtime = None
+        except OSError:
+            return None
+        if texture_config is not None:
+            config_key = texture_config.get_cache_key()
+        else:
+            config_key = None
+        key = repr(
+            (
+                self.cache_version,
+                os.path.abspath(filename),
+                mtime,
+                os.path.abspath(alpha_filename) if alpha_filename is not None else None,
+                alpha_mtime,
+                config_key,
+                settings.texture_cache_compress,
+            )
+        )
+        name = self.prefix + hashlib.sha1(key.encode('utf-8')).hexdigest() + '.txo'
+        return os.path.join(self.get_cache_path(), name)
+
+    def load(self, cache_filename):
+        if not os.path.exists(cache_filename):
+            return None
+        texture = Texture()
+        if not texture.read(Filename.from_os_specific(cache_filename)):
+            print("Could not read cached texture", cache_filename)
+            return None
+        try:
+            # Mark the file as recently used so it is not pruned
+            os.utime(cache_filename)
+        except OSError:
+            pass
+        return texture
+
+    def prune(self):
+        with self.prune_lock:
+            cache.prune_files(self.get_cache_path(), self.prefix, settings.texture_cache_max_files)
+
+    def bake(self, texture, cache_filename, mipmaps, prune=True):
+        if mipmaps:
+            texture.generate_ram_mipmap_images()
+        if settings.texture_cache_compress:
+            texture.compress_ram_image()
+        # Write to a temporary file first to never leave a partial file in the cache, it is not matched by the prefix
+        (path, name) = os.path.split(cache_filename)
+        temp_filename = os.path.join(path, 'temp-{}-{}'.format(threading.get_ident(), name))
+        if texture.write(Filename.from_os_specific(temp_filename)):
+            os.replace(temp_filename, cache_filename)
+            if prune:
+                self.prune()
+        else:
+            print("Could not write cached texture", cache_filename)
+
+    def bake_file(self, filename, texture_config):
+        """
+        Converts the given texture file into the cache, returns True if a new cache file was created.
+        """
+        cache_filename = self.get_cache_filename(filename, None, texture_config)
+        if cache_filename is None or os.path.exists(cache_filename):
+            return False
+        texture = Texture()
+        if not texture.read(Filename.from_os_specific(filename)):
+            print("Could not read", filename)
+            return False
+        self.bake(texture, cache_filename, self.has_mipmaps(texture_config), prune=False)
+        return True
+
+    def bake_directory(self, path, texture_config):
+        baked = 0
+        found = 0
+        for root, dirs, files in os.walk(path):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in self.extensions:
+                    continue
+                found += 1
+                if self.bake_file(os.path.join(root, name), texture_config):
+                    baked += 1
+        return (found, baked)
+
+
+texture_cache = TextureCache()
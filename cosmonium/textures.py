@@ -18,7 +18,7 @@
 #
 
 import os
-from panda3d.core import TextureStage, Texture, LColor, PNMImage
+from panda3d.core import TextureStage, Texture, SamplerState, LColor, PNMImage
 
 from .dircontext import defaultDirContext
 from .utils import TransparencyBlend
@@ -70,6 +70,11 @@ class TextureConfiguration:
         self.apply(texture)
         return texture
 
+    def get_cache_key(self):
+        # Only the parameters that change the content of the texture are relevant, the sampler state is applied
+        # after the texture is loaded
+        return (SamplerState.is_mipmap(self.minfilter), self.format)
+
     def apply(self, texture):
         if self.format is not None:
             texture.set_format(self.format)
@@ -331,9 +336,9 @@ class TextureFileSource(TextureSource):
             filename = self.context.find_texture(self.filename)
             if filename is not None:
                 if settings.sync_texture_load:
-                    texture = workers.syncTextureLoader.load_texture(filename)
+                    texture = workers.syncTextureLoader.load_texture(filename, None, texture_config)
                 else:
-                    texture = await workers.asyncTextureLoader.load_texture(filename, None)
+                    texture = await workers.asyncTextureLoader.load_texture(filename, None, texture_config)
                 if texture is not None:
                     if texture_config is not None:
                         texture_config.apply(texture)
@@ -734,9 +739,9 @@ class VirtualTextureSource(TextureSource):
             alpha_filename = self.context.find_texture(alpha_tex_name)
             if filename is not None:
                 if settings.sync_texture_load:
-                    texture = workers.syncTextureLoader.load_texture(filename, alpha_filename)
+                    texture = workers.syncTextureLoader.load_texture(filename, alpha_filename, texture_config)
                 else:
-                    texture = await workers.asyncTextureLoader.load_texture(filename, alpha_filename)
+                    texture = await workers.asyncTextureLoader.load_texture(filename, alpha_filename, texture_config)
                 if texture is not None:
                     if texture_config is not None:
                         texture_config.apply(texture)
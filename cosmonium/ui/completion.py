@@ -0,0 +1,170 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from collections import OrderedDict
+import builtins
+import heapq
+
+from ..astro import bayer
+from ..workers import AsyncLoader
+from .. import settings
+
+
+class CompletionQuery:
+    def __init__(self, text):
+        self.text = text
+        self.cancelled = False
+        self.future = None
+
+
+class ObjectsCompletion:
+    """
+    Searches the names of the objects database in a background thread and returns the best matches, ranked by match
+    quality then by apparent magnitude.
+    The worker keeps its own copy of the names, updated with the changes of the database before each search.
+    The substring matches of the last queries are cached, so extending a query only filters the previous matches.
+    """
+
+    EXACT = 0
+    PREFIX = 1
+    ALIAS = 2
+    SUBSTRING = 3
+
+    chunk_size = 5000
+    cache_size = 16
+
+    def __init__(self, objects_db):
+        self.objects_db = objects_db
+        self.loader = None
+        self.query = None
+        # Only accessed from the worker thread
+        self.names = {}
+        self.entries = None
+        self.cache = OrderedDict()
+
+    def get_loader(self):
+        if self.loader is None:
+            self.loader = AsyncLoader(builtins.base, 'completion')
+        return self.loader
+
+    def cancel(self):
+        if self.query is not None:
+            self.query.cancelled = True
+            self.query.future.cancel()
+            self.query = None
+
+    def complete(self, text):
+        """
+        Starts the search of text and cancels the previous one. Returns a future holding the list of
+        (name, object) tuples.
+        """
+        self.cancel()
+        query = CompletionQuery(text)
+        query.future = self.get_loader().add_job(self.search, [query])
+        self.query = query
+        return query.future
+
+    def get_alias(self, text):
+        """
+        Returns the catalogue form of a Bayer designation, e.g. 'Alpha Cen' or 'alp cen' gives 'ALF CEN'.
+        """
+        (first, sep, rest) = text.strip().partition(' ')
+        alias = bayer.canonize_name(bayer.encode_name(first.capitalize() + sep + rest).upper())
+        if alias != text.upper():
+            return alias
+        else:
+            return None
+
+    def update_names(self):
+        (names, changes) = self.objects_db.pop_names_changes()
+        if names is not None:
+            self.names = names
+            self.entries = None
+            self.cache.clear()
+        elif changes:
+            for key, body in changes:
+                if body is not None:
+                    self.names[key] = body
+                else:
+                    self.names.pop(key, None)
+            self.entries = None
+            # Update the cached matches instead of dropping them, the streamed catalogues modify the names constantly
+            updated = {key: self.names.get(key) for key, body in changes}
+            for text, matches in self.cache.items():
+                matches[:] = [entry for entry in matches if entry[0] not in updated]
+                matches += [(key, body) for key, body in updated.items() if body is not None and text in key]
+
+    def find_substring(self, query, text):
+        for i in range(len(text), 0, -1):
+            candidates = self.cache.get(text[:i])
+            if candidates is not None:
+                self.cache.move_to_end(text[:i])
+                break
+        else:
+            if self.entries is None:
+                self.entries = list(self.names.items())
+            candidates = self.entries
+        matches = []
+        for start in range(0, len(candidates), self.chunk_size):
+            if query.cancelled:
+                return None
+            matches += [entry for entry in candidates[start : start + self.chunk_size] if text in entry[0]]
+        self.cache[text] = matches
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return matches
+
+    def rank(self, key, text, alias):
+        if key == text or key == alias:
+            return self.EXACT
+        elif key.startswith(text):
+            return self.PREFIX
+        elif (alias is not None and key.startswith(alias)) or (' ' + text) in key:
+            return self.ALIAS
+        else:
+            return self.SUBSTRING
+
+    def search(self, query):
+        self.update_names()
+        text = query.text.upper()
+        alias = self.get_alias(query.text)
+        matches = self.find_substring(query, text)
+        if matches is None:
+            return None
+        if alias is not None:
+            alias_matches = self.find_substring(query, alias)
+            if alias_matches is None:
+                return None
+            matches = matches + alias_matches
+        # Keep only the best matching name of each object
+        best = {}
+        for key, body in matches:
+            rank = self.rank(key, text, alias)
+            previous = best.get(id(body))
+            if previous is None or rank < previous[0] or (rank == previous[0] and key < previous[1]):
+                best[id(body)] = (rank, key, body)
+        if query.cancelled:
+            return None
+        ranked = heapq.nsmallest(
+            settings.query_max_results,
+            best.values(),
+            key=lambda entry: (entry[0], entry[2].get_app_magnitude(), entry[1]),
+        )
+        return [(body.get_exact_name(key), body) for (rank, key, body) in ranked]
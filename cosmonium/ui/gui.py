@@ -29,6 +29,7 @@ from .. import version
 # TODO: should only be used by Cosmonium main class
 from ..parsers.configparser import configParser
 
+from .completion import ObjectsCompletion
 from .jinja import JinjaEnv
 from .loader import UIConfigLoader
 from .shortcuts import Shortcuts
@@ -127,6 +128,7 @@ class Gui(object):
 
         self.hud = Huds(self, ui_config.hud, ui_config.dock, self.env, self.skin)
         self.query = Query('query', self.cosmonium.p2dBottomLeft, 0, settings.query_delay, owner=self)
+        self.objects_completion = ObjectsCompletion(objectsDB)
         self.opened_windows = []
         self.browser = Browser(owner=self)
         self.editor = ObjectEditorWindow(owner=self)
@@ -225,10 +227,11 @@ class Gui(object):
         result = objectsDB.get(name)
         return result
 
-    def list_objects(self, prefix):
-        result = objectsDB.startswith(prefix)
-        result.sort(key=lambda x: x[0])
-        return result
+    def complete_objects(self, text):
+        return self.objects_completion.complete(text)
+
+    def cancel_complete_objects(self):
+        self.objects_completion.cancel()
 
     def open_find_object(self):
         self.query.open_query(self)
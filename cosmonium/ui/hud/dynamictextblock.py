@@ -19,6 +19,10 @@
 
 
 from abc import ABC, abstractmethod
+from direct.showbase.ShowBaseGlobal import globalClock
+from panda3d.core import PStatCollector
+
+from ... import settings
 from .textblock import TextBlock
 
 
@@ -34,57 +38,81 @@ class DynamicTextBlockEntryInterface(ABC):
     def has_entries(self) -> bool: ...
 
 
-class DynamicTextBlockEntry(DynamicTextBlockEntryInterface):
+class DynamicTextBlockConditionMixin:
+    """
+    The result of the condition is kept until one of the values it depends on changes.
+    """
+
+    def compile_condition(self, env):
+        self.env = env
+        if self.condition_source is not None:
+            self.condition = env.compile_expression(self.condition_source)
+        else:
+            self.condition = lambda: True
+        self.valid = None
+        self.condition_dependencies = None
+
+    def is_valid(self) -> bool:
+        if self.condition_dependencies is None or self.condition_dependencies.changed():
+            (self.valid, self.condition_dependencies) = self.env.evaluate(self.condition)
+        return self.valid
+
+
+class DynamicTextBlockEntry(DynamicTextBlockConditionMixin, DynamicTextBlockEntryInterface):
     def __init__(self, condition_source, title, text_source):
         self.condition_source = condition_source
         self.title = title
         self.text_source = text_source
         self.condition = None
         self.template = None
+        self.text = None
+        self.text_dependencies = None
 
     def compile(self, env):
-        if self.condition_source is not None:
-            self.condition = env.compile_expression(self.condition_source)
-        else:
-            self.condition = lambda: True
+        self.compile_condition(env)
         self.template = env.create_template(self.text_source)
+        self.text = None
+        self.text_dependencies = None
 
     def has_entries(self) -> bool:
         return False
 
-    def is_valid(self) -> bool:
-        return self.condition()
-
     def render(self) -> str:
-        return self.template.render()
+        if self.text_dependencies is None or self.text_dependencies.changed():
+            (text, self.text_dependencies) = self.env.evaluate(self.template.render)
+            if self.title is None:
+                self.text = text
+            else:
+                self.text = self.title + ": " + text
+        return self.text
 
 
-class DynamicTextBlockEntries(DynamicTextBlockEntryInterface):
+class DynamicTextBlockEntries(DynamicTextBlockConditionMixin, DynamicTextBlockEntryInterface):
     def __init__(self, condition_source, entries):
         self.condition_source = condition_source
         self.entries = entries
         self.condition = None
 
     def compile(self, env):
-        if self.condition_source is not None:
-            self.condition = env.compile_expression(self.condition_source)
-        else:
-            self.condition = lambda: True
+        self.compile_condition(env)
         for entry in self.entries:
             entry.compile(env)
 
     def has_entries(self) -> bool:
         return True
 
-    def is_valid(self) -> bool:
-        return self.condition()
-
 
 class DynamicTextBlock(TextBlock):
+    nb_blocks = 0
+
     def __init__(self, id_, align, down, count, entries, owner=None):
         TextBlock.__init__(self, id_, align, down, count, owner)
         self.entries = entries
         self._cursor = 0
+        self.last_update = None
+        DynamicTextBlock.nb_blocks += 1
+        name = id_ if id_ is not None else 'block-%d' % DynamicTextBlock.nb_blocks
+        self.render_pstat = PStatCollector('HUD:' + name)
 
     def compile(self, env):
         for entry in self.entries:
@@ -96,10 +124,7 @@ class DynamicTextBlock(TextBlock):
                 if entry.has_entries():
                     self._update(entry.entries)
                 else:
-                    if entry.title is None:
-                        text = entry.render()
-                    else:
-                        text = entry.title + ": " + entry.render()
+                    text = entry.render()
                     if self._cursor == self.count:
                         line = self.create_line(self._cursor)
                         self.instances.append(line)
@@ -110,7 +135,17 @@ class DynamicTextBlock(TextBlock):
                     self._cursor += 1
 
     def update(self):
+        now = globalClock.get_real_time()
+        if (
+            self.last_update is not None
+            and settings.hud_max_update_rate is not None
+            and now - self.last_update < 1.0 / settings.hud_max_update_rate
+        ):
+            return
+        self.last_update = now
+        self.render_pstat.start()
         self._cursor = 0
         self._update(self.entries)
         for i in range(self._cursor, self.count):
             self.set(i, "")
+        self.render_pstat.stop()
@@ -68,9 +68,13 @@ class Query(HUDObject):
         self.suggestions = None
         self.current_selection = None
         self.current_list = []
+        self.cancel_completion()
+
+    def cancel_completion(self):
         if self.completion_task is not None:
             taskMgr.remove(self.completion_task)
             self.completion_task = None
+        self.owner.cancel_complete_objects()
 
     def escape(self, event):
         self.close()
@@ -94,17 +98,32 @@ class Query(HUDObject):
         self.suggestions.setText(suggestions)
 
     def completion(self, event):
+        # The search is only started once the user stops typing
+        self.cancel_completion()
+        self.completion_task = taskMgr.doMethodLater(
+            self.query_delay, self.start_completion, 'completion task', extraArgs=[]
+        )
+
+    def start_completion(self):
         text = self.query.get()
         if text != '':
-            self.current_list = self.owner.list_objects(text)
+            future = self.owner.complete_objects(text)
+            self.completion_task = taskMgr.add(self.completion_result(future), 'completion result')
         else:
-            self.current_list = []
+            self.completion_task = None
+            self.set_suggestions([])
+
+    async def completion_result(self, future):
+        result = await future
+        self.completion_task = None
+        # The query is cancelled when the search is aborted
+        if result is not None:
+            self.set_suggestions(result)
+
+    def set_suggestions(self, suggestions):
+        self.current_list = suggestions
         self.current_selection = None
-        if self.completion_task is not None:
-            taskMgr.remove(self.completion_task)
-        self.completion_task = taskMgr.doMethodLater(
-            self.query_delay, self.update_suggestions, 'completion task', extraArgs=[]
-        )
+        self.update_suggestions()
 
     def select(self, event):
         modifiers = event.getModifierButtons()
@@ -289,10 +289,84 @@ class TimeProvider:
         return self.engine.time.running
 
 
+class Dependencies:
+    """
+    Values of the providers read and results of the provider methods called during the evaluation of an expression
+    or a template.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.calls = []
+
+    def record(self, provider, attr, value):
+        self.values[(provider, attr)] = value
+
+    def record_call(self, provider, attr, args, kwargs, result):
+        self.calls.append((provider, attr, args, kwargs, result))
+
+    def changed(self):
+        for (provider, attr), value in self.values.items():
+            try:
+                current = getattr(provider, attr)
+            except Exception:
+                return True
+            if current is not value and current != value:
+                return True
+        # The methods can read any global state, they are called again to check if their result changed
+        for provider, attr, args, kwargs, result in self.calls:
+            try:
+                current = getattr(provider, attr)(*args, **kwargs)
+            except Exception:
+                return True
+            if current is not result and current != result:
+                return True
+        return False
+
+
+class TrackedMethod:
+    """
+    Wrapper of a provider method recording in the dependencies the arguments and the result of each call.
+    """
+
+    def __init__(self, provider, attr, method, dependencies):
+        self._provider = provider
+        self._attr = attr
+        self._method = method
+        self._dependencies = dependencies
+
+    def __call__(self, *args, **kwargs):
+        result = self._method(*args, **kwargs)
+        self._dependencies.record_call(self._provider, self._attr, args, kwargs, result)
+        return result
+
+
+class TrackedProvider:
+    """
+    Wrapper of a provider recording in the current dependencies the values of the properties read through it and
+    the results of the methods called through it.
+    """
+
+    def __init__(self, provider, env):
+        self._provider = provider
+        self._env = env
+
+    def __getattr__(self, attr):
+        value = getattr(self._provider, attr)
+        dependencies = self._env.dependencies
+        if dependencies is not None:
+            if callable(value):
+                value = TrackedMethod(self._provider, attr, value, dependencies)
+            else:
+                dependencies.record(self._provider, attr, value)
+        return value
+
+
 class JinjaEnv:
     def __init__(self, engine, gui):
         self.env = jinja2.Environment()
-        self.env.globals = {
+        self.dependencies = None
+        providers = {
             'autopilot': AutopilotProvider(engine),
             'bodies': BodiesProvider(),
             'camera': CameraProvider(engine),
@@ -308,6 +382,20 @@ class JinjaEnv:
             'time': TimeProvider(engine),
             'units': UnitsProvider(),
         }
+        self.env.globals = {name: TrackedProvider(provider, self) for name, provider in providers.items()}
+
+    def evaluate(self, func):
+        """
+        Calls func and returns its result and the dependencies recorded during the call.
+        """
+        previous = self.dependencies
+        dependencies = Dependencies()
+        self.dependencies = dependencies
+        try:
+            result = func()
+        finally:
+            self.dependencies = previous
+        return (result, dependencies)
 
     def compile_expression(self, source: str):
         try:
@@ -17,6 +17,8 @@
 # along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from itertools import chain
+import numpy
 from panda3d.core import LColor
 from panda3d.core import ColorBlendAttrib
 
@@ -27,6 +29,11 @@ def join_names(names):
     return ' / '.join(names)
 
 
+def vectors_to_array(vectors, size, dtype=numpy.float64):
+    # Iterating over the components is much faster than letting numpy convert each Panda3D vector
+    return numpy.fromiter(chain.from_iterable(vectors), dtype, count=len(vectors) * size).reshape(-1, size)
+
+
 def mag_to_scale(magnitude):
     if magnitude > settings.lowest_app_magnitude:
         return 0.0
@@ -37,6 +44,15 @@ def mag_to_scale(magnitude):
     )
 
 
+def mag_to_scale_array(magnitudes):
+    scales = settings.min_mag_scale + (1 - settings.min_mag_scale) * (settings.lowest_app_magnitude - magnitudes) / (
+        settings.lowest_app_magnitude - settings.max_app_magnitude
+    )
+    scales[magnitudes < settings.max_app_magnitude] = 1.0
+    scales[magnitudes > settings.lowest_app_magnitude] = 0.0
+    return scales
+
+
 def mag_to_scale_nolimit(magnitude):
     if magnitude > settings.lowest_app_magnitude:
         return 0.0
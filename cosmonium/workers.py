@@ -18,11 +18,16 @@
 #
 
 import builtins
+from concurrent.futures import ThreadPoolExecutor
 from direct.stdpy import threading
 from direct.task.Task import Task
-from panda3d.core import AsyncFuture, Texture, Filename
+from panda3d.core import AsyncFuture, Texture, TexturePool, Filename, PNMImage, PNMFileTypeRegistry
+import os
 from queue import Queue, Empty
+from time import perf_counter
 
+from .pstats import levelpstat
+from .texturecache import texture_cache
 from . import settings
 
 # These will be initialized in cosmonium base class
@@ -128,18 +133,99 @@ class AsyncLoader:
         return Task.cont
 
 
+class TextureArrayLoader:
+    """
+    Decodes all the pages of a texture array concurrently into images, converts them to the same size and format and
+    assembles the final texture with a single RAM image.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.load_time_pstat = levelpstat('load-time', 'TextureArray')
+        self.pages_pstat = levelpstat('pages', 'TextureArray')
+
+    def read_image(self, filename):
+        image = PNMImage()
+        if PNMFileTypeRegistry.get_global_ptr().get_type_from_extension(filename.get_fullpath()) is not None:
+            if image.read(filename):
+                return image
+        else:
+            # Formats not supported by PNMImage (dds, ktx, txo, ...) are decoded by Texture
+            page = Texture()
+            if page.read(filename) and page.store(image):
+                return image
+        return None
+
+    def read_page(self, texture):
+        filename = texture.source.texture_filename(None)
+        if filename is not None:
+            image = self.read_image(Filename.from_os_specific(filename))
+            if image is not None:
+                return image
+            print("Could not read", filename)
+        else:
+            print("Could not find", texture.source.texture_name(None))
+        return texture.create_default_image()
+
+    def normalize_page(self, image, width, height, nb_channels, maxval):
+        if image.get_x_size() != width or image.get_y_size() != height:
+            resized = PNMImage(width, height, image.get_num_channels(), image.get_maxval())
+            resized.quick_filter_from(image)
+            image = resized
+        if image.get_num_channels() != nb_channels:
+            image.set_num_channels(nb_channels)
+        if image.get_maxval() != maxval:
+            image.set_maxval(maxval)
+        page = Texture()
+        page.load(image)
+        return page
+
+    def load(self, textures):
+        start = perf_counter()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.texture_array_load_threads, thread_name_prefix='TextureArrayLoader'
+            )
+        images = list(self.executor.map(self.read_page, textures))
+        width = max(image.get_x_size() for image in images)
+        height = max(image.get_y_size() for image in images)
+        nb_channels = max(image.get_num_channels() for image in images)
+        maxval = max(image.get_maxval() for image in images)
+        pages = list(
+            self.executor.map(lambda image: self.normalize_page(image, width, height, nb_channels, maxval), images)
+        )
+        tex = Texture()
+        tex.setup_2d_texture_array(width, height, len(pages), pages[0].get_component_type(), pages[0].get_format())
+        tex.set_ram_image(b''.join(page.get_ram_image().get_data() for page in pages))
+        load_time = (perf_counter() - start) * 1000
+        self.load_time_pstat.set_level(load_time)
+        self.pages_pstat.set_level(len(pages))
+        if settings.debug_tex_loading:
+            print("Texture array of {} pages ({}x{}) loaded in {:.1f}ms".format(len(pages), width, height, load_time))
+        return tex
+
+
+texture_array_loader = TextureArrayLoader()
+
+
 class AsyncTextureLoader(AsyncLoader):
 
     def __init__(self, base):
         AsyncLoader.__init__(self, base, 'TextureLoader')
 
-    async def load_texture(self, filename, alpha_filename):
-        return await self.add_job(self.do_load_texture, [filename, alpha_filename])
+    async def load_texture(self, filename, alpha_filename, texture_config=None):
+        cache_filename = texture_cache.get_cache_filename(filename, alpha_filename, texture_config)
+        mipmaps = texture_cache.has_mipmaps(texture_config)
+        return await self.add_job(self.do_load_texture, [filename, alpha_filename, cache_filename, mipmaps])
 
     async def load_texture_array(self, textures):
         return await self.add_job(self.do_load_texture_array, [textures])
 
-    def do_load_texture(self, filename, alpha_filename):
+    def do_load_texture(self, filename, alpha_filename, cache_filename=None, mipmaps=False):
+        if cache_filename is not None:
+            tex = texture_cache.load(cache_filename)
+            if tex is not None:
+                return tex
         tex = Texture()
         panda_filename = Filename.from_os_specific(filename)
         if alpha_filename is not None:
@@ -152,9 +238,13 @@ class AsyncTextureLoader(AsyncLoader):
             primary_file_num_channels=0,
             alpha_file_channel=0,
         )
+        if cache_filename is not None:
+            texture_cache.bake(tex, cache_filename, mipmaps)
         return tex
 
     def do_load_texture_array(self, textures):
+        if settings.texture_array_parallel_load:
+            return texture_array_loader.load(textures)
         tex = Texture()
         tex.setup_2d_texture_array(len(textures))
         for page, texture in enumerate(textures):
@@ -171,7 +261,14 @@ class AsyncTextureLoader(AsyncLoader):
 
 class SyncTextureLoader:
 
-    def load_texture(self, filename, alpha_filename=None):
+    def load_texture(self, filename, alpha_filename=None, texture_config=None):
+        cache_filename = texture_cache.get_cache_filename(filename, alpha_filename, texture_config)
+        if cache_filename is not None and os.path.exists(cache_filename):
+            # Load the cached texture through the pool so that it is shared like the textures loaded by the loader
+            texture = TexturePool.load_texture(Filename.from_os_specific(cache_filename))
+            if texture is not None:
+                return texture
+            print("Could not read cached texture", cache_filename)
         texture = None
         try:
             panda_filename = Filename.from_os_specific(filename).get_fullpath()
@@ -182,9 +279,14 @@ class SyncTextureLoader:
             texture = builtins.base.loader.loadTexture(panda_filename, alphaPath=panda_alpha_filename)
         except IOError:
             print("Could not load texture", filename)
+        if texture is not None and cache_filename is not None:
+            # The texture is shared through the TexturePool, the mipmaps and compression must not alter it
+            texture_cache.bake(texture.make_copy(), cache_filename, texture_cache.has_mipmaps(texture_config))
         return texture
 
     def load_texture_array(self, textures):
+        if settings.texture_array_parallel_load:
+            return texture_array_loader.load(textures)
         tex = Texture()
         tex.setup_2d_texture_array(len(textures))
         for page, texture in enumerate(textures):
@@ -45,8 +45,7 @@ from direct.showbase.PythonUtil import clamp
 from direct.showbase.ShowBaseGlobal import globalClock
 from direct.task.TaskManagerGlobal import taskMgr
 from math import pow, pi
-from panda3d.core import LPoint3d, LQuaterniond, LQuaternion, BitMask32, NodePath
-from panda3d.bullet import BulletHeightfieldShape, BulletRigidBodyNode, ZUp
+from panda3d.core import LPoint3, LPoint3d, LQuaterniond, LQuaternion, LVector3, BitMask32, NodePath
 
 from cosmonium.astro import units
 from cosmonium.camera import CameraHolder, EventsControllerBase
@@ -54,6 +53,7 @@ from cosmonium.controllers.controllers import FlatSurfaceBodyMover, CartesianBod
 from cosmonium.cosmonium import CosmoniumBase
 from cosmonium.engine.c_settings import c_settings
 from cosmonium.foundation import BaseObject
+from cosmonium.lodscheduler import lod_scheduler
 from cosmonium.nav import ControlNav, KineticNav
 from cosmonium.parsers.actorobjectparser import ActorObjectYamlParser
 from cosmonium.parsers.bulletparser import BulletPhysicsShapeYamlParser
@@ -121,6 +121,7 @@ class PhysicsLayer(PatchLayer):
     def __init__(self, physics):
         self.physics = physics
         self.instance = None
+        self.registered = False
 
     def patch_done(self, patch, early):
         if early:
@@ -132,27 +133,37 @@ class PhysicsLayer(PatchLayer):
         patch_scale = patch.get_scale()
         assert heightmap_patch.width == heightmap_patch.height
         assert patch_scale[0] == patch_scale[1]
-        shape = BulletHeightfieldShape(heightmap_patch.texture, heightmap.max_height * terrain_scale[2], ZUp)
-        shape.setUseDiamondSubdivision(True)
-        self.instance = NodePath(BulletRigidBodyNode('Heightfield ' + patch.str_id()))
-        self.instance.node().add_shape(shape)
         x = terrain_scale[0] * (patch.x0 + patch.x1) / 2.0
         y = terrain_scale[1] * (patch.y0 + patch.y1) / 2.0
-        self.instance.set_pos(x, y, heightmap.max_height / 2 * terrain_scale[2])
-        self.instance.set_scale(
+        position = LPoint3(x, y, heightmap.max_height / 2 * terrain_scale[2])
+        scale = LVector3(
             terrain_scale[0] * patch_scale[0] / (heightmap_patch.width - 1),
             terrain_scale[1] * patch_scale[1] / (heightmap_patch.height - 1),
             1,
         )
-        self.instance.setCollideMask(BitMask32.allOn())
-        self.physics.add_object(self, self.instance)
+        bounds = (
+            terrain_scale[0] * patch.x0,
+            terrain_scale[1] * patch.y0,
+            terrain_scale[0] * patch.x1,
+            terrain_scale[1] * patch.y1,
+        )
+        # The collider is created asynchronously, and only if a physics entity is near the patch
+        self.physics.add_heightfield(
+            self,
+            'Heightfield ' + patch.str_id(),
+            heightmap_patch.texture,
+            heightmap.max_height * terrain_scale[2],
+            position,
+            scale,
+            bounds,
+        )
+        self.registered = True
 
     def remove_instance(self):
-        if self.instance is None:
+        if not self.registered:
             return
-        self.physics.remove_object(self, self.instance)
-        self.instance.remove_node()
-        self.instance = None
+        self.physics.remove_heightfield(self)
+        self.registered = False
 
 
 class PhysicsLayerFactory(TerrainLayerFactoryInterface):
@@ -260,7 +271,9 @@ class RalphConfigParser(YamlModuleParser):
             engine_name = physics.get('engine', 'bullet')
             gravity = physics.get('gravity', 9.81)
             if engine_name == 'bullet':
-                engine = BulletPhysics(debug)
+                heightfield_radius = physics.get('heightfield-radius', 1000.0)
+                heightfield_pool_size = physics.get('heightfield-pool-size', 64)
+                engine = BulletPhysics(debug, heightfield_radius, heightfield_pool_size)
             else:
                 engine = CollisionPhysics()
             model = physics.get('model', None)
@@ -717,6 +730,7 @@ class RoamingRalphDemo(CosmoniumBase):
 
     def update_lod_task(self, task):
         self.worlds.update_lod(self.observer)
+        lod_scheduler.process()
         return task.cont
 
     def update_instances_task(self, task):
@@ -20,6 +20,8 @@
 #include "orbits.h"
 #include "kepler.h"
 #include "astro.h"
+#include "lightMutexHolder.h"
+#include <math.h>
 
 TypeHandle OrbitBase::_type_handle;
 
@@ -359,3 +361,99 @@ FunctionOrbit::get_bounding_radius(void)
 {
   return bounding_radius;
 }
+
+TypeHandle CachedFunctionOrbit::_type_handle;
+
+CachedFunctionOrbit::CachedFunctionOrbit(FunctionOrbit *orbit, double window) :
+  FunctionOrbit(*orbit),
+  orbit(orbit),
+  window(window)
+{
+}
+
+CachedFunctionOrbit::CachedFunctionOrbit(CachedFunctionOrbit const &other) :
+  FunctionOrbit(other),
+  orbit(other.orbit),
+  window(other.window),
+  segments(other.segments)
+{
+}
+
+PT(OrbitBase)
+CachedFunctionOrbit::make_copy(void) const
+{
+  return new CachedFunctionOrbit(*this);
+}
+
+FunctionOrbit *
+CachedFunctionOrbit::get_orbit(void)
+{
+  return orbit;
+}
+
+double
+CachedFunctionOrbit::get_window(void)
+{
+  LightMutexHolder holder(lock);
+  return window;
+}
+
+void
+CachedFunctionOrbit::set_window(double window)
+{
+  LightMutexHolder holder(lock);
+  this->window = window;
+  segments.clear();
+}
+
+bool
+CachedFunctionOrbit::add_segment(double window, double start, double end, PTA_LVecBase3d coefs)
+{
+  LightMutexHolder holder(lock);
+  // The segment was fitted for a previous window
+  if (window != this->window) {
+    return false;
+  }
+  Segment segment;
+  segment.mid = (end + start) / 2.0;
+  segment.half_span = (end - start) / 2.0;
+  segment.coefs = coefs;
+  segments[(long) floor(start / window + 0.5)] = segment;
+  return true;
+}
+
+bool
+CachedFunctionOrbit::has_segment(double time)
+{
+  LightMutexHolder holder(lock);
+  return segments.find((long) floor(time / window)) != segments.end();
+}
+
+LPoint3d
+CachedFunctionOrbit::get_frame_position_at(double time)
+{
+  {
+    LightMutexHolder holder(lock);
+    pmap<long, Segment>::const_iterator it = segments.find((long) floor(time / window));
+    if (it != segments.end()) {
+      // Clenshaw evaluation of the Chebyshev series
+      Segment const &segment = it->second;
+      double x = (time - segment.mid) / segment.half_span;
+      LVecBase3d b1(0.0), b2(0.0);
+      for (int k = (int) segment.coefs.size() - 1; k >= 1; --k) {
+        LVecBase3d b0 = segment.coefs[k] + b1 * (2.0 * x) - b2;
+        b2 = b1;
+        b1 = b0;
+      }
+      return LPoint3d(segment.coefs[0] + b1 * x - b2);
+    }
+  }
+  // The segment is not fitted yet
+  return orbit->get_frame_position_at(time);
+}
+
+LQuaterniond
+CachedFunctionOrbit::get_frame_rotation_at(double time)
+{
+  return orbit->get_frame_rotation_at(time);
+}
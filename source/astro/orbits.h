@@ -23,6 +23,9 @@
 #include "referenceCount.h"
 #include "pandabase.h"
 #include "luse.h"
+#include "lightMutex.h"
+#include "pmap.h"
+#include "pta_LVecBase3d.h"
 #include"type_utils.h"
 
 #include "frames.h"
@@ -260,6 +263,49 @@ protected:
   double bounding_radius;
 };
 
+class CachedFunctionOrbit : public FunctionOrbit
+{
+PUBLISHED:
+  CachedFunctionOrbit(FunctionOrbit *orbit, double window);
+
+protected:
+  CachedFunctionOrbit(CachedFunctionOrbit const &other);
+
+PUBLISHED:
+  virtual PT(OrbitBase) make_copy(void) const;
+
+  FunctionOrbit *get_orbit(void);
+  MAKE_PROPERTY(orbit, get_orbit);
+
+  double get_window(void);
+  void set_window(double window);
+
+  bool add_segment(double window, double start, double end, PTA_LVecBase3d coefs);
+
+  bool has_segment(double time);
+
+  virtual LPoint3d get_frame_position_at(double time);
+
+  virtual LQuaterniond get_frame_rotation_at(double time);
+
+  MAKE_TYPE("CachedFunctionOrbit", FunctionOrbit);
+
+protected:
+  class Segment
+  {
+  public:
+    double mid;
+    double half_span;
+    PTA_LVecBase3d coefs;
+  };
+
+  PT(FunctionOrbit) orbit;
+  // The window and the segments are only accessed with the lock held, the segments are fitted by a worker thread
+  LightMutex lock;
+  double window;
+  pmap<long, Segment> segments;
+};
+
 #include "orbits.I"
 
 #endif
@@ -0,0 +1,67 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import numpy
+import pytest
+
+from cosmonium.astro.blackbody import BlackbodyColorTable, temp_to_RGB
+from cosmonium.utils import srgb_to_linear
+from cosmonium import settings
+
+# Largest interpolation error of the table, reached at the 6600 K branch change
+tolerance = 0.01
+
+
+def scalar_temperatures(kelvins):
+    # The python fallback of temp_to_RGB floors the temperature to 100 K
+    if temp_to_RGB.__module__.endswith('pyastro.blackbody'):
+        return kelvins // 100 * 100
+    return kelvins
+
+
+def scalar_colors(kelvins, linear):
+    colors = []
+    for kelvin in kelvins.tolist():
+        color = temp_to_RGB(kelvin)
+        if linear:
+            color = srgb_to_linear(color)
+        colors.append(tuple(color))
+    return numpy.array(colors)
+
+
+@pytest.mark.parametrize('use_srgb', (True, False))
+@pytest.mark.parametrize('linear', (True, False))
+def test_table_matches_temp_to_RGB(monkeypatch, use_srgb, linear):
+    monkeypatch.setattr(settings, 'use_srgb', use_srgb)
+    table = BlackbodyColorTable()
+    rng = numpy.random.default_rng(0)
+    kelvins = scalar_temperatures(rng.uniform(1000.0, 100000.0, 20000))
+    colors = table.temp_to_RGB_array(kelvins, linear)
+    assert colors.shape == (len(kelvins), 4)
+    assert numpy.abs(colors - scalar_colors(kelvins, linear)).max() <= tolerance
+
+
+@pytest.mark.parametrize('linear', (True, False))
+def test_table_is_exact_on_samples(monkeypatch, linear):
+    monkeypatch.setattr(settings, 'use_srgb', True)
+    table = BlackbodyColorTable()
+    kelvins = numpy.arange(1000.0, 100000.0, 100.0)
+    colors = table.temp_to_RGB_array(kelvins, linear)
+    assert numpy.abs(colors - scalar_colors(kelvins, linear)).max() <= 1e-6
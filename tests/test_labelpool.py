@@ -0,0 +1,65 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import NodePath
+
+from cosmonium.foundation import LabelNodePool, ObjectLabel
+from cosmonium.components.annotations.background_label import BackgroundLabel
+from cosmonium.components.annotations.body_label import StellarBodyLabel
+
+
+def make_entry():
+    instance = NodePath('label-holder')
+    label_instance = instance.attach_new_node('labelcard')
+    return (instance, label_instance, None, label_instance.node(), None)
+
+
+def test_released_entries_are_reused():
+    pool = LabelNodePool()
+    pool.set_config(('font', True))
+    entry = make_entry()
+    pool.release(entry, ('font', True))
+    assert pool.acquire() is entry
+    assert pool.acquire() is None
+
+
+def test_config_change_clears_pool():
+    pool = LabelNodePool()
+    pool.set_config(('font', True))
+    entry = make_entry()
+    pool.release(entry, ('font', True))
+    pool.set_config(('other-font', True))
+    assert pool.acquire() is None
+    assert entry[0].is_empty()
+
+
+def test_stale_entries_are_not_pooled():
+    pool = LabelNodePool()
+    pool.set_config(('other-font', False))
+    entry = make_entry()
+    pool.release(entry, ('font', True))
+    assert pool.acquire() is None
+    assert entry[0].is_empty()
+
+
+def test_each_label_class_has_its_own_pool():
+    pools = [ObjectLabel.get_pool(), BackgroundLabel.get_pool(), StellarBodyLabel.get_pool()]
+    assert len(set(id(pool) for pool in pools)) == 3
+    assert ObjectLabel.get_pool() is pools[0]
@@ -0,0 +1,102 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from cosmonium.lodscheduler import LodOperation, LodScheduler
+from cosmonium import settings
+
+
+class QuadTreeNode:
+    def __init__(self, patch, apparent_size, density=16):
+        self.patch = patch
+        self.apparent_size = apparent_size
+        self.density = density
+
+    def can_merge_children(self):
+        return True
+
+
+class Patch:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = []
+        self.quadtree_node = None
+
+
+class RecordingShape:
+    def __init__(self):
+        self.operations = []
+
+    def show_patch_lod(self, patch, to_show, update):
+        self.operations.append((LodOperation.SHOW, patch))
+
+    def split_patch_lod(self, patch, to_show, update):
+        self.operations.append((LodOperation.SPLIT, patch))
+
+    def merge_patch_lod(self, patch, to_show, update):
+        self.operations.append((LodOperation.MERGE, patch))
+        return True
+
+    def remove_patch_lod(self, patch):
+        pass
+
+    def finish_lod(self, update):
+        pass
+
+
+class ShapeObject:
+    def __init__(self):
+        self.shape = RecordingShape()
+
+    def apply_lod_changes(self, to_show, update):
+        pass
+
+
+class LodResult:
+    def __init__(self, to_split, to_merge):
+        self.to_remove = []
+        self.to_show = []
+        self.to_split = to_split
+        self.to_merge = to_merge
+
+
+def make_nodes(count, apparent_size, children):
+    nodes = []
+    for i in range(count):
+        patch = Patch()
+        if children:
+            patch.children = [Patch(patch) for j in range(4)]
+        node = QuadTreeNode(patch, apparent_size)
+        patch.quadtree_node = node
+        nodes.append(node)
+    return nodes
+
+
+def test_merges_are_not_starved(monkeypatch):
+    monkeypatch.setattr(settings, 'lod_scheduler_budget', 0.0)
+    monkeypatch.setattr(settings, 'lod_scheduler_min_merges', 2)
+    scheduler = LodScheduler()
+    shape_object = ShapeObject()
+    splits = make_nodes(10, 1000.0, False)
+    merges = make_nodes(5, 10.0, True)
+    scheduler.add_candidates(shape_object, LodResult(splits, merges))
+    scheduler.process()
+    kinds = [kind for (kind, patch) in shape_object.shape.operations]
+    assert kinds == [LodOperation.SPLIT, LodOperation.MERGE, LodOperation.MERGE]
+    assert len(scheduler.backlog) == 9 + 3
@@ -0,0 +1,207 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import BoundingBox, LMatrix4, LPoint3, LPoint3d, LVector3, LVector3d
+from panda3d.core import OrthographicLens, PerspectiveLens
+import pytest
+import random
+
+from cosmonium.pyrendering.lodcontrol import LodControl, TextureLodControl, TextureOrVertexSizeLodControl
+from cosmonium.pyrendering.lodcontrol import VertexSizeLodControl, VertexSizeMaxDistanceLodControl
+from cosmonium.pyrendering.cullingfrustum import CullingFrustum
+from cosmonium.pyrendering.lodresult import LodResult
+from cosmonium.pyrendering.quadtree import QuadTreeNode
+from cosmonium.pyrendering.quadtreelod import QuadTreeLodEvaluator
+
+
+class RandomFrustum:
+    """
+    Culling frustum without lens bounds, the visibility of each patch is drawn randomly once.
+    """
+
+    def __init__(self, rng, probability):
+        self.rng = rng
+        self.probability = probability
+        self.visibility = {}
+
+    def is_visible(self, key):
+        if key not in self.visibility:
+            self.visibility[key] = self.rng.random() < self.probability
+        return self.visibility[key]
+
+    def is_bb_in_view(self, bb, patch_offset_vector, patch_offset):
+        return self.is_visible((tuple(bb.get_min()), tuple(bb.get_max())))
+
+    def is_patch_in_view(self, patch):
+        return self.is_bb_in_view(patch.bounds, patch.offset_vector, patch.offset)
+
+
+def make_node(rng, lod, x, y, length, density):
+    centre = LPoint3d(x + length / 2, y + length / 2, rng.uniform(-0.1, 0.1) * length)
+    bounds = BoundingBox(LPoint3(x, y, -length / 10), LPoint3(x + length, y + length, length / 10))
+    node = QuadTreeNode(None, lod, density, centre, length, LVector3d(0, 0, 1), 0.0, bounds)
+    node.shown = rng.random() < 0.5
+    node.instance_ready = rng.random() < 0.5
+    return node
+
+
+def build_tree(rng, node, x, y, max_depth):
+    if node.lod >= max_depth or rng.random() < 0.4:
+        return
+    half = node.length / 2
+    for (i, j) in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        child = make_node(rng, node.lod + 1, x + i * half, y + j * half, half, node.density)
+        node.add_child(child)
+        build_tree(rng, child, x + i * half, y + j * half, max_depth)
+
+
+def build_trees(rng):
+    roots = []
+    for i in range(rng.randint(1, 4)):
+        root = make_node(rng, 0, i * 100.0, 0.0, 100.0, rng.choice((8, 16, 32)))
+        build_tree(rng, root, i * 100.0, 0.0, 6)
+        roots.append(root)
+    return roots
+
+
+def make_lod_controls():
+    texture = TextureLodControl(min_density=8, density=32, max_lod=4)
+    texture.set_texture_size(512)
+    texture_or_vertex = TextureOrVertexSizeLodControl(max_vertex_size=8, min_density=8, density=32, max_lod=5)
+    texture_or_vertex_no_texture = TextureOrVertexSizeLodControl(max_vertex_size=8, min_density=8, density=32)
+    texture_or_vertex.set_texture_size(256)
+    return [
+        LodControl(),
+        texture,
+        texture_or_vertex,
+        texture_or_vertex_no_texture,
+        VertexSizeLodControl(max_vertex_size=16, density=32, max_lod=5),
+        VertexSizeMaxDistanceLodControl(max_distance=150.0, max_vertex_size=16, density=32),
+    ]
+
+
+def check_lod(roots, evaluator, lod_control, camera_pos, altitude, pixel_size, frustum):
+    lod_result = LodResult()
+    if evaluator is not None:
+        evaluator.check_lod(roots, lod_result, frustum, None, camera_pos, None, altitude, pixel_size, lod_control)
+    else:
+        for root in roots:
+            root.check_lod(lod_result, frustum, None, camera_pos, None, altitude, pixel_size, lod_control)
+    return lod_result
+
+
+@pytest.mark.parametrize('lod_control', make_lod_controls(), ids=lambda lod_control: lod_control.__class__.__name__)
+@pytest.mark.parametrize('seed', range(20))
+def test_evaluator_matches_check_lod(lod_control, seed):
+    rng = random.Random(seed)
+    roots = build_trees(rng)
+    camera_pos = LPoint3d(rng.uniform(-50, 400), rng.uniform(-50, 150), rng.uniform(1, 200))
+    altitude = camera_pos[2]
+    pixel_size = 10 ** rng.uniform(-5, -2)
+    frustum = RandomFrustum(rng, 0.7)
+    expected = check_lod(roots, None, lod_control, camera_pos, altitude, pixel_size, frustum)
+    expected_state = [(node.distance, node.visible, node.apparent_size) for node in expected.to_split]
+    result = check_lod(roots, QuadTreeLodEvaluator(), lod_control, camera_pos, altitude, pixel_size, frustum)
+    assert [id(node) for node in result.to_split] == [id(node) for node in expected.to_split]
+    assert [id(node) for node in result.to_merge] == [id(node) for node in expected.to_merge]
+    assert [id(node) for node in result.to_show] == [id(node) for node in expected.to_show]
+    assert [id(node) for node in result.to_remove] == [id(node) for node in expected.to_remove]
+    assert result.max_lod == expected.max_lod
+    for node, (distance, visible, apparent_size) in zip(result.to_split, expected_state):
+        assert node.distance == pytest.approx(distance)
+        assert node.visible == visible
+        assert node.apparent_size == pytest.approx(apparent_size)
+
+
+def make_culling_frustum(rng, lens, offset_body_center, shift_patch_origin):
+    axis = LVector3(rng.gauss(0, 1), rng.gauss(0, 1), rng.gauss(0, 1))
+    axis.normalize()
+    transform_mat = LMatrix4.rotate_mat(rng.uniform(0, 360), axis) * LMatrix4.translate_mat(
+        rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50)
+    )
+    model_body_center_offset = LVector3d(rng.uniform(-20, 20), rng.uniform(-20, 20), rng.uniform(-20, 20))
+    return CullingFrustum(
+        lens, transform_mat, 1.0, 200.0, offset_body_center, model_body_center_offset, shift_patch_origin
+    )
+
+
+def make_random_box_node(rng):
+    x, y, z = rng.uniform(-200, 200), rng.uniform(-200, 200), rng.uniform(-200, 200)
+    size = 10 ** rng.uniform(-1, 2)
+    bounds = BoundingBox(LPoint3(x, y, z), LPoint3(x + size * rng.random(), y + size * rng.random(), z + size))
+    offset_vector = LVector3d(rng.gauss(0, 1), rng.gauss(0, 1), rng.gauss(0, 1))
+    offset_vector.normalize()
+    return QuadTreeNode(None, 0, 8, LPoint3d(x, y, z), size, offset_vector, rng.uniform(-10, 10), bounds)
+
+
+@pytest.mark.parametrize('shift_patch_origin', [False, True])
+@pytest.mark.parametrize('offset_body_center', [False, True])
+@pytest.mark.parametrize('seed', range(10))
+def test_bb_in_view_matches_lens_bounds(seed, offset_body_center, shift_patch_origin):
+    rng = random.Random(seed)
+    lens = PerspectiveLens()
+    lens.set_fov(rng.uniform(20, 120), rng.uniform(20, 90))
+    frustum = make_culling_frustum(rng, lens, offset_body_center, shift_patch_origin)
+    nodes = [make_random_box_node(rng) for i in range(500)]
+    evaluator = QuadTreeLodEvaluator()
+    evaluator.flatten(nodes)
+    expected = [frustum.is_patch_in_view(node) for node in nodes]
+    assert any(expected) and not all(expected)
+    assert evaluator.bb_in_view(frustum).tolist() == expected
+
+
+def test_bb_in_view_edge_touching_boxes():
+    # The planes of an orthographic lens are aligned with the axes, the boxes can touch them exactly
+    lens = OrthographicLens()
+    lens.set_film_size(20, 10)
+    frustum = CullingFrustum(lens, LMatrix4.ident_mat(), 1.0, 100.0, False, LVector3d(), False)
+    nodes = []
+    for x in (-15, -10, -9.5, 10, 9.5):
+        for z in (-10, -5, -4.5, 5, 4.5):
+            for y in (-10, 0, 1, 50, 100, 110):
+                # Each box has a corner at (x, y, z) and extends away from the centre of the frustum
+                sign_x = -1 if x < 0 else 1
+                sign_z = -1 if z < 0 else 1
+                sign_y = -1 if y < 50 else 1
+                corners = (LPoint3(x, y, z), LPoint3(x + sign_x * 5, y + sign_y * 5, z + sign_z * 5))
+                bounds = BoundingBox(LPoint3(*map(min, *corners)), LPoint3(*map(max, *corners)))
+                nodes.append(QuadTreeNode(None, 0, 8, LPoint3d(x, y, z), 5, LVector3d(0, 0, 1), 0.0, bounds))
+    evaluator = QuadTreeLodEvaluator()
+    evaluator.flatten(nodes)
+    expected = [frustum.is_patch_in_view(node) for node in nodes]
+    assert any(expected) and not all(expected)
+    assert evaluator.bb_in_view(frustum).tolist() == expected
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_evaluator_matches_check_lod_with_lens_bounds(seed):
+    rng = random.Random(seed)
+    roots = build_trees(rng)
+    lens = PerspectiveLens()
+    lens.set_fov(rng.uniform(20, 120), rng.uniform(20, 90))
+    frustum = make_culling_frustum(rng, lens, rng.random() < 0.5, rng.random() < 0.5)
+    lod_control = VertexSizeLodControl(max_vertex_size=16, density=32, max_lod=5)
+    camera_pos = LPoint3d(rng.uniform(-50, 400), rng.uniform(-50, 150), rng.uniform(1, 200))
+    expected = check_lod(roots, None, lod_control, camera_pos, camera_pos[2], 1e-3, frustum)
+    result = check_lod(roots, QuadTreeLodEvaluator(), lod_control, camera_pos, camera_pos[2], 1e-3, frustum)
+    assert [id(node) for node in result.to_split] == [id(node) for node in expected.to_split]
+    assert [id(node) for node in result.to_merge] == [id(node) for node in expected.to_merge]
+    assert [id(node) for node in result.to_show] == [id(node) for node in expected.to_show]
+    assert [id(node) for node in result.to_remove] == [id(node) for node in expected.to_remove]
@@ -0,0 +1,118 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from panda3d.core import LPoint3d, LQuaterniond, LVector3d
+import random
+
+from cosmonium.scene.pyscene.sceneanchor import SceneAnchor, SceneAnchorBatch
+
+
+class PointAnchor:
+    def __init__(self, rng):
+        self.resolved = False
+        self.rel_position = LPoint3d(rng.uniform(-1e9, 1e9), rng.uniform(-1e9, 1e9), rng.uniform(-1e9, 1e9))
+        self._position = LPoint3d(self.rel_position)
+        self.distance_to_obs = self.rel_position.length()
+        self.vector_to_obs = LVector3d(-self.rel_position / self.distance_to_obs)
+        self._orientation = LQuaterniond()
+
+
+class SceneManager:
+    midPlane = 1e5
+    scale = 1.0
+
+
+class RecordingInstance:
+    """
+    Records the transforms written on the instance of a scene anchor.
+    """
+
+    def __init__(self):
+        self.writes = []
+
+    def set_pos(self, *pos):
+        self.writes.append('pos')
+
+    def set_quat(self, quat):
+        self.writes.append('quat')
+
+    def set_scale(self, scale):
+        self.writes.append('scale')
+
+
+def make_scene_anchors(rng, count):
+    scene_anchors = []
+    for i in range(count):
+        scene_anchor = SceneAnchor(PointAnchor(rng), False, None, apply_orientation=i % 2 == 0)
+        scene_anchor.instance = RecordingInstance()
+        scene_anchor.unshifted_instance = RecordingInstance()
+        scene_anchors.append(scene_anchor)
+    return scene_anchors
+
+
+def clear_writes(scene_anchors):
+    for scene_anchor in scene_anchors:
+        scene_anchor.instance.writes = []
+
+
+def test_unchanged_anchors_are_not_written():
+    rng = random.Random(0)
+    batch = SceneAnchorBatch()
+    scene_anchors = make_scene_anchors(rng, 20)
+    batch.update(SceneManager(), scene_anchors)
+    for scene_anchor in scene_anchors:
+        assert 'pos' in scene_anchor.instance.writes
+        assert scene_anchor.unshifted_instance.writes == ['pos']
+    clear_writes(scene_anchors)
+    batch.update(SceneManager(), scene_anchors)
+    for scene_anchor in scene_anchors:
+        assert scene_anchor.instance.writes == []
+
+
+def test_changed_anchors_are_written():
+    rng = random.Random(1)
+    batch = SceneAnchorBatch()
+    scene_anchors = make_scene_anchors(rng, 20)
+    batch.update(SceneManager(), scene_anchors)
+    clear_writes(scene_anchors)
+    moved = scene_anchors[3]
+    moved.anchor.rel_position += LVector3d(1e6, 0, 0)
+    moved.anchor._position = LPoint3d(moved.anchor.rel_position)
+    rotated = scene_anchors[4]
+    rotated.anchor._orientation = LQuaterniond(0, 1, 0, 0)
+    batch.update(SceneManager(), scene_anchors)
+    for scene_anchor in scene_anchors:
+        if scene_anchor is moved or scene_anchor is rotated:
+            assert 'pos' in scene_anchor.instance.writes
+        else:
+            assert scene_anchor.instance.writes == []
+    assert 'quat' in rotated.instance.writes
+    assert batch.positions[3][0] == moved.scene_position[0]
+
+
+def test_new_instances_are_written():
+    rng = random.Random(2)
+    batch = SceneAnchorBatch()
+    scene_anchors = make_scene_anchors(rng, 5)
+    batch.update(SceneManager(), scene_anchors)
+    scene_anchors[1].instance = RecordingInstance()
+    batch.update(SceneManager(), scene_anchors)
+    assert 'pos' in scene_anchors[1].instance.writes
+    assert scene_anchors[0].instance.writes.count('pos') == 1
@@ -0,0 +1,62 @@
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import random
+
+from cosmonium.astro.spectraltype import spectralTypeIntDecoder, spectralTypeStringDecoder
+
+spectral_types = [
+    'O5V', 'B0.5Ia', 'B9IV-V', 'A0V', 'A1Vm', 'F5IV-V', 'G2V', 'G8III', 'K0III-IV', 'K5Iab', 'M0V', 'M4.5Ve', 'M2Iab:',
+    'L2', 'T6.5', 'Y0', 'C5,4', 'R8', 'N', 'S3.5/2', 'WC8', 'WN6', 'DA2', 'DB', 'DQ6', 'DZ8', 'sdB', 'kA2hA5mA7V',
+    'G8III-IV+K1V', 'K2', 'M', 'A', '', '?', 'Q', 'B2IV/V', 'F0p', 'gK0', 'dM3',
+]
+
+
+def int_spectral_codes():
+    codes = []
+    for stellar_class in range(16):
+        for sub_class in range(16):
+            for luminosity in range(9):
+                codes.append((stellar_class << 8) | (sub_class << 4) | luminosity)
+    for stellar_class in range(8):
+        for sub_class in range(16):
+            codes.append((1 << 12) | (stellar_class << 8) | (sub_class << 4))
+    codes.append(2 << 12)
+    return codes
+
+
+def check_decode_array(decoder, values):
+    values = values * 3
+    random.Random(0).shuffle(values)
+    decoded, temperatures = decoder.decode_array(values)
+    assert len(decoded) == len(values)
+    assert temperatures.shape == (len(values),)
+    for value, spectral_type, temperature in zip(values, decoded, temperatures.tolist()):
+        expected = decoder.decode(value)
+        assert spectral_type is expected
+        assert temperature == expected.temperature
+
+
+def test_string_decode_array():
+    check_decode_array(spectralTypeStringDecoder, list(spectral_types))
+
+
+def test_int_decode_array():
+    check_decode_array(spectralTypeIntDecoder, int_spectral_codes())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+from panda3d.core import Texture  # noqa: E402
+
+from cosmonium.texturecache import texture_cache  # noqa: E402
+from cosmonium.textures import TextureConfiguration  # noqa: E402
+from cosmonium import settings  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Precompile texture files into the Cosmonium texture cache")
+parser.add_argument("directories", nargs='+', help="Directories containing the textures to convert")
+parser.add_argument("--no-mipmaps", action='store_true', help="Do not precompute the mipmaps")
+parser.add_argument("--compress", action='store_true', help="Compress the textures using the driver formats")
+parser.add_argument("--cache-dir", help="Path to the cache directory")
+args = parser.parse_args()
+
+if args.cache_dir is not None:
+    settings.cache_dir = os.path.abspath(args.cache_dir)
+settings.texture_cache = True
+settings.texture_cache_compress = args.compress
+
+if args.no_mipmaps:
+    texture_config = TextureConfiguration(minfilter=Texture.FT_linear)
+else:
+    texture_config = TextureConfiguration(minfilter=Texture.FT_linear_mipmap_linear)
+
+print("Cache directory:", settings.cache_dir)
+for directory in args.directories:
+    (found, baked) = texture_cache.bake_directory(directory, texture_config)
+    print("{}: {} textures found, {} baked".format(directory, found, baked))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+import gettext  # noqa: E402
+import gc  # noqa: E402
+import numpy  # noqa: E402
+import tracemalloc  # noqa: E402
+from time import time  # noqa: E402
+from panda3d.core import LVector3d  # noqa: E402
+
+gettext.NullTranslations().install()
+
+from cosmonium.astro.blackbody import temp_to_RGB_array  # noqa: E402
+from cosmonium.astro.frame import J2000BarycentricEclipticReferenceFrame  # noqa: E402
+from cosmonium.astro.spectraltype import spectralTypeIntDecoder  # noqa: E402
+from cosmonium.astro import units  # noqa: E402
+from cosmonium.celestia.star_parser import create_star  # noqa: E402
+from cosmonium.objects.universe import Universe  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Measure the memory used by each body of a synthetic star catalogue")
+parser.add_argument("--count", type=int, default=20000, help="Number of stars to create")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+parser.add_argument("--top", type=int, default=10, help="Number of allocation sites to report")
+args = parser.parse_args()
+
+generator = numpy.random.default_rng(args.seed)
+positions = (generator.random((args.count, 3)) - 0.5) * 2000 * units.Ly
+abs_magnitudes = generator.normal(5.0, 3.0, args.count)
+# Main sequence stars from O0 to M9, using the Celestia packed spectral type encoding
+spectral_codes = (generator.integers(0, 7, args.count) << 8) | (generator.integers(0, 10, args.count) << 4) | 5
+spectral_types, temperatures = spectralTypeIntDecoder.decode_array(spectral_codes)
+point_colors = temp_to_RGB_array(temperatures, linear=True)
+
+
+def load_stars(universe):
+    for catNo, position, abs_magnitude, spectral_type, temperature, point_color in zip(
+        range(args.count),
+        positions.tolist(),
+        abs_magnitudes.tolist(),
+        spectral_types,
+        temperatures.tolist(),
+        point_colors.tolist(),
+    ):
+        star = create_star(
+            catNo,
+            {},
+            LVector3d(*position),
+            J2000BarycentricEclipticReferenceFrame(),
+            abs_magnitude,
+            spectral_type,
+            temperature,
+            point_color,
+        )
+        universe.add_child_fast(star)
+
+
+# The load time is measured without tracemalloc, which slows down the allocations a lot
+gc.collect()
+start_time = time()
+load_stars(Universe(100 * units.GLy))
+load_time = time() - start_time
+
+gc.collect()
+tracemalloc.start()
+start = tracemalloc.take_snapshot()
+load_stars(Universe(100 * units.GLy))
+gc.collect()
+end = tracemalloc.take_snapshot()
+tracemalloc.stop()
+
+stats = end.compare_to(start, 'lineno')
+total = sum(stat.size_diff for stat in stats)
+print("Bodies:", args.count)
+print("Load time: {:.2f} s ({:.1f} us/body)".format(load_time, load_time / args.count * 1e6))
+print("Total: {:.1f} MiB".format(total / 1024 / 1024))
+print("Per body: {:.0f} bytes".format(total / args.count))
+for stat in stats[: args.top]:
+    print("{:>8.0f} B/body  {}".format(stat.size_diff / args.count, stat.traceback[0]))
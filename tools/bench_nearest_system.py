@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+import gettext  # noqa: E402
+import gc  # noqa: E402
+import numpy  # noqa: E402
+from time import time  # noqa: E402
+from panda3d.core import LPoint3d, LVector3d  # noqa: E402
+
+gettext.NullTranslations().install()
+
+from cosmonium.astro.blackbody import temp_to_RGB_array  # noqa: E402
+from cosmonium.astro.frame import AbsoluteReferenceFrame, J2000BarycentricEclipticReferenceFrame  # noqa: E402
+from cosmonium.astro.spectraltype import spectralTypeIntDecoder  # noqa: E402
+from cosmonium.astro import units  # noqa: E402
+from cosmonium.celestia.star_parser import create_star  # noqa: E402
+from cosmonium.engine.anchors import CameraAnchor  # noqa: E402
+from cosmonium.engine.traversers import FindClosestSystemTraverser  # noqa: E402
+from cosmonium.objects.universe import Universe  # noqa: E402
+from cosmonium.systemsindex import SystemsIndex  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Compare the nearest system search of the k-d tree and of the octree")
+parser.add_argument("--count", type=int, default=50000, help="Number of stars to create")
+parser.add_argument("--positions", type=int, default=300, help="Number of observer positions")
+parser.add_argument("--step", type=float, default=1.0, help="Length of a step of the random walk, in light years")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+args = parser.parse_args()
+
+size = 2000 * units.Ly
+generator = numpy.random.default_rng(args.seed)
+positions = (generator.random((args.count, 3)) - 0.5) * size
+abs_magnitudes = generator.normal(5.0, 3.0, args.count)
+# Main sequence stars from O0 to M9, using the Celestia packed spectral type encoding
+spectral_codes = (generator.integers(0, 7, args.count) << 8) | (generator.integers(0, 10, args.count) << 4) | 5
+spectral_types, temperatures = spectralTypeIntDecoder.decode_array(spectral_codes)
+point_colors = temp_to_RGB_array(temperatures, linear=True)
+
+universe = Universe(100 * units.GLy)
+for catNo, position, abs_magnitude, spectral_type, temperature, point_color in zip(
+    range(args.count),
+    positions.tolist(),
+    abs_magnitudes.tolist(),
+    spectral_types,
+    temperatures.tolist(),
+    point_colors.tolist(),
+):
+    star = create_star(
+        catNo,
+        {},
+        LVector3d(*position),
+        J2000BarycentricEclipticReferenceFrame(),
+        abs_magnitude,
+        spectral_type,
+        temperature,
+        point_color,
+    )
+    universe.add_child_fast(star)
+    # The positions of the stars are only computed when their anchor is updated
+    star.anchor.update(units.J2000, 0)
+
+gc.collect()
+start = time()
+universe.rebuild()
+octree_time = time() - start
+index = SystemsIndex(universe)
+start = time()
+index.check_index()
+index_time = time() - start
+
+observer = CameraAnchor(None, AbsoluteReferenceFrame())
+
+
+def move_observer(position):
+    # Like the camera, the observer is kept close to its reference point
+    observer.set_absolute_reference_point(LPoint3d(*position))
+    observer.set_local_position(LPoint3d())
+    observer.do_update()
+
+
+def find_with_traverser(previous):
+    # Same search as Cosmonium.find_nearest_system without the index
+    if previous is not None:
+        distance = (previous.anchor.get_absolute_position() - observer.get_absolute_position()).length()
+        traverser = FindClosestSystemTraverser(observer, previous.anchor, distance)
+    else:
+        traverser = FindClosestSystemTraverser(observer, None, float('inf'))
+    universe.anchor.traverse(traverser)
+    return traverser.closest_system.body if traverser.closest_system is not None else None
+
+
+def find_with_index(previous):
+    return index.find_nearest(observer, previous)
+
+
+def run(observer_positions, find):
+    nearest = None
+    results = []
+    duration = 0.0
+    for position in observer_positions:
+        move_observer(position)
+        start = time()
+        nearest = find(nearest)
+        duration += time() - start
+        results.append(nearest)
+    return duration, results
+
+
+random_positions = (generator.random((args.positions, 3)) - 0.5) * size
+steps = generator.normal(size=(args.positions, 3))
+steps *= args.step * units.Ly / numpy.linalg.norm(steps, axis=1)[:, numpy.newaxis]
+walk_positions = numpy.cumsum(steps, axis=0) + random_positions[0]
+
+print("Stars:", args.count)
+print("Octree build: {:.2f} s, index build: {:.2f} s".format(octree_time, index_time))
+for name, observer_positions in (("Random positions", random_positions), ("Random walk", walk_positions)):
+    traverser_time, traverser_results = run(observer_positions, find_with_traverser)
+    index_time, index_results = run(observer_positions, find_with_index)
+    mismatches = sum(a is not b for a, b in zip(traverser_results, index_results))
+    print(
+        "{}: octree {:.2f} ms/query, index {:.2f} ms/query, speedup {:.1f}, {} mismatches".format(
+            name,
+            traverser_time / args.positions * 1000,
+            index_time / args.positions * 1000,
+            traverser_time / index_time,
+            mismatches,
+        )
+    )
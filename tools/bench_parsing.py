@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+import gettext  # noqa: E402
+import io  # noqa: E402
+import multiprocessing  # noqa: E402
+import numpy  # noqa: E402
+from time import time  # noqa: E402
+
+gettext.NullTranslations().install()
+
+from cosmonium.celestia import config_parser  # noqa: E402
+from cosmonium.celestia import star_parser  # noqa: E402
+from cosmonium.catalogsnapshot import catalogue_snapshot  # noqa: E402
+from cosmonium.parallelparser import parallel_parser, split_lines  # noqa: E402
+from cosmonium import settings  # noqa: E402
+
+
+def parse_stars(filepath):
+    lines = open(filepath).readlines()[1:]
+    chunks = split_lines(lines, settings.parallel_parsing_chunk_size)
+    results = parallel_parser.map(star_parser.parse_lines, chunks)
+    return (
+        numpy.concatenate([result[0] for result in results]).tolist(),
+        numpy.concatenate([result[1] for result in results]).tolist(),
+        [spectral_type for result in results for spectral_type in result[2]],
+    )
+
+
+def parse_names(filepath):
+    lines = io.open(filepath, encoding='latin-1').readlines()
+    chunks = split_lines(lines, settings.parallel_parsing_chunk_size)
+    return [entry for entries in parallel_parser.map(star_parser.parse_names_lines, chunks) for entry in entries]
+
+
+def parse_catalogue(filepath):
+    return config_parser.parse_items(io.open(filepath, encoding='latin-1').read())
+
+
+def get_parse_function(filepath):
+    if filepath.endswith('.txt'):
+        if os.path.basename(filepath).startswith('starnames'):
+            return parse_names
+        else:
+            return parse_stars
+    else:
+        return parse_catalogue
+
+
+def bench_snapshot(filepath):
+    if not filepath.endswith('.txt'):
+        print("  No snapshot for catalogue files")
+        return
+    if os.path.basename(filepath).startswith('starnames'):
+        (kind, parse_function) = ('starnames', star_parser.parse_names)
+    else:
+        (kind, parse_function) = ('stars', star_parser.parse_text)
+    start = time()
+    fresh = parse_function(filepath)
+    parse_time = time() - start
+    key = catalogue_snapshot.calc_key(filepath)
+    catalogue_snapshot.save(kind, filepath, key, fresh, parse_time)
+    start = time()
+    (restored, _) = catalogue_snapshot.restore(kind, filepath, key)
+    restore_time = time() - start
+    print(
+        "  parsed in {:.2f} s, restored from snapshot in {:.2f} s, speedup {:.2f}, {} different entries".format(
+            parse_time, restore_time, parse_time / restore_time, catalogue_snapshot.compare(restored, fresh)
+        )
+    )
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Measure the parsing time of catalogue files with 1 to N workers")
+    parser.add_argument("files", nargs='+', help="Star (.txt), star names (starnames*.txt), stc, ssc or dsc files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Maximum number of worker processes")
+    parser.add_argument("--chunk-size", type=int, help="Size of the chunks in characters")
+    parser.add_argument("--snapshot", action='store_true', help="Compare the parsing time with the snapshot restore")
+    args = parser.parse_args()
+
+    settings.parallel_parsing = True
+    settings.parallel_parsing_min_size = 0
+    if args.chunk_size is not None:
+        settings.parallel_parsing_chunk_size = args.chunk_size
+    for filepath in args.files:
+        parse_function = get_parse_function(filepath)
+        print(filepath, "({:.1f} MiB)".format(os.path.getsize(filepath) / 1024 / 1024))
+        if args.snapshot:
+            settings.parallel_parsing_workers = args.workers
+            bench_snapshot(filepath)
+            continue
+        reference = None
+        reference_time = None
+        for nb_workers in range(1, args.workers + 1):
+            settings.parallel_parsing_workers = nb_workers
+            # Start the workers before the measure
+            parallel_parser.map(abs, [0] * nb_workers)
+            start = time()
+            result = parse_function(filepath)
+            duration = time() - start
+            if reference is None:
+                reference = result
+                reference_time = duration
+                identical = True
+            else:
+                identical = result == reference
+            print(
+                "  {} workers: {:.2f} s, speedup {:.2f}, {}".format(
+                    nb_workers, duration, reference_time / duration, 'identical' if identical else 'DIFFERENT'
+                )
+            )
+    parallel_parser.shutdown()
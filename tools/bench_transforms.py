@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+import gettext  # noqa: E402
+import gc  # noqa: E402
+import numpy  # noqa: E402
+from math import pi  # noqa: E402
+from time import time  # noqa: E402
+from panda3d.core import LPoint3d, LQuaterniond, LVector3d  # noqa: E402
+
+gettext.NullTranslations().install()
+
+# Only the python implementation of the frames and anchors memoises the transforms, it is used explicitly
+from cosmonium.astro.pyastro.frame import J2000BarycentricEclipticReferenceFrame  # noqa: E402
+from cosmonium.astro.pyastro.frame import AnchorReferenceFrame, J2000EclipticReferenceFrame  # noqa: E402
+from cosmonium.astro.pyastro.frame import RelativeReferenceFrame  # noqa: E402
+from cosmonium.astro.pyastro.frame import EquatorialReferenceFrame, SynchroneReferenceFrame  # noqa: E402
+from cosmonium.astro.pyastro.orbits import AbsoluteFixedPosition, EllipticalOrbit  # noqa: E402
+from cosmonium.astro.pyastro.rotations import UniformRotation  # noqa: E402
+from cosmonium.astro import units  # noqa: E402
+from cosmonium.engine.pyengine.anchors import CartesianAnchor, DynamicStellarAnchor, StellarAnchor  # noqa: E402
+
+# Semi-major axis (AU), period (days) and number of moons of the planets of the Solar System
+planets = (
+    (0.387, 87.97, 0),
+    (0.723, 224.70, 0),
+    (1.000, 365.25, 1),
+    (1.524, 686.98, 2),
+    (5.203, 4332.59, 95),
+    (9.537, 10759.22, 146),
+    (19.191, 30688.50, 28),
+    (30.069, 60182.00, 16),
+)
+
+parser = argparse.ArgumentParser(description="Measure the update time of the frames and anchors of a Solar System")
+parser.add_argument("--frames", type=int, default=200, help="Number of frames to simulate")
+parser.add_argument("--objects", type=int, default=200, help="Number of cartesian objects attached to the bodies")
+parser.add_argument("--queries", type=int, default=4, help="Number of transform queries per object and per frame")
+parser.add_argument("--focused", type=int, default=10, help="Number of bodies updated again as focused objects")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+args = parser.parse_args()
+
+generator = numpy.random.default_rng(args.seed)
+
+
+def random_orientation(max_angle):
+    orientation = LQuaterniond()
+    axis = LVector3d(*generator.normal(size=3))
+    axis.normalize()
+    orientation.setFromAxisAngleRad(generator.uniform(0, max_angle), axis)
+    return orientation
+
+
+def create_body(orbit):
+    mean_motion = 2 * pi / generator.uniform(0.2, 100)
+    rotation = UniformRotation(random_orientation(pi / 4), mean_motion, 0.0, units.J2000, None)
+    anchor = DynamicStellarAnchor(StellarAnchor.Reflective, None, orbit, rotation, None)
+    rotation.set_frame(J2000EclipticReferenceFrame(anchor))
+    return anchor
+
+
+def create_orbit(frame, distance, period):
+    eccentricity = generator.uniform(0, 0.2)
+    return EllipticalOrbit(
+        frame,
+        units.J2000,
+        2 * pi / period,
+        generator.uniform(0, 2 * pi),
+        distance * (1.0 - eccentricity),
+        eccentricity,
+        generator.uniform(0, 2 * pi),
+        generator.uniform(0, pi / 8),
+        generator.uniform(0, 2 * pi),
+    )
+
+
+def create_solar_system():
+    sun = create_body(AbsoluteFixedPosition(J2000BarycentricEclipticReferenceFrame(), LPoint3d()))
+    bodies = [sun]
+    sun_frame = J2000EclipticReferenceFrame(sun)
+    for distance, period, nb_moons in planets:
+        planet = create_body(create_orbit(sun_frame, distance * units.AU, period))
+        bodies.append(planet)
+        planet_frame = EquatorialReferenceFrame(planet)
+        for i in range(nb_moons):
+            orbit = create_orbit(planet_frame, generator.uniform(1e5, 2e7), generator.uniform(0.5, 1000))
+            bodies.append(create_body(orbit))
+    objects = []
+    for i in range(args.objects):
+        body = bodies[generator.integers(0, len(bodies))]
+        if i % 2 == 0:
+            frame = SynchroneReferenceFrame(body)
+        else:
+            parent_frame = EquatorialReferenceFrame(body)
+            frame = RelativeReferenceFrame(parent_frame, LPoint3d(1000, 0, 0), random_orientation(pi))
+        anchor = CartesianAnchor(0, None, frame)
+        anchor.set_frame_position(LPoint3d(*generator.normal(size=3) * 10000))
+        anchor.set_frame_orientation(random_orientation(pi))
+        objects.append(anchor)
+    focused = generator.choice(bodies, args.focused).tolist()
+    return bodies, objects, focused
+
+
+def simulate(cache):
+    bodies, objects, focused = create_solar_system()
+    sim_time = units.J2000
+    gc.collect()
+    start = time()
+    for update_id in range(args.frames):
+        sim_time += 0.1
+        # The bodies are ordered from the primaries to their satellites, like in the update traverser
+        for anchor in bodies:
+            anchor.update(sim_time, update_id)
+        # The focused objects are updated a second time, outside of the traverser
+        for anchor in focused:
+            if not cache:
+                anchor.transform_update_id = -1
+            anchor.update(sim_time, update_id)
+        for anchor in objects:
+            anchor.do_update()
+            for i in range(args.queries):
+                anchor.get_local_position()
+                anchor.get_absolute_orientation()
+    duration = time() - start
+    return duration, [anchor.get_local_position() for anchor in objects]
+
+
+def disable_cache():
+    def clear_transform_cache(self):
+        self._cached_local_position = None
+        self._cached_absolute_orientation = None
+
+    AnchorReferenceFrame.check_cache = AnchorReferenceFrame.invalidate
+    RelativeReferenceFrame.check_cache = RelativeReferenceFrame.invalidate
+    CartesianAnchor.check_transform_cache = clear_transform_cache
+
+
+# Each simulation recreates the same system, the generator is reset between the runs
+cached_time, cached_positions = simulate(True)
+generator = numpy.random.default_rng(args.seed)
+disable_cache()
+uncached_time, uncached_positions = simulate(False)
+
+error = max((a - b).length() for a, b in zip(cached_positions, uncached_positions)) if args.objects > 0 else 0.0
+nb_bodies = 1 + sum(nb_moons + 1 for distance, period, nb_moons in planets)
+print("Bodies: {}, objects: {}, frames: {}".format(nb_bodies, args.objects, args.frames))
+print("Without cache: {:.2f} s ({:.2f} ms/frame)".format(uncached_time, uncached_time / args.frames * 1000))
+print("With cache: {:.2f} s ({:.2f} ms/frame)".format(cached_time, cached_time / args.frames * 1000))
+print("Speedup: {:.2f}".format(uncached_time / cached_time))
+print("Max position difference: {:.3g} km".format(error))
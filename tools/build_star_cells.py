@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# This file is part of Cosmonium.
+#
+# Copyright (C) 2018-2024 Laurent Deru.
+#
+# Cosmonium is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Cosmonium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cosmonium.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+# Add lib/ directory to import path to be able to load the c++ libraries
+sys.path.insert(1, os.path.join(root, 'lib'))
+# Add third-party/ directory to import path to be able to load the external libraries
+sys.path.insert(1, os.path.join(root, 'third-party'))
+
+import argparse  # noqa: E402
+import gettext  # noqa: E402
+from time import time  # noqa: E402
+
+gettext.NullTranslations().install()
+
+from cosmonium.celestia import star_parser  # noqa: E402
+from cosmonium.starstream import write_cells  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Convert a Celestia binary star catalogue into a streamed cells file")
+parser.add_argument("input", help="Celestia binary star catalogue (.dat)")
+parser.add_argument("output", nargs='?', help="Cells file, by default the input file with the .cells extension")
+parser.add_argument("--max-stars", type=int, default=2000, help="Maximum number of stars in a cell")
+args = parser.parse_args()
+
+output = args.output if args.output is not None else os.path.splitext(args.input)[0] + '.cells'
+start = time()
+result = star_parser.read_bin(args.input)
+if result is None:
+    sys.exit(1)
+(catNos, positions, abs_magnitudes, spectral_codes) = result
+index = write_cells(output, catNos, positions, abs_magnitudes, spectral_codes, args.max_stars)
+print(
+    "{} stars written in {} cells (largest {}, mean {:.0f}) in {:.2f} s".format(
+        index['count'].sum(), len(index), index['count'].max(), index['count'].mean(), time() - start
+    )
+)